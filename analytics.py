@@ -0,0 +1,247 @@
+"""
+Spaltenorientierte Auswertungen (NumPy) über das ganze Haushaltsbuch (ein Konto).
+
+Die Transaktionen werden einmal in Arrays geladen: Typ und Kategorie als
+Codes (Wörterbuch-Kodierung), Datum als datetime64, Beträge in Rappen als
+int64. Gruppierungen, Saldoverlauf, Perzentile und Was-wäre-wenn-Rechnungen
+laufen danach vektorisiert im Speicher statt als wiederholte SQL-Scans.
+
+get_snapshot() hält einen Snapshot im Cache; jede Schreib-Transaktion in
+database.py verwirft ihn (Write-Listener). Änderungen durch andere Prozesse
+sieht der Cache nicht, dafür gibt es invalidate().
+"""
+import threading
+
+import numpy as np
+
+import database
+
+GROUP_KEYS = ("year", "month", "category", "type")
+
+# Ab dieser Anzahl möglicher Gruppen werden nur die vorhandenen Schlüssel
+# gezählt (np.unique) statt eines dichten Zählers über alle Kombinationen
+DENSE_GROUP_LIMIT = 2_000_000
+
+
+class LedgerSnapshot:
+    """
+    Alle Transaktionen eines Kontos als Spalten (sortiert nach ID):
+    ids, type_codes, category_codes, amounts (Rappen), dates (datetime64[s]);
+    type_names/category_names übersetzen die Codes zurück.
+    """
+
+    def __init__(self, ids, type_codes, category_codes, amounts, dates, type_names, category_names,
+                 db_path=None, ledger=None):
+        self.ids = ids
+        self.type_codes = type_codes
+        self.category_codes = category_codes
+        self.amounts = amounts
+        self.dates = dates
+        self.type_names = list(type_names)
+        self.category_names = list(category_names)
+        self.db_path = db_path
+        self.ledger = ledger
+        self._months = None
+        self._date_order = None
+
+    @classmethod
+    def load(cls, conn=None, chunk_size=100_000, ledger=None):
+        """Liest alle Transaktionen eines Kontos (Standard: aktuelles Konto) blockweise in einen neuen Snapshot."""
+        ledger = database.resolve_ledger(ledger)
+        conn = conn or database.get_connection()
+        cursor = conn.execute("""
+            SELECT id, type, amount, category_id, COALESCE(CAST(strftime('%s', date) AS INTEGER), 0)
+            FROM transactions WHERE ledger_id = ? ORDER BY id
+        """, (ledger,))
+        # Kategorien sind in der Datenbank bereits ganzzahlig kodiert; hier
+        # werden die IDs nur auf dichte Codes 0..n-1 abgebildet
+        names = dict(conn.execute("SELECT id, name FROM categories"))
+        type_index = {}
+        category_index = {}
+        parts = ([], [], [], [], [])
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            ids, types, amounts, categories, seconds = zip(*rows)
+            n = len(rows)
+            parts[0].append(np.fromiter(ids, np.int64, n))
+            parts[1].append(np.fromiter((type_index.setdefault(t, len(type_index)) for t in types), np.int8, n))
+            parts[2].append(np.fromiter(
+                (category_index.setdefault(c, len(category_index)) for c in categories), np.int32, n))
+            parts[3].append(np.fromiter(amounts, np.int64, n))
+            parts[4].append(np.fromiter(seconds, np.int64, n))
+
+        def column(chunks, dtype):
+            return np.concatenate(chunks) if chunks else np.empty(0, dtype)
+
+        return cls(
+            ids=column(parts[0], np.int64),
+            type_codes=column(parts[1], np.int8),
+            category_codes=column(parts[2], np.int32),
+            amounts=column(parts[3], np.int64),
+            dates=column(parts[4], np.int64).astype("datetime64[s]"),
+            type_names=type_index,
+            category_names=[names[category_id] for category_id in category_index],
+            db_path=database.get_db_path(),
+            ledger=ledger,
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    # ------------------------------
+    # Hilfsspalten
+    # ------------------------------
+    @property
+    def months(self):
+        """Monatsindex je Zeile (Monate seit 1970-01)."""
+        if self._months is None:
+            self._months = self.dates.astype("datetime64[M]").astype(np.int64)
+        return self._months
+
+    def type_code(self, transaction_type):
+        """Code eines Typs oder -1, wenn er nicht vorkommt."""
+        return self.type_names.index(transaction_type) if transaction_type in self.type_names else -1
+
+    def signed_amounts(self, adjust=None):
+        """Beträge in Rappen mit Vorzeichen: Einnahmen positiv, Ausgaben negativ."""
+        amounts = self.adjusted_amounts(adjust)
+        return np.where(self.type_codes == self.type_code("Ausgabe"), -amounts, amounts)
+
+    def adjusted_amounts(self, adjust=None):
+        """
+        Beträge in Rappen, optional mit Faktoren je Kategorie für
+        Was-wäre-wenn-Rechnungen, z. B. adjust={"Miete": 1.1, "Ferien": 0}.
+        """
+        if not adjust:
+            return self.amounts
+        factors = np.ones(len(self.category_names))
+        for category, factor in adjust.items():
+            if category in self.category_names:
+                factors[self.category_names.index(category)] = factor
+        return np.rint(self.amounts * factors[self.category_codes]).astype(np.int64)
+
+    def select(self, transaction_type=None, category=None, start=None, end=None):
+        """
+        Gibt eine boolesche Maske für die Filter zurück; `start`/`end` bilden
+        wie in database.py einen halboffenen Datumsbereich [start, end).
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if transaction_type is not None:
+            mask &= self.type_codes == self.type_code(transaction_type)
+        if category is not None:
+            code = self.category_names.index(category) if category in self.category_names else -1
+            mask &= self.category_codes == code
+        if start is not None:
+            mask &= self.dates >= np.datetime64(start, "s")
+        if end is not None:
+            mask &= self.dates < np.datetime64(end, "s")
+        return mask
+
+    # ------------------------------
+    # Auswertungen
+    # ------------------------------
+    def group_totals(self, by=("month",), mask=None, adjust=None):
+        """
+        Summe (Rappen) und Anzahl je Gruppe, gruppiert nach einer Kombination
+        aus "year", "month" ("YYYY-MM"), "category" und "type".
+        Gibt {schlüssel_tupel: (summe, anzahl)} zurück. Die Summen sind exakt,
+        solange eine Gruppe unter 2**53 Rappen bleibt.
+        """
+        if not by or any(key not in GROUP_KEYS for key in by):
+            raise ValueError(f"Ungültige Gruppierung {by!r}, möglich: {', '.join(GROUP_KEYS)}")
+        amounts = self.adjusted_amounts(adjust)
+        months = self.months
+        if mask is not None:
+            amounts, months = amounts[mask], months[mask]
+        if len(amounts) == 0:
+            return {}
+
+        codes, dims, decoders = [], [], []
+        for key in by:
+            if key in ("year", "month"):
+                values = months // 12 if key == "year" else months
+                first = int(values.min())
+                codes.append(values - first)
+                dims.append(int(values.max()) - first + 1)
+                if key == "year":
+                    decoders.append(lambda c, first=first: 1970 + first + c)
+                else:
+                    decoders.append(lambda c, first=first: f"{1970 + (first + c) // 12:04d}-{(first + c) % 12 + 1:02d}")
+            else:
+                column = self.category_codes if key == "category" else self.type_codes
+                names = self.category_names if key == "category" else self.type_names
+                codes.append(column[mask] if mask is not None else column)
+                dims.append(len(names))
+                decoders.append(names.__getitem__)
+
+        flat = np.ravel_multi_index(codes, dims)
+        keys = None
+        if np.prod(dims, dtype=np.float64) > DENSE_GROUP_LIMIT:
+            keys, flat = np.unique(flat, return_inverse=True)
+        size = len(keys) if keys is not None else int(np.prod(dims))
+        counts = np.bincount(flat, minlength=size)
+        sums = np.rint(np.bincount(flat, weights=amounts, minlength=size)).astype(np.int64)
+
+        present = np.flatnonzero(counts)
+        group_codes = np.unravel_index(keys[present] if keys is not None else present, dims)
+        result = {}
+        for i, index in enumerate(present):
+            key = tuple(decode(int(group_codes[k][i])) for k, decode in enumerate(decoders))
+            result[key] = (int(sums[index]), int(counts[index]))
+        return result
+
+    def running_balance(self, mask=None, adjust=None):
+        """
+        Saldoverlauf in zeitlicher Reihenfolge: gibt (daten, saldo) als Arrays
+        zurück, saldo ist die kumulierte Summe (Rappen, exakt) nach jeder Transaktion.
+        """
+        if self._date_order is None:
+            self._date_order = np.argsort(self.dates, kind="stable")
+        order = self._date_order
+        if mask is not None:
+            order = order[mask[order]]
+        return self.dates[order], np.cumsum(self.signed_amounts(adjust)[order])
+
+    def percentiles(self, q=(50, 90, 99), mask=None, adjust=None):
+        """Perzentile der Beträge (Rappen) als {q: wert}, z. B. für Ausgaben einer Kategorie."""
+        amounts = self.adjusted_amounts(adjust)
+        if mask is not None:
+            amounts = amounts[mask]
+        if len(amounts) == 0:
+            return {}
+        return dict(zip(q, np.percentile(amounts, q).tolist()))
+
+
+# ------------------------------
+# Snapshot-Cache
+# ------------------------------
+_snapshot = None
+_generation = 0   # erhöht bei jedem invalidate(), schützt vor veralteten Ladevorgängen
+_lock = threading.Lock()
+
+
+def invalidate():
+    """Verwirft den zwischengespeicherten Snapshot (wird nach jedem Schreibvorgang aufgerufen)."""
+    global _snapshot, _generation
+    _generation += 1
+    _snapshot = None
+
+
+def get_snapshot():
+    """Gibt den Snapshot des aktuellen Kontos zurück und lädt ihn bei Bedarf neu."""
+    global _snapshot
+    ledger = database.get_ledger()
+    with _lock:
+        snapshot = _snapshot
+        if snapshot is None or snapshot.db_path != database.get_db_path() or snapshot.ledger != ledger:
+            generation = _generation
+            snapshot = LedgerSnapshot.load(ledger=ledger)
+            # Während des Ladens geschrieben? Dann nur dieses Mal verwenden
+            if generation == _generation:
+                _snapshot = snapshot
+        return snapshot
+
+
+database.add_write_listener(invalidate)
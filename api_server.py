@@ -0,0 +1,516 @@
+"""
+Lokaler HTTP-Dienst mit JSON-API über database.py (nur Standardbibliothek).
+
+Viele Dashboards im LAN greifen so auf ein Haushaltsbuch zu, ohne selbst die
+SQLite-Datei zu öffnen:
+
+- Lesende Anfragen teilen sich einen Pool schreibgeschützter Verbindungen
+  (ReadPool); jede Anfrage leiht sich eine Verbindung und gibt sie zurück.
+- Schreibende Anfragen laufen nacheinander in einem einzigen Writer-Thread
+  mit einer eigenen Verbindung – es gibt keine konkurrierenden Schreib-Sperren.
+- Summen, Statistiken, Kategorien und Diagramme tragen ein ETag aus der
+  Datenversion (database.get_data_version). Mit If-None-Match antwortet der
+  Dienst 304, ohne etwas zu berechnen.
+
+Endpunkte:
+    GET  /transactions?type=&category=&start=&end=&min_amount=&max_amount=
+                      &exported=&order_by=&descending=&page_size=&after=
+    GET  /transactions/<id>
+    POST /transactions          {"type": "Ausgabe", "amount": 150000, "category": "Miete"}
+    POST /transactions/batch    {"transactions": [{...}, ...]}
+    GET  /totals                Einnahmen, Ausgaben und Saldo
+    GET  /stats                 Anzahl und Summe pro Typ
+    GET  /categories            Einnahmen/Ausgaben pro Kategorie (?start=&end=, ganze Monate)
+    GET  /charts/<name>.<png|svg>
+    GET  /export.csv?start=&end=&type=&category=&only_unexported=
+    GET  /ledgers               alle Konten mit Einnahmen, Ausgaben und Saldo (eine Abfrage)
+    GET  /metrics               Messwerte im Prometheus-Format (instrumentation.py)
+
+Alle Endpunkte ausser /ledgers und /metrics gelten für ein Konto: ?ledger=<id>
+oder das Konto des Dienstes (--ledger, sonst FINANZ_TRACKER_LEDGER bzw. Standard).
+
+Beträge sind ganze Rappen; in POST-Anfragen darf "amount" auch ein Text wie
+"1'500.00" sein (parse_chf). Ist ein Token gesetzt (--token oder
+FINANZ_TRACKER_API_TOKEN), verlangt der Dienst "Authorization: Bearer <token>".
+
+Aufruf (aus dem Projektverzeichnis):
+    python api_server.py [--host 0.0.0.0] [--port 8765] [--readers 8] [--db pfad.db] [--ledger Name]
+"""
+import argparse
+import hmac
+import io
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import database
+import instrumentation
+
+log = logging.getLogger("finanz_tracker.api")
+
+DEFAULT_PORT = 8765
+DEFAULT_READERS = 8
+MAX_BODY_BYTES = 10 * 1024 * 1024
+MAX_PAGE_SIZE = 5000
+
+
+# ------------------------------
+# Verbindungen: Lese-Pool & ein Writer
+# ------------------------------
+class ReadPool:
+    """
+    Pool von höchstens `size` schreibgeschützten Verbindungen. Verbindungen
+    werden bei Bedarf geöffnet und wiederverwendet; sind alle ausgeliehen,
+    wartet connection() auf eine freie.
+    """
+
+    def __init__(self, db_path, size=DEFAULT_READERS):
+        self.db_path = db_path
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._connections = []
+
+    @contextmanager
+    def connection(self):
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = database.connect_readonly(self.db_path, check_same_thread=False)
+                with self._lock:
+                    self._connections.append(conn)
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+class ApiError(Exception):
+    """Fehler mit HTTP-Status, wird als {"error": ...} beantwortet."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# Antwort mit beliebigem Inhalt (z. B. Bilder); sonst wird JSON gesendet
+Raw = namedtuple("Raw", ["content_type", "body"])
+
+
+# ------------------------------
+# Anfragen und Routen
+# ------------------------------
+def _bool(value):
+    value = value.strip().lower()
+    if value in ("1", "true", "ja", "yes"):
+        return True
+    if value in ("0", "false", "nein", "no"):
+        return False
+    raise ValueError(value)
+
+
+class Request:
+    """Eine Anfrage an einen Endpunkt: Pfad-Treffer, Query-Parameter, Lese-Verbindung, Body."""
+
+    def __init__(self, handler, match, query, conn):
+        self.handler = handler
+        self.server = handler.server
+        self.match = match
+        self.query = query
+        self.conn = conn
+
+    def arg(self, name, convert=str, default=None):
+        """Gibt den Query-Parameter `name` umgewandelt zurück; ungültige Werte ergeben 400."""
+        value = self.query.get(name)
+        if value is None or value == "":
+            return default
+        try:
+            return convert(value)
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Ungültiger Parameter '{name}'")
+
+    def json(self):
+        """Liest den Body als JSON."""
+        length = self.handler.headers.get("Content-Length")
+        if length is None:
+            raise ApiError(HTTPStatus.LENGTH_REQUIRED, "Content-Length fehlt")
+        if not length.isdigit():
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Ungültige Content-Length")
+        if int(length) > MAX_BODY_BYTES:
+            raise ApiError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Anfrage zu gross")
+        self.handler.body_read = True
+        try:
+            return json.loads(self.handler.rfile.read(int(length)) or b"null")
+        except ValueError:
+            raise ApiError(HTTPStatus.BAD_REQUEST, "Ungültiges JSON")
+
+    def ledger(self):
+        """Konto der Anfrage: ?ledger=<id>, sonst das Konto des Dienstes; unbekannte Konten ergeben 404."""
+        ledger = self.arg("ledger", int)
+        if ledger is None:
+            return self.server.ledger
+        with nullcontext(self.conn) if self.conn is not None else self.server.pool.connection() as conn:
+            if conn.execute("SELECT 1 FROM ledgers WHERE id = ?", (ledger,)).fetchone() is None:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"Unbekanntes Konto {ledger}")
+        return ledger
+
+    def write(self, func, *args):
+        """Führt func(*args) im Writer-Thread aus und gibt das Ergebnis zurück."""
+        return self.server.writer.submit(func, *args).result()
+
+
+Route = namedtuple("Route", ["method", "pattern", "func", "etag"])
+ROUTES = []
+
+
+def route(method, path, etag=False):
+    """Registriert einen Endpunkt; mit etag=True gilt die Datenversion als ETag."""
+    def decorator(func):
+        ROUTES.append(Route(method, re.compile(f"^{path}$"), func, etag))
+        return func
+    return decorator
+
+
+def _transaction_json(t):
+    return {"id": t.id, "type": t.type, "amount": t.amount, "chf": database.rappen_to_str(t.amount),
+            "category": t.category, "date": t.date, "exported": bool(t.exported)}
+
+
+def _parse_transaction(item):
+    """Wandelt ein JSON-Objekt in (typ, betrag_rappen, kategorie) um (ValueError bei Fehlern)."""
+    if not isinstance(item, dict):
+        raise ValueError("Erwartet ein Objekt mit type, amount und category")
+    amount = item.get("amount")
+    if isinstance(amount, str):
+        amount = database.parse_chf(amount)
+    category = item.get("category")
+    if not isinstance(category, str):
+        raise ValueError("Kategorie fehlt oder ist kein Text")
+    return database.validate_transaction(item.get("type"), amount, category)
+
+
+# ------------------------------
+# Endpunkte
+# ------------------------------
+@route("GET", "/transactions")
+def list_transactions(req):
+    page = database.query_transactions(
+        transaction_type=req.arg("type"), category=req.arg("category"),
+        start=req.arg("start"), end=req.arg("end"),
+        min_amount=req.arg("min_amount", int), max_amount=req.arg("max_amount", int),
+        exported=req.arg("exported", _bool), order_by=req.arg("order_by", default="id"),
+        descending=req.arg("descending", _bool, False),
+        page_size=min(req.arg("page_size", int, 100), MAX_PAGE_SIZE),
+        after=req.arg("after"), conn=req.conn, ledger=req.ledger())
+    return {"rows": [_transaction_json(t) for t in page.rows], "cursor": page.cursor}
+
+
+@route("GET", r"/transactions/(\d+)")
+def get_transaction(req):
+    transaction = database.get_transaction(int(req.match.group(1)), conn=req.conn, ledger=req.ledger())
+    if transaction is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, "Transaktion nicht gefunden")
+    return _transaction_json(transaction)
+
+
+def _add_and_fetch(ttype, amount, category, ledger):
+    return database.get_transaction(database.add_transaction(ttype, amount, category, ledger), ledger=ledger)
+
+
+@route("POST", "/transactions")
+def add_transaction(req):
+    transaction = req.write(_add_and_fetch, *_parse_transaction(req.json()), req.ledger())
+    return HTTPStatus.CREATED, _transaction_json(transaction)
+
+
+@route("POST", "/transactions/batch")
+def add_transactions(req):
+    body = req.json()   # vor dem Konto lesen: auch ein 404 lässt keinen Body auf der Verbindung
+    ledger = req.ledger()
+    items = body.get("transactions") if isinstance(body, dict) else None
+    if not isinstance(items, list):
+        raise ApiError(HTTPStatus.BAD_REQUEST, "Erwartet {\"transactions\": [...]}")
+    batch = []
+    rejected = []
+    for index, item in enumerate(items):
+        try:
+            batch.append(_parse_transaction(item))
+        except (TypeError, ValueError) as e:
+            rejected.append({"index": index, "error": str(e)})
+    saved, _ = req.write(database.add_transactions, batch, ledger) if batch else ([], [])
+    return {"saved": len(saved), "rejected": rejected}
+
+
+@route("GET", "/totals", etag=True)
+def totals(req):
+    income, expenses = database.get_totals(req.conn, req.ledger())
+    return {"income": income, "expenses": expenses, "balance": income - expenses}
+
+
+@route("GET", "/ledgers", etag=True)
+def ledgers(req):
+    return [{"id": t.id, "name": t.name, "income": t.income, "expenses": t.expenses,
+             "balance": t.income - t.expenses, "count": t.count}
+            for t in database.get_ledger_totals(req.conn)]
+
+
+@route("GET", "/stats", etag=True)
+def stats(req):
+    return {ttype: {"count": count, "total": total}
+            for ttype, (count, total) in database.get_type_stats(req.conn, req.ledger()).items()}
+
+
+@route("GET", "/categories", etag=True)
+def categories(req):
+    data = database.get_category_totals(req.arg("start"), req.arg("end"), req.conn, req.ledger())
+    return [{"category": name, "income": values["Einnahme"], "expenses": values["Ausgabe"]}
+            for name, values in sorted(data.items())]
+
+
+@route("GET", r"/charts/(\w+)\.(png|svg)", etag=True)
+def chart(req):
+    import charts  # matplotlib erst beim ersten Diagramm laden
+
+    name, fmt = req.match.groups()
+    if name not in charts.CHARTS:
+        raise ApiError(HTTPStatus.NOT_FOUND, f"Unbekanntes Diagramm '{name}'")
+    image = charts.render_chart(name, fmt=fmt, start=req.arg("start"), end=req.arg("end"), conn=req.conn,
+                                ledger=req.ledger())
+    if image is None:
+        raise ApiError(HTTPStatus.NOT_FOUND, "Keine Daten für dieses Diagramm")
+    return Raw("image/svg+xml" if fmt == "svg" else "image/png", image)
+
+
+class _ChunkedStream(io.RawIOBase):
+    """Schreibt in die Antwort mit Transfer-Encoding: chunked (Länge unbekannt)."""
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        if data:
+            self._wfile.write(b"%x\r\n%s\r\n" % (len(data), bytes(data)))
+        return len(data)
+
+
+@route("GET", "/export.csv")
+def export_csv(req):
+    options = dict(start=req.arg("start"), end=req.arg("end"), transaction_type=req.arg("type"),
+                   category=req.arg("category"), only_unexported=req.arg("only_unexported", _bool, False),
+                   ledger=req.ledger())
+    handler = req.handler
+    handler.streaming = True
+    handler._discard_body()
+    handler.send_response(HTTPStatus.OK)
+    handler.send_header("Content-Type", "text/csv; charset=utf-8")
+    handler.send_header("Content-Disposition", f'attachment; filename="{database.default_csv_filename()}"')
+    handler.send_header("Transfer-Encoding", "chunked")
+    handler.end_headers()
+    text = io.TextIOWrapper(io.BufferedWriter(_ChunkedStream(handler.wfile), 64 * 1024),
+                            encoding="utf-8", newline="")
+    database.export_to_csv(text, conn=req.conn, **options)
+    text.flush()
+    handler.wfile.write(b"0\r\n\r\n")
+    return None
+
+
+@route("GET", "/metrics")
+def metrics(req):
+    return Raw("text/plain; version=0.0.4; charset=utf-8", instrumentation.dump_prometheus().encode())
+
+
+# ------------------------------
+# HTTP-Server
+# ------------------------------
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Kopfzeilen und Body gehen getrennt hinaus: ohne TCP_NODELAY wartet jede
+    # Keep-Alive-Antwort auf das verzögerte ACK des Clients (Nagle, ~40 ms)
+    disable_nagle_algorithm = True
+    server_version = "FinanzTracker/1.0"
+    streaming = False   # Antwort wird gestreamt, Kopfzeilen sind schon gesendet
+    body_read = False   # Body der Anfrage ist gelesen (Request.json)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def _dispatch(self, method):
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        name = "not_found"
+        self.streaming = False
+        self.body_read = False
+        try:
+            if not self._authorized():
+                raise ApiError(HTTPStatus.UNAUTHORIZED, "Token fehlt oder ist ungültig")
+            matches = [(r, r.pattern.match(url.path)) for r in ROUTES]
+            matches = [(r, m) for r, m in matches if m]
+            if not matches:
+                raise ApiError(HTTPStatus.NOT_FOUND, "Unbekannter Pfad")
+            found = next(((r, m) for r, m in matches if r.method == method), None)
+            if found is None:
+                raise ApiError(HTTPStatus.METHOD_NOT_ALLOWED, "Methode nicht erlaubt")
+            endpoint, match = found
+            name = endpoint.func.__name__
+            # Nur lesende Anfragen leihen sich eine Verbindung, Schreiben läuft im Writer-Thread
+            with self.server.pool.connection() if method == "GET" else nullcontext() as conn:
+                etag = None
+                if endpoint.etag:
+                    etag = f'"{database.get_data_version(conn)}"'
+                    if self._not_modified(etag):
+                        self._send(HTTPStatus.NOT_MODIFIED, b"", None, etag)
+                        return
+                result = endpoint.func(Request(self, match, query, conn))
+            if result is None:   # Antwort schon gestreamt
+                return
+            status = HTTPStatus.OK
+            if type(result) is tuple:   # (status, daten); Raw ist selbst ein Tupel
+                status, result = result
+            if isinstance(result, Raw):
+                self._send(status, result.body, result.content_type, etag)
+            else:
+                self._send_json(status, result, etag)
+        except Exception as e:
+            if self.streaming:
+                # Kopfzeilen sind schon gesendet: Verbindung abbrechen statt einer Fehlerantwort
+                log.exception("Abbruch bei %s %s", method, self.path)
+                self.close_connection = True
+            elif isinstance(e, ApiError):
+                self._send_json(e.status, {"error": str(e)})
+            elif isinstance(e, ValueError):   # Validierung in database.py (Typ, Betrag, Cursor, Zeitraum ...)
+                self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            else:
+                log.exception("Fehler bei %s %s", method, self.path)
+                self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Interner Fehler"})
+        finally:
+            if instrumentation.is_enabled():
+                instrumentation.observe(f"api.{name}", time.perf_counter() - started)
+
+    def _authorized(self):
+        token = self.server.token
+        if not token:
+            return True
+        header = self.headers.get("Authorization", "")
+        return header.startswith("Bearer ") and hmac.compare_digest(header[7:].encode(), token.encode())
+
+    def _not_modified(self, etag):
+        header = self.headers.get("If-None-Match")
+        if header is None:
+            return False
+        tags = [tag.strip() for tag in header.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+    def _discard_body(self):
+        """
+        Verwirft einen ungelesenen Body (z. B. bei 401/404/405), sonst würde er
+        auf der Keep-Alive-Verbindung als nächste Anfrage gelesen. Ist er zu
+        gross oder die Länge ungültig, wird die Verbindung danach geschlossen.
+        """
+        if self.body_read:
+            return
+        self.body_read = True
+        length = self.headers.get("Content-Length")
+        if length is None and self.headers.get("Transfer-Encoding") is None:
+            return
+        if length is not None and length.isdigit() and int(length) <= MAX_BODY_BYTES:
+            self.rfile.read(int(length))
+        else:
+            self.close_connection = True
+
+    def _send(self, status, body, content_type, etag=None):
+        self._discard_body()
+        self.send_response(status)
+        if content_type is not None:
+            self.send_header("Content-Type", content_type)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _send_json(self, status, data, etag=None):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self._send(status, body, "application/json; charset=utf-8", etag)
+
+    def log_message(self, format, *args):
+        log.info("%s %s", self.address_string(), format % args)
+
+
+class ApiServer(ThreadingHTTPServer):
+    """
+    HTTP-Server mit einem Thread pro Verbindung, einem Pool von `readers`
+    Lese-Verbindungen und einem einzigen Writer-Thread. `ledger` ist das
+    Konto für Anfragen ohne ?ledger= (Standard: aktuelles Konto).
+    """
+    daemon_threads = True
+
+    def __init__(self, address, readers=DEFAULT_READERS, token=None, ledger=None):
+        db_path = database.get_db_path()
+        if db_path == ":memory:":
+            raise ValueError("Der HTTP-Dienst braucht eine Datenbank-Datei (keine In-Memory-Datenbank)")
+        database.get_connection()   # Schema anlegen/aktualisieren, bevor schreibgeschützt gelesen wird
+        self.ledger = database.resolve_ledger(ledger)
+        super().__init__(address, ApiHandler)
+        self.token = token
+        self.pool = ReadPool(db_path, readers)
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-writer")
+
+    def server_close(self):
+        super().server_close()
+        self.writer.shutdown()
+        self.pool.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lokaler HTTP-Dienst (JSON-API) für den Finanz-Tracker.")
+    parser.add_argument("--host", default="127.0.0.1", help="Adresse (0.0.0.0 für das ganze LAN)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--readers", type=int, default=DEFAULT_READERS, help="Anzahl Lese-Verbindungen")
+    parser.add_argument("--db", default=None, help="Pfad zur Datenbank")
+    parser.add_argument("--ledger", default=None, help="Konto für Anfragen ohne ?ledger= (Name)")
+    parser.add_argument("--token", default=os.environ.get("FINANZ_TRACKER_API_TOKEN"),
+                        help="verlangt 'Authorization: Bearer <token>'")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.db:
+        database.set_db_path(args.db)
+    server = ApiServer((args.host, args.port), args.readers, args.token, args.ledger)
+    print(f"🌐 Finanz-Tracker API auf http://{args.host}:{server.server_address[1]} (Strg+C beendet)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
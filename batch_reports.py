@@ -0,0 +1,124 @@
+"""
+Nicht-interaktive Monatsberichte (PDF/CSV) für einen Zeitraum.
+
+Jeder Monat wird in einem eigenen Worker-Prozess (ProcessPoolExecutor) mit
+einer schreibgeschützten Verbindung gerendert. Erst wenn alle Worker
+erfolgreich waren, hält der Hauptprozess die PDF-Berichte in einer einzigen
+Transaktion im Export-Journal fest – schlägt ein Monat fehl, bleibt alles unverändert.
+
+Aufruf (aus dem Projektverzeichnis):
+    python batch_reports.py 2025-01 2025-12 --format pdf csv --out berichte/ [--charts] [--ledger Name]
+
+Mit --charts erhält jedes PDF die Diagramme des Monats (charts.py, ohne Anzeige gezeichnet).
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import database
+from charts import CHARTS
+
+
+def parse_month(value):
+    """Wandelt "YYYY-MM" in (jahr, monat) um."""
+    try:
+        year, month = (int(part) for part in value.split("-"))
+        database.month_range(year, month)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Ungültiger Monat '{value}' (erwartet YYYY-MM)")
+    return year, month
+
+
+def iter_months(first, last):
+    """Liefert alle (jahr, monat) von `first` bis einschliesslich `last`."""
+    year, month = first
+    while (year, month) <= last:
+        yield year, month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def render_month(db_path, year, month, out_dir, formats, charts=(), ledger=database.DEFAULT_LEDGER_ID):
+    """
+    Worker: rendert die Berichte eines Monats des Kontos `ledger` (ID) mit
+    einer schreibgeschützten Verbindung, PDFs mit den Diagrammen `charts`. Gibt ein Ergebnis-Dict zurück; 'first_id'/'max_id' sind die
+    niedrigste und höchste ID im PDF (None, falls es keine offenen
+    Transaktionen gab), 'pdf' dessen Dateiname.
+    """
+    start, end = database.month_range(year, month)
+    result = {"year": year, "month": month, "start": start, "end": end, "files": [], "rows": 0,
+              "first_id": None, "max_id": None, "pdf": None}
+    conn = database.connect_readonly(db_path)
+    try:
+        if "pdf" in formats:
+            filename = os.path.join(out_dir, f"finanz_tracker_{month:02d}.{year}.pdf")
+            report = database.write_pdf_report(filename, start, end, conn=conn, charts=charts, ledger=ledger)
+            if report is not None:
+                result["files"].append(filename)
+                result["rows"] = report.rows
+                result["first_id"] = report.min_id
+                result["max_id"] = report.max_id
+                result["pdf"] = filename
+        if "csv" in formats:
+            filename = os.path.join(out_dir, f"finanz_tracker_{month:02d}.{year}.csv")
+            with open(filename, mode="w", newline="", encoding="utf-8") as file:
+                database.export_to_csv(file, start=start, end=end, conn=conn, ledger=ledger)
+            result["files"].append(filename)
+    finally:
+        conn.close()
+    return result
+
+
+def generate_reports(first, last, out_dir=".", formats=("pdf",), workers=None, db_path=None, charts=(), ledger=None):
+    """
+    Rendert die Berichte aller Monate von `first` bis `last` ((jahr, monat))
+    des Kontos `ledger` (Standard: aktuelles Konto)
+    (PDFs mit den Diagrammen `charts`, Namen aus charts.CHARTS) parallel und hält danach die PDF-Berichte atomar im Export-Journal fest.
+    Gibt die Liste der Ergebnisse (je Monat) zurück.
+    Fehler eines Workers werden weitergereicht, es wird dann nichts festgehalten.
+    """
+    db_path = os.path.abspath(db_path or database.get_db_path())
+    # Die Worker bekommen die ID: sie lesen nur schreibgeschützt und kennen das aktuelle Konto nicht
+    ledger = database.resolve_ledger(ledger)
+    os.makedirs(out_dir, exist_ok=True)
+    months = list(iter_months(first, last))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(render_month, db_path, year, month, out_dir, tuple(formats), tuple(charts), ledger)
+                   for year, month in months]
+        results = [future.result() for future in futures]
+
+    batches = [("pdf", r["start"], r["end"], r["first_id"], r["max_id"], r["rows"], r["pdf"])
+               for r in results if r["max_id"] is not None]
+    if batches:
+        database.record_export_batches(batches, ledger=ledger)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monatsberichte (PDF/CSV) für einen Zeitraum erzeugen.")
+    parser.add_argument("first", type=parse_month, help="erster Monat (YYYY-MM)")
+    parser.add_argument("last", type=parse_month, nargs="?", help="letzter Monat (YYYY-MM), Standard: wie erster")
+    parser.add_argument("--format", nargs="+", choices=("pdf", "csv"), default=["pdf"], dest="formats")
+    parser.add_argument("--out", default=".", help="Zielverzeichnis")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Prozesse (Standard: CPU-Kerne)")
+    parser.add_argument("--db", default=None, help="Pfad zur Datenbank")
+    parser.add_argument("--charts", action="store_true", help="Diagramme des Monats ins PDF aufnehmen")
+    parser.add_argument("--ledger", default=None, help="Konto (Standard: FINANZ_TRACKER_LEDGER bzw. Standard)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        database.set_db_path(args.db)
+    try:
+        results = generate_reports(args.first, args.last or args.first, args.out, args.formats, args.workers,
+                                   charts=tuple(CHARTS) if args.charts else (), ledger=args.ledger)
+    except Exception as e:
+        print(f"❌ Berichte fehlgeschlagen, nichts als exportiert markiert: {e}")
+        return 1
+    for r in results:
+        files = ", ".join(r["files"]) or "keine offenen Transaktionen"
+        print(f"✅ {r['month']:02d}.{r['year']}: {files}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
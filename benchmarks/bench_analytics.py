@@ -0,0 +1,66 @@
+"""
+Benchmark für die NumPy-Auswertungen (analytics.py).
+
+Legt eine temporäre Datenbank mit N Transaktionen an, lädt den Snapshot
+einmal und misst danach Gruppierungen, Saldoverlauf, Perzentile und eine
+Was-wäre-wenn-Rechnung im Vergleich zu einem SQL-GROUP-BY über die Tabelle.
+Gibt die Zeiten in Millisekunden als JSON aus.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/bench_analytics.py [anzahl_zeilen]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import analytics
+from synthetic import fill_database
+
+
+def timed(func):
+    """Gibt (ergebnis, millisekunden) des besten von drei Durchläufen zurück."""
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        result = func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return result, round(best, 2)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    tmpdir = tempfile.mkdtemp()
+    database.set_db_path(os.path.join(tmpdir, "bench.db"))
+    fill_database(rows)
+
+    started = time.perf_counter()
+    snapshot = analytics.get_snapshot()
+    load_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    expenses = snapshot.select(transaction_type="Ausgabe")
+    conn = database.get_connection()
+    timings = {
+        "group_by_month_category_type": timed(
+            lambda: snapshot.group_totals(("month", "category", "type")))[1],
+        "group_by_year_type": timed(lambda: snapshot.group_totals(("year", "type")))[1],
+        "running_balance": timed(lambda: snapshot.running_balance())[1],
+        "percentiles_expenses": timed(lambda: snapshot.percentiles(mask=expenses))[1],
+        "what_if_category_plus_10pct": timed(
+            lambda: snapshot.group_totals(("month",), adjust={"Kategorie 1": 1.1}))[1],
+        "sql_group_by_month_category_type": timed(lambda: conn.execute("""
+            SELECT substr(date, 1, 7), category_id, type, SUM(amount), COUNT(*)
+            FROM transactions GROUP BY 1, 2, 3
+        """).fetchall())[1],
+    }
+    result = {"benchmark": "analytics", "rows": len(snapshot), "load_ms": load_ms, "ms": timings}
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
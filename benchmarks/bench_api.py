@@ -0,0 +1,99 @@
+"""
+Lasttest für den HTTP-Dienst (api_server.py).
+
+Startet den Dienst auf einer temporären Datenbank mit N synthetischen
+Transaktionen und lässt mehrere Dashboard-Clients parallel Anfragen senden
+(dauerhafte Verbindungen): Summen mit If-None-Match, Listen-Seiten und
+gelegentlich eine neue Transaktion. Gibt Anfragen pro Sekunde, Latenzen
+und den Anteil der 304-Antworten als JSON aus.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/bench_api.py [anzahl_zeilen] [--clients 16] [--requests 500] [--write-every 20]
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api_server
+import database
+from synthetic import fill_database
+
+
+def client(port, requests, write_every, latencies, statuses):
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    etag = None
+    for i in range(requests):
+        if write_every and i % write_every == write_every - 1:
+            body = json.dumps({"type": "Ausgabe", "amount": 1000 + i, "category": "Benchmark"})
+            method, path, headers = "POST", "/transactions", {"Content-Type": "application/json"}
+        elif i % 2:
+            method, path, headers, body = "GET", "/transactions?type=Ausgabe&descending=1&page_size=50", {}, None
+        else:
+            method, path, headers, body = "GET", "/totals", {"If-None-Match": etag} if etag else {}, None
+        started = time.perf_counter()
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - started)
+        statuses.append(response.status)
+        if path == "/totals" and response.getheader("ETag"):
+            etag = response.getheader("ETag")
+    conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lasttest für api_server.py")
+    parser.add_argument("rows", type=int, nargs="?", default=100000)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="Anfragen pro Client")
+    parser.add_argument("--write-every", type=int, default=20, help="jede n-te Anfrage schreibt (0 = nie)")
+    parser.add_argument("--readers", type=int, default=api_server.DEFAULT_READERS)
+    args = parser.parse_args(argv)
+
+    database.set_db_path(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    fill_database(args.rows)
+    server = api_server.ApiServer(("127.0.0.1", 0), readers=args.readers)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    latencies, statuses = [], []
+    threads = [threading.Thread(target=client, args=(server.server_address[1], args.requests,
+                                                     args.write_every, latencies, statuses))
+               for _ in range(args.clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    read_connections = len(server.pool._connections)
+    server.shutdown()
+    server.server_close()
+
+    latencies.sort()
+    result = {
+        "benchmark": "api_server",
+        "rows": args.rows,
+        "clients": args.clients,
+        "requests": len(latencies),
+        "requests_per_sec": round(len(latencies) / elapsed),
+        "latency_ms": {
+            "median": round(statistics.median(latencies) * 1000, 2),
+            "p99": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2),
+        },
+        "status": {str(code): statuses.count(code) for code in sorted(set(statuses))},
+        "read_connections": read_connections,
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
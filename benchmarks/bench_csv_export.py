@@ -0,0 +1,50 @@
+"""
+Benchmark für den gestreamten CSV-Export.
+
+Legt eine temporäre Datenbank mit N Transaktionen an, exportiert sie mit
+export_to_csv() und gibt Zeilen/Sekunde sowie den maximalen RSS als JSON aus.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/bench_csv_export.py [anzahl_zeilen] [ziel]
+
+`ziel` ist ein Dateipfad (Standard: temporäre Datei), "-" für stdout oder
+ein Pfad auf ".gz" für gzip.
+"""
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from synthetic import fill_database
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    tmpdir = tempfile.mkdtemp()
+    target = sys.argv[2] if len(sys.argv) > 2 else os.path.join(tmpdir, "export.csv")
+    database.set_db_path(os.path.join(tmpdir, "bench.db"))
+    fill_database(rows)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started = time.perf_counter()
+    exported = database.export_to_csv(target)
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "benchmark": "export_to_csv",
+        "rows": exported,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(exported / elapsed) if elapsed else None,
+        "max_rss_kb_before": rss_before,
+        "max_rss_kb_after": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+    print(json.dumps(result), file=sys.stderr if target == "-" else sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark für die Formatierung in Render-Schleifen (formatting.py).
+
+Vergleicht auf synthetischen Zeilen die früheren Funktionen (strptime pro
+Zeile, locale.format_string über float) mit dem Cache bzw. der
+locale-freien Formatierung und mit der Formatierung direkt in SQL.
+Gibt Zeilen pro Sekunde als JSON aus.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/bench_formatting.py [anzahl_zeilen]
+"""
+import datetime
+import json
+import locale
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+import formatting
+from synthetic import fill_database
+
+
+# Frühere Implementierungen (Datumsformat aus database.py, gui_ctk.chf_format) als Vergleich
+def old_format_date(date_str):
+    return datetime.datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y")
+
+
+def old_format_chf(rappen):
+    return f"CHF {locale.format_string('%.2f', rappen / 100, grouping=True)}"
+
+
+def rate(rows, func):
+    """Zeilen pro Sekunde für func(rows) (bester von drei Durchläufen)."""
+    best = None
+    for _ in range(3):
+        started = time.perf_counter()
+        func(rows)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(len(rows) / best)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    try:
+        locale.setlocale(locale.LC_NUMERIC, "de_CH.UTF-8")
+    except locale.Error:
+        pass   # Vergleich dann mit der Standard-Locale, die Laufzeit ist ähnlich
+    database.set_db_path(os.path.join(tempfile.mkdtemp(), "bench.db"))
+    fill_database(count)
+    conn = database.get_connection()
+    rows = conn.execute("SELECT amount, date FROM transactions").fetchall()
+    amounts = [amount for amount, _ in rows]
+    dates = [date for _, date in rows]
+
+    def sql_formatted(_):
+        conn.execute(f"SELECT {formatting.chf_sql()}, {formatting.date_sql()} FROM transactions").fetchall()
+
+    def sql_raw(_):
+        conn.execute("SELECT amount, date FROM transactions").fetchall()
+
+    result = {
+        "benchmark": "formatting",
+        "rows": count,
+        "distinct_days": len(set(date[:10] for date in dates)),
+        "rows_per_sec": {
+            "date_strptime_vorher": rate(dates, lambda ds: [old_format_date(d) for d in ds]),
+            "date_cache": rate(dates, lambda ds: [formatting.format_date(d) for d in ds]),
+            "chf_locale_vorher": rate(amounts, lambda xs: [old_format_chf(x) for x in xs]),
+            "chf_ohne_locale": rate(amounts, lambda xs: [formatting.format_chf(x) for x in xs]),
+            "sql_lesen_roh": rate(rows, sql_raw),
+            "sql_lesen_formatiert": rate(rows, sql_formatted),
+        },
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
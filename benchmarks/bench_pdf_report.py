@@ -0,0 +1,48 @@
+"""
+Benchmark für den seitenweisen PDF-Bericht.
+
+Legt eine temporäre Datenbank mit N Transaktionen an, rendert den Bericht
+mit write_pdf_report() und gibt Seiten/Sekunde sowie den maximalen RSS als
+JSON aus.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/bench_pdf_report.py [anzahl_zeilen]
+"""
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from synthetic import fill_database
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    tmpdir = tempfile.mkdtemp()
+    database.set_db_path(os.path.join(tmpdir, "bench.db"))
+    fill_database(rows)
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    started = time.perf_counter()
+    report = database.write_pdf_report(os.path.join(tmpdir, "report.pdf"))
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "benchmark": "write_pdf_report",
+        "rows": report.rows,
+        "pages": report.pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(report.pages / elapsed, 1) if elapsed else None,
+        "max_rss_kb_before": rss_before,
+        "max_rss_kb_after": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
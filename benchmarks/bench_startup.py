@@ -0,0 +1,69 @@
+"""
+Startzeit-Benchmark für das CLI (main.py) mit `python -X importtime`.
+
+Importiert main.py in einem frischen Interpreter (mehrere Durchläufe, der
+Median zählt), gibt das Ergebnis als JSON aus und schlägt fehl, wenn das
+Budget überschritten wird oder schwere Abhängigkeiten (matplotlib, numpy,
+reportlab, fpdf) bereits beim Start geladen werden.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/bench_startup.py [--budget-ms 150] [--runs 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dürfen erst geladen werden, wenn ein Diagramm oder PDF angefordert wird
+LAZY_MODULES = ("matplotlib", "numpy", "reportlab", "fpdf", "charts", "pdf_report")
+
+
+def measure_once():
+    """Gibt (gesamtzeit_us, {modul: kumulierte_zeit_us}) für einen Import von main zurück."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=PROJECT_DIR, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative)
+    return modules["main"], modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Startzeit von main.py messen.")
+    parser.add_argument("--budget-ms", type=float, default=150.0)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    totals = []
+    modules = {}
+    for _ in range(args.runs):
+        total, modules = measure_once()
+        totals.append(total)
+    median_ms = statistics.median(totals) / 1000
+    eager = sorted(name for name in modules if name.split(".")[0] in LAZY_MODULES)
+    slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[1:11]
+
+    result = {
+        "benchmark": "startup_main",
+        "runs": args.runs,
+        "median_ms": round(median_ms, 1),
+        "budget_ms": args.budget_ms,
+        "eager_heavy_modules": eager,
+        "slowest_imports_ms": {name: round(us / 1000, 1) for name, us in slowest},
+    }
+    print(json.dumps(result, indent=2))
+    sys.exit(0 if median_ms <= args.budget_ms and not eager else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Prüft mit EXPLAIN QUERY PLAN, dass die Monats- und Export-Abfragen die
+Indizes verwenden und weder einen vollständigen Tabellen-Scan noch eine
+zusätzliche Sortierung (TEMP B-TREE) machen.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/check_query_plans.py [pfad/zur/datenbank.db]
+
+Ohne Pfad wird eine In-Memory-Datenbank mit dem aktuellen Schema verwendet.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+
+def check_plans():
+    """Gibt eine Liste von (name, plan, ok) für alle geprüften Abfragen zurück."""
+    start, end = database.month_range(2025, 3)
+    queries = {
+        "filter_transactions_by_month": (database.MONTH_FILTER_SQL, (database.get_ledger(), start, end)),
+        "export_to_pdf (Monat)": database.pdf_export_query(start, end),
+        "export_to_pdf (alle)": database.pdf_export_query(),
+        "query_transactions (Typ, neueste zuerst)": database.transaction_query(
+            "Ausgabe", descending=True, after=database._encode_cursor("id", True, [1000])),
+        "query_transactions (nach Datum)": database.transaction_query(
+            start=start, end=end, order_by="date", after=database._encode_cursor("date", False, [start, 10])),
+        "query_transactions (Kategorie)": database.transaction_query(category="Miete", descending=True),
+        "query_transactions (alle des Kontos)": database.transaction_query(descending=True),
+    }
+    results = []
+    for name, (sql, params) in queries.items():
+        plan = database.explain_query_plan(sql, params)
+        ok = any("USING" in line and "INDEX" in line for line in plan) and \
+            not any(line.startswith("SCAN transactions") and "INDEX" not in line for line in plan) and \
+            not any("TEMP B-TREE" in line for line in plan)
+        results.append((name, plan, ok))
+    return results
+
+
+def main():
+    database.set_db_path(sys.argv[1] if len(sys.argv) > 1 else ":memory:")
+    failed = 0
+    for name, plan, ok in check_plans():
+        print(f"{'✅' if ok else '❌'} {name}")
+        for line in plan:
+            print(f"     {line}")
+        failed += not ok
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Benchmark-Suite über die Einstiegspunkte von database.py.
+
+Für jede Grösse wird ein synthetisches Haushaltsbuch erzeugt (synthetic.py,
+deterministisch) und im Datenverzeichnis zwischengespeichert; gemessen wird
+auf einer Kopie, damit schreibende Benchmarks die Vorlage nicht verändern.
+Die Ergebnisse (bestes und mittleres Resultat in ms je Benchmark) werden als
+JSON ausgegeben. Mit --compare wird gegen ein früheres Ergebnis geprüft:
+Benchmarks, die um mehr als --threshold langsamer sind, gelten als Regression
+(Exit-Code 1).
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/run_benchmarks.py [--sizes 10000 1000000 10000000] [--repeat 3]
+        [--data-dir benchmarks/data] [--out ergebnis.json] [--compare basis.json]
+        [--only export_to_csv get_balance ...]
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from synthetic import DEFAULTS, fill_database
+
+# Ab dieser Grösse läuft jeder Benchmark nur einmal, darüber entfallen die teuersten
+HEAVY_ROWS = 1_000_000
+SINGLE_INSERTS = 1000
+
+
+def middle_month(years, start_year):
+    """(jahr, monat) in der Mitte der synthetischen Daten."""
+    months = years * 12 // 2
+    return start_year + months // 12, months % 12 + 1
+
+
+def define_benchmarks(workdir, options):
+    """
+    Gibt {name: (funktion, max_zeilen)} zurück; max_zeilen=None heisst ohne
+    Grenze. Die Reihenfolge ist die Ausführungsreihenfolge: schreibende
+    Benchmarks kommen zuletzt, damit sie die lesenden nicht beeinflussen.
+    """
+    year, month = middle_month(options["years"], options["start_year"])
+    start, end = database.month_range(year, month)
+
+    def add_single():
+        for i in range(SINGLE_INSERTS):
+            database.add_transaction("Ausgabe", 1000 + i, "Benchmark")
+
+    def add_batch():
+        database.add_transactions([("Ausgabe", 1000 + i, "Benchmark") for i in range(SINGLE_INSERTS)])
+
+    def csv_export():
+        with open(os.devnull, "w", newline="") as target:
+            database.export_to_csv(target)
+
+    def chart_render():
+        # Ohne Cache: Abfrage plus Zeichnen (Agg); matplotlib ist nach dem ersten Lauf geladen
+        import charts
+
+        charts.clear_chart_cache()
+        charts.render_chart("incomes_and_expenses_by_category")
+
+    def chart_cached():
+        import charts
+
+        charts.render_chart("incomes_and_expenses_by_category")
+
+    def gui_refresh_entries():
+        # Datenpfad von refresh_entries() in gui_ctk.py: Statistik + erste Seite je Tabelle
+        database.get_type_stats()
+        for ttype in ("Einnahme", "Ausgabe"):
+            database.query_transactions(ttype, descending=True, page_size=200)
+
+    return {
+        "get_balance": (database.get_balance, None),
+        "get_totals": (database.get_totals, None),
+        "filter_transactions_by_month": (lambda: database.get_transactions_by_month(year, month), None),
+        "plot_expenses_by_category": (database.get_expenses_by_category, None),
+        "plot_incomes_and_expenses_by_category": (database.get_category_totals, None),
+        "chart_png_render": (chart_render, None),
+        "chart_png_cached": (chart_cached, None),
+        "gui_refresh_entries": (gui_refresh_entries, None),
+        "export_to_csv": (csv_export, None),
+        "export_to_pdf_month": (
+            lambda: database.write_pdf_report(os.path.join(workdir, "monat.pdf"), start, end), None),
+        "export_to_pdf_all": (
+            lambda: database.write_pdf_report(os.path.join(workdir, "alle.pdf")), HEAVY_ROWS),
+        f"add_transaction_x{SINGLE_INSERTS}": (add_single, None),
+        f"add_transactions_batch_{SINGLE_INSERTS}": (add_batch, None),
+    }
+
+
+def prepare_template(rows, data_dir, options):
+    """Erzeugt (oder verwendet) die Vorlage-Datenbank und gibt (pfad, sekunden) zurück."""
+    name = "ledger_{rows}_{categories}c_{years}y_seed{seed}.db".format(rows=rows, **options)
+    path = os.path.join(data_dir, name)
+    if os.path.exists(path):
+        return path, None
+    for suffix in ("", "-wal", "-shm"):   # Reste eines abgebrochenen Laufs
+        if os.path.exists(path + ".tmp" + suffix):
+            os.remove(path + ".tmp" + suffix)
+    started = time.perf_counter()
+    database.set_db_path(path + ".tmp")
+    fill_database(rows, **options)
+    database.get_connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    database.set_db_path(":memory:")
+    os.replace(path + ".tmp", path)
+    for suffix in ("-wal", "-shm"):
+        if os.path.exists(path + ".tmp" + suffix):
+            os.remove(path + ".tmp" + suffix)
+    return path, round(time.perf_counter() - started, 2)
+
+
+def measure(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"best_ms": round(min(timings), 3), "median_ms": round(statistics.median(timings), 3),
+            "runs": repeat}
+
+
+def run_size(rows, data_dir, repeat, only, options):
+    template, generate_s = prepare_template(rows, data_dir, options)
+    workdir = tempfile.mkdtemp()
+    try:
+        shutil.copyfile(template, os.path.join(workdir, "bench.db"))
+        database.set_db_path(os.path.join(workdir, "bench.db"))
+        database.get_connection()   # Schema-Updates vor der Messung
+        results = {}
+        for name, (func, max_rows) in define_benchmarks(workdir, options).items():
+            if only and name not in only:
+                continue
+            if max_rows is not None and rows > max_rows:
+                results[name] = {"skipped": f"mehr als {max_rows} Zeilen"}
+                continue
+            try:
+                results[name] = measure(func, 1 if rows >= HEAVY_ROWS else repeat)
+            except ImportError as e:   # z. B. reportlab nicht installiert
+                results[name] = {"skipped": str(e)}
+        return {"generate_s": generate_s, "results": results}
+    finally:
+        database.set_db_path(":memory:")
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def git_version():
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, threshold):
+    """Gibt die Liste der Regressionen (grösse, name, alt_ms, neu_ms) zurück."""
+    regressions = []
+    for rows, size in current["sizes"].items():
+        old_size = baseline.get("sizes", {}).get(rows, {}).get("results", {})
+        for name, result in size["results"].items():
+            old = old_size.get(name, {})
+            if "best_ms" in result and "best_ms" in old and result["best_ms"] > old["best_ms"] * threshold:
+                regressions.append((rows, name, old["best_ms"], result["best_ms"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark-Suite mit synthetischen Haushaltsbüchern.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--categories", type=int, default=DEFAULTS["categories"])
+    parser.add_argument("--years", type=int, default=DEFAULTS["years"])
+    parser.add_argument("--seed", type=int, default=DEFAULTS["seed"])
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "finanz_tracker_bench"),
+                        help="Ablage der erzeugten Vorlage-Datenbanken")
+    parser.add_argument("--only", nargs="+", help="nur diese Benchmarks")
+    parser.add_argument("--out", help="Ergebnis zusätzlich in diese Datei schreiben")
+    parser.add_argument("--compare", help="früheres Ergebnis (JSON) zum Vergleich")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Faktor, ab dem eine Regression gilt")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    options = dict(DEFAULTS, categories=args.categories, years=args.years, seed=args.seed)
+    result = {
+        "suite": "finanz_tracker",
+        "version": git_version(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "journal_mode": database.JOURNAL_MODE,
+        "data": options,
+        "sizes": {str(rows): run_size(rows, args.data_dir, args.repeat, args.only, options)
+                  for rows in args.sizes},
+    }
+    output = json.dumps(result, indent=2)
+    print(output)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(result, json.load(file), args.threshold)
+        for rows, name, old, new in regressions:
+            print(f"❌ {name} ({rows} Zeilen): {old:.1f} ms → {new:.1f} ms", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
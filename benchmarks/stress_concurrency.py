@@ -0,0 +1,151 @@
+"""
+Stresstest für gleichzeitigen Zugriff mehrerer Prozesse auf dieselbe Datenbank.
+
+Mehrere Schreib-Prozesse speichern laufend Transaktionen (add_transaction),
+während Lese-Prozesse lange Berichte lesen (CSV-Export aller Zeilen über
+eine schreibgeschützte Verbindung). Gemessen werden Durchsatz, Latenzen der
+Schreibvorgänge und die Anzahl "database is locked"-Fehler; das Ergebnis
+wird als JSON ausgegeben.
+
+Aufruf (aus dem Projektverzeichnis):
+    python benchmarks/stress_concurrency.py [--writers 4] [--readers 2] [--seconds 10]
+        [--rows 50000] [--journal-mode WAL|DELETE] [--busy-timeout 10]
+
+Zum Vergleich mit dem früheren Verhalten: --journal-mode DELETE --busy-timeout 0
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from synthetic import fill_database
+
+
+def configure(db_path, journal_mode, busy_timeout):
+    """Stellt Datenbank und Verbindungs-Einstellungen im aktuellen Prozess ein."""
+    database.JOURNAL_MODE = journal_mode
+    database.BUSY_TIMEOUT = busy_timeout
+    database.set_db_path(db_path)
+
+
+def is_lock_error(error):
+    return isinstance(error, sqlite3.OperationalError) and ("locked" in str(error) or "busy" in str(error))
+
+
+def wait_until(start):
+    """Alle Prozesse beginnen gleichzeitig, unabhängig von ihrer Startdauer."""
+    time.sleep(max(0.0, start - time.time()))
+
+
+def writer(db_path, journal_mode, busy_timeout, start, deadline, index, results):
+    configure(db_path, journal_mode, busy_timeout)
+    wait_until(start)
+    latencies, locked, errors = [], 0, 0
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            database.add_transaction("Ausgabe", 100 + len(latencies), f"Stress {index}")
+        except Exception as e:
+            if is_lock_error(e):
+                locked += 1
+            else:
+                errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    results.put(("writer", len(latencies), locked, errors, latencies))
+
+
+def reader(db_path, journal_mode, busy_timeout, start, deadline, index, results):
+    configure(db_path, journal_mode, busy_timeout)
+    wait_until(start)
+    latencies, locked, errors = [], 0, 0
+    while time.time() < deadline:
+        started = time.perf_counter()
+        try:
+            with open(os.devnull, "w", newline="") as target:
+                database.export_to_csv(target)
+        except Exception as e:
+            if is_lock_error(e):
+                locked += 1
+            else:
+                errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    results.put(("reader", len(latencies), locked, errors, latencies))
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q / 100))]
+
+
+def summarize(entries, seconds):
+    latencies = [latency for entry in entries for latency in entry[4]]
+    done = sum(entry[1] for entry in entries)
+    return {
+        "processes": len(entries),
+        "operations": done,
+        "per_sec": round(done / seconds, 1),
+        "lock_errors": sum(entry[2] for entry in entries),
+        "other_errors": sum(entry[3] for entry in entries),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if latencies else None,
+        "max_ms": round(max(latencies) * 1000, 2) if latencies else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stresstest mit mehreren Schreib- und Lese-Prozessen.")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--rows", type=int, default=50000, help="Zeilen in der Datenbank vor dem Test")
+    parser.add_argument("--journal-mode", default=database.JOURNAL_MODE)
+    parser.add_argument("--busy-timeout", type=float, default=database.BUSY_TIMEOUT, help="Sekunden")
+    parser.add_argument("--db", default=None, help="Pfad zur Datenbank (Standard: temporär)")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "stress.db")
+    configure(db_path, args.journal_mode, args.busy_timeout)
+    fill_database(args.rows)
+    journal_mode = database.get_connection().execute("PRAGMA journal_mode").fetchone()[0]
+    database.set_db_path(db_path)  # Verbindung schliessen, bevor die Prozesse starten
+
+    results = multiprocessing.Queue()
+    start = time.time() + 1   # 1 s für den Start der Prozesse
+    deadline = start + args.seconds
+    processes = [multiprocessing.Process(target=writer, args=(db_path, args.journal_mode, args.busy_timeout,
+                                                              start, deadline, i, results))
+                 for i in range(args.writers)]
+    processes += [multiprocessing.Process(target=reader, args=(db_path, args.journal_mode, args.busy_timeout,
+                                                               start, deadline, i, results))
+                  for i in range(args.readers)]
+    for process in processes:
+        process.start()
+    entries = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    result = {
+        "benchmark": "stress_concurrency",
+        "journal_mode": journal_mode,
+        "busy_timeout_s": args.busy_timeout,
+        "rows_before": args.rows,
+        "seconds": args.seconds,
+        "writers": summarize([e for e in entries if e[0] == "writer"], args.seconds),
+        "readers": summarize([e for e in entries if e[0] == "reader"], args.seconds),
+    }
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
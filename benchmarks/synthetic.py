@@ -0,0 +1,84 @@
+"""
+Deterministischer Generator für synthetische Haushaltsbücher.
+
+Gleiche Parameter (Zeilen, Kategorien, Jahre, Seed) ergeben immer dieselben
+Transaktionen – Messungen verschiedener Versionen sind damit vergleichbar.
+Die Daten sind chronologisch (wie bei laufender Erfassung steigen ID und
+Datum gemeinsam), etwa jede fünfte Transaktion ist eine Einnahme, wenige
+Kategorien sind häufig und viele selten, Ausgaben sind log-normalverteilt.
+
+Aufruf (aus dem Projektverzeichnis), füllt eine neue Datenbank:
+    python benchmarks/synthetic.py ziel.db [zeilen] [--categories 40] [--years 5] [--seed 42] [--ledger Name]
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+
+DEFAULTS = {"categories": 40, "years": 5, "seed": 42, "start_year": 2020}
+
+
+def generate_transactions(rows, categories=40, years=5, seed=42, start_year=2020):
+    """Liefert `rows` Tupel (typ, betrag_rappen, kategorie, datum), aufsteigend nach Datum."""
+    rng = random.Random(seed)
+    start = datetime.datetime(start_year, 1, 1)
+    step = (datetime.datetime(start_year + years, 1, 1) - start).total_seconds() / max(rows, 1)
+    for i in range(rows):
+        date = start + datetime.timedelta(seconds=int((i + rng.random()) * step))
+        # Quadrat einer Gleichverteilung: kleine Kategorie-Nummern sind häufiger
+        category = f"Kategorie {int(categories * rng.random() ** 2)}"
+        if rng.random() < 0.2:
+            yield "Einnahme", rng.randint(5000, 800000), category, date.isoformat(" ")
+        else:
+            yield "Ausgabe", max(5, int(rng.lognormvariate(8, 1.2))), category, date.isoformat(" ")
+
+
+def fill_database(rows, chunk_size=50000, ledger=None, **options):
+    """
+    Füllt die aktuelle Datenbank mit `rows` synthetischen Transaktionen im
+    Konto `ledger` (Standard: aktuelles Konto; Optionen wie
+    generate_transactions) und baut danach die Monatszusammenfassung neu auf.
+    """
+    ledger = database.resolve_ledger(ledger)
+    conn = database.get_connection()
+    transactions = generate_transactions(rows, **options)
+    ids = {}   # Kategorie-Name → ID in 'categories'
+    while True:
+        chunk = list(islice(transactions, chunk_size))
+        if not chunk:
+            break
+        for category in {category for _, _, category, _ in chunk} - ids.keys():
+            ids[category] = database.category_id(category, conn)
+        with conn:
+            conn.executemany(
+                "INSERT INTO transactions (ledger_id, type, amount, category_id, date) VALUES (?, ?, ?, ?, ?)",
+                [(ledger, ttype, amount, ids[category], date) for ttype, amount, category, date in chunk])
+    # Direkt eingefügt: Monatszusammenfassung (und damit das Export-Journal) nachziehen
+    database.rebuild_monthly_summary(conn)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Datenbank mit synthetischen Transaktionen füllen.")
+    parser.add_argument("db", help="Pfad der Datenbank (wird ergänzt, falls vorhanden)")
+    parser.add_argument("rows", type=int, nargs="?", default=100000)
+    parser.add_argument("--categories", type=int, default=DEFAULTS["categories"])
+    parser.add_argument("--years", type=int, default=DEFAULTS["years"])
+    parser.add_argument("--seed", type=int, default=DEFAULTS["seed"])
+    parser.add_argument("--ledger", default=None, help="Konto (wird bei Bedarf angelegt)")
+    args = parser.parse_args(argv)
+
+    database.set_db_path(args.db)
+    if args.ledger:
+        database.set_ledger(args.ledger, create=True)
+    fill_database(args.rows, categories=args.categories, years=args.years, seed=args.seed)
+    print(f"✅ {args.rows} Transaktionen in {args.db} geschrieben.")
+
+
+if __name__ == "__main__":
+    main()
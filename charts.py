@@ -0,0 +1,190 @@
+"""
+Diagramme (Matplotlib) auf Basis der Daten aus database.py.
+
+- plot_*() zeigen ein Diagramm interaktiv an (pyplot, braucht eine Anzeige).
+- render_chart() zeichnet ohne Anzeige mit dem Agg-Backend und liefert PNG
+  oder SVG als bytes, in eine Datei oder ein Datei-Objekt – für PDF-Berichte,
+  Cron-Jobs oder einen Webserver ohne X-Server.
+
+Gezeichnete Bilder werden im Speicher gehalten. Der Schlüssel enthält die
+Datenversion der Datenbank (database.get_data_version), die jede
+Schreib-Transaktion erhöht, auch die anderer Prozesse: solange sich die
+Daten nicht ändern, kommt das Bild ohne Abfrage und ohne Zeichnen zurück.
+
+Die Funktionen geben False bzw. None zurück, wenn keine Daten vorhanden sind;
+Meldungen an den Benutzer sind Sache der Oberfläche. matplotlib wird erst
+beim ersten Diagramm geladen.
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import database
+
+CHART_FORMATS = ("png", "svg")
+CHART_CACHE_SIZE = 32
+
+
+# ------------------------------
+# Daten und Zeichnen je Diagramm
+# ------------------------------
+def _expenses_data(start=None, end=None, conn=None, ledger=None):
+    return database.get_expenses_by_category(start, end, conn, ledger) or None
+
+
+def _draw_expenses(fig, data):
+    """Balkendiagramm der Ausgaben nach Kategorie."""
+    ax = fig.add_subplot()
+    ax.bar([row[0] for row in data], [row[1] / 100 for row in data], color="red")
+    ax.set_xlabel("Kategorie")
+    ax.set_ylabel("Betrag in CHF")
+    ax.set_title("Ausgaben nach Kategorie")
+    ax.tick_params(axis="x", labelrotation=45)
+    fig.tight_layout()
+
+
+def _totals_data(start=None, end=None, conn=None, ledger=None):
+    categories_data = database.get_category_totals(start, end, conn, ledger)
+    categories = sorted(categories_data.keys())
+    incomes = [categories_data[cat]["Einnahme"] / 100 for cat in categories]
+    expenses = [categories_data[cat]["Ausgabe"] / 100 for cat in categories]
+    if sum(incomes) == 0 and sum(expenses) == 0:
+        return None
+    return categories, incomes, expenses
+
+
+def _draw_totals(fig, data):
+    """
+    Balkendiagramm, in dem pro Kategorie zwei Balken dargestellt werden:
+    - Einnahmen (grün)
+    - Ausgaben (rot)
+    """
+    import numpy as np
+
+    categories, incomes, expenses = data
+    x = np.arange(len(categories))
+    width = 0.4
+
+    ax = fig.add_subplot()
+    ax.bar(x - width/2, incomes, width, label="Einnahmen", color="green")
+    ax.bar(x + width/2, expenses, width, label="Ausgaben", color="red")
+    ax.set_xticks(x)
+    ax.set_xticklabels(categories, rotation=45)
+    ax.set_xlabel("Kategorie", fontsize=12)
+    ax.set_ylabel("Betrag in CHF", fontsize=12)
+    ax.set_title("Einnahmen und Ausgaben pro Kategorie", fontsize=14, fontweight="bold")
+    ax.legend()
+    ax.grid(axis="y", alpha=0.3)
+    fig.tight_layout()
+
+
+# Name → (daten_laden(start, end, conn, konto), zeichnen(fig, daten), grösse in Zoll)
+CHARTS = {
+    "expenses_by_category": (_expenses_data, _draw_expenses, (8, 5)),
+    "incomes_and_expenses_by_category": (_totals_data, _draw_totals, (10, 6)),
+}
+
+
+# ------------------------------
+# Interaktive Anzeige (pyplot)
+# ------------------------------
+def _show(name):
+    import matplotlib.pyplot as plt
+
+    load, draw, size = CHARTS[name]
+    data = load()
+    if data is None:
+        return False
+    draw(plt.figure(figsize=size), data)
+    plt.show()
+    return True
+
+
+def plot_expenses_by_category():
+    """Zeigt ein Balkendiagramm der Ausgaben nach Kategorie an."""
+    return _show("expenses_by_category")
+
+
+def plot_incomes_and_expenses_by_category():
+    """Zeigt Einnahmen (grün) und Ausgaben (rot) pro Kategorie als Balkendiagramm an."""
+    return _show("incomes_and_expenses_by_category")
+
+
+# ------------------------------
+# Ohne Anzeige (Agg) mit Cache
+# ------------------------------
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _render(draw, data, size, fmt, dpi):
+    from matplotlib import rc_context
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    # Eigene Figure statt pyplot: kein globaler Zustand, keine Anzeige nötig
+    fig = Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(fig)
+    draw(fig, data)
+    buffer = io.BytesIO()
+    # SVG ohne Datum und mit festen IDs: gleiche Daten ergeben dieselbe Datei
+    with rc_context({"svg.hashsalt": "finanz_tracker"}):
+        fig.savefig(buffer, format=fmt, metadata={"Date": None} if fmt == "svg" else None)
+    return buffer.getvalue()
+
+
+def render_chart(name, target=None, fmt=None, start=None, end=None, dpi=100, conn=None, ledger=None):
+    """
+    Zeichnet das Diagramm `name` (siehe CHARTS) ohne Anzeige und gibt das
+    Bild als bytes zurück – oder None, wenn keine Daten vorhanden sind.
+    `target` (optional) ist ein Pfad oder ein Datei-Objekt, in das das Bild
+    zusätzlich geschrieben wird. Das Format ("png" oder "svg") ergibt sich
+    aus `fmt`, sonst aus der Dateiendung, sonst PNG. `start`/`end` begrenzen
+    die Daten auf die ganzen Monate im Bereich [start, end), `ledger` wählt
+    das Konto (Standard: aktuelles Konto).
+    Wirft ValueError bei unbekanntem Diagramm oder Format.
+    """
+    if name not in CHARTS:
+        raise ValueError(f"Unbekanntes Diagramm '{name}'")
+    if fmt is None and isinstance(target, (str, os.PathLike)):
+        fmt = os.path.splitext(target)[1][1:].lower() or None
+    fmt = fmt or "png"
+    if fmt not in CHART_FORMATS:
+        raise ValueError(f"Ungültiges Bildformat '{fmt}' (erlaubt: {', '.join(CHART_FORMATS)})")
+
+    ledger = database.resolve_ledger(ledger)
+    conn = conn or database.get_connection()
+    key = (conn.execute("PRAGMA database_list").fetchone()[2], ledger, name, fmt, dpi, start, end)
+    version = database.get_data_version(conn)
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None and cached[0] == version:
+            _cache.move_to_end(key)
+            image = cached[1]
+        else:
+            image = None
+    if image is None:
+        load, draw, size = CHARTS[name]
+        data = load(start, end, conn, ledger)
+        if data is None:
+            return None
+        image = _render(draw, data, size, fmt, dpi)
+        with _cache_lock:
+            _cache[key] = (version, image)
+            _cache.move_to_end(key)
+            while len(_cache) > CHART_CACHE_SIZE:
+                _cache.popitem(last=False)
+
+    if hasattr(target, "write"):
+        target.write(image)
+    elif target is not None:
+        with open(target, "wb") as file:
+            file.write(image)
+    return image
+
+
+def clear_chart_cache():
+    """Verwirft alle zwischengespeicherten Diagramme."""
+    with _cache_lock:
+        _cache.clear()
@@ -1,385 +1,1858 @@
 import sqlite3
-import matplotlib.pyplot as plt
 import csv
 import datetime
-import locale
-from reportlab.lib.pagesizes import letter
-from reportlab.pdfgen import canvas
-from textwrap import wrap
-from reportlab.lib.colors import red, green, black
+import logging
+import os
+import threading
+import atexit
+import calendar
+import base64
+import gzip
+import json
+import sys
+import re
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from collections import namedtuple
+from contextlib import contextmanager
+from itertools import chain, islice
+from bisect import bisect_left
+
+import instrumentation
+from instrumentation import timed
+# Formatierung (locale-unabhängig), hier für bestehende Aufrufer re-exportiert
+from formatting import format_chf
+
+# ------------------------------
+# Verbindungsverwaltung
+# ------------------------------
+DB_PATH = os.environ.get("FINANZ_TRACKER_DB", "finanz_tracker.db")
+
+# Meldungen (z. B. Schema-Updates) gehen an das Logging, die Oberflächen
+# entscheiden selbst, ob und wie sie angezeigt werden.
+log = logging.getLogger("finanz_tracker")
+
+# Gleichzeitiger Zugriff (CLI, GUI, Cron-Exporte auf dieselbe Datei): im
+# WAL-Modus blockieren Leser die Schreiber nicht und umgekehrt. Wer auf eine
+# Sperre trifft, wartet bis zu BUSY_TIMEOUT Sekunden statt sofort mit
+# "database is locked" abzubrechen. synchronous=NORMAL ist im WAL-Modus
+# konsistent, bei Stromausfall gehen höchstens die letzten Commits verloren.
+JOURNAL_MODE = os.environ.get("FINANZ_TRACKER_JOURNAL_MODE", "WAL")
+BUSY_TIMEOUT = 10.0
+SYNCHRONOUS = "NORMAL"
+
+def _connect(database, **kwargs):
+    """Öffnet eine Verbindung mit Busy-Timeout und passender synchronous-Stufe."""
+    conn = sqlite3.connect(database, timeout=BUSY_TIMEOUT, **instrumentation.connection_options(), **kwargs)
+    instrumentation.instrument_connection(conn)
+    if JOURNAL_MODE.upper() == "WAL":
+        conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+    return conn
+
+class ConnectionManager:
+    """
+    Verwaltet die SQLite-Verbindungen der Anwendung.
+    Pro Thread wird genau eine Verbindung geöffnet und wiederverwendet,
+    statt in jeder Funktion neu zu verbinden und wieder zu schliessen.
+    Beim ersten Zugriff auf eine Datenbank-Datei wird `initializer` (Schema
+    anlegen/aktualisieren) einmal pro Prozess ausgeführt – nicht beim Import.
+    """
+
+    def __init__(self, db_path=DB_PATH, initializer=None):
+        self.db_path = db_path
+        self.initializer = initializer
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._init_lock = threading.RLock()
+        self._initialized = set()
+        self._connections = []
+        self._generation = 0
+
+    def get_connection(self):
+        """Gibt die Verbindung des aktuellen Threads zurück (wird bei Bedarf geöffnet)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.generation != self._generation:
+            conn = _connect(self.db_path, check_same_thread=False)
+            with self._lock:
+                self._connections.append(conn)
+                self._local.generation = self._generation
+            self._local.conn = conn
+            self._initialize(conn)
+        return conn
+
+    def _initialize(self, conn):
+        if self.initializer is None:
+            return
+        with self._init_lock:
+            # ":memory:" ist pro Verbindung eine eigene Datenbank
+            if self.db_path in self._initialized and self.db_path != ":memory:":
+                return
+            self._initialized.add(self.db_path)
+            try:
+                self.initializer(conn)
+            except BaseException:
+                self._initialized.discard(self.db_path)
+                raise
+
+    def set_db_path(self, db_path):
+        """Wechselt die Datenbank-Datei und schliesst alle bestehenden Verbindungen."""
+        self.close_all()
+        self.db_path = db_path
+
+    def close_all(self):
+        """Schliesst alle offenen Verbindungen (aller Threads)."""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            self._generation += 1
+
+_manager = ConnectionManager(initializer=lambda conn: init_db(conn))
+atexit.register(_manager.close_all)
+
+def get_connection():
+    """Gibt die wiederverwendete Verbindung des aktuellen Threads zurück."""
+    return _manager.get_connection()
+
+def set_db_path(db_path):
+    """
+    Setzt den Pfad der Datenbank-Datei. Das Schema wird beim ersten Zugriff
+    angelegt bzw. aktualisiert. Das aktuelle Konto wird wieder aus LEDGER bestimmt.
+    """
+    global _ledger_id
+    _manager.set_db_path(db_path)
+    _ledger_id = None
+
+def set_instrumentation(enabled=True, slow_query_ms=None):
+    """
+    Schaltet die Messungen (instrumentation.py) ein oder aus. Offene
+    Verbindungen werden geschlossen und beim nächsten Zugriff mit bzw. ohne
+    Zeilenzähler und Trace-Callback neu geöffnet.
+    """
+    if enabled:
+        instrumentation.enable(slow_query_ms)
+    else:
+        instrumentation.disable()
+    _manager.close_all()
+
+def get_db_path():
+    """Gibt den Pfad der aktuell verwendeten Datenbank-Datei zurück."""
+    return _manager.db_path
+
+def connect_readonly(db_path=None, **kwargs):
+    """
+    Öffnet eine eigene, schreibgeschützte Verbindung (z. B. für Berichte in
+    Worker-Prozessen). Die Verbindung wird nicht vom ConnectionManager
+    verwaltet und muss vom Aufrufer geschlossen werden. Weitere Argumente
+    gehen an sqlite3.connect() (z. B. check_same_thread=False für Pools).
+    """
+    from pathlib import Path  # nur hier benötigt, verzögert geladen (Startzeit)
+
+    uri = Path(db_path or _manager.db_path).absolute().as_uri()
+    return _connect(f"{uri}?mode=ro", uri=True, **kwargs)
+
+@contextmanager
+def report_connection(conn=None):
+    """
+    Liefert die Verbindung für lange Lesezugriffe (Berichte, Exporte): die
+    übergebene oder eine eigene, schreibgeschützte Verbindung, die danach
+    geschlossen wird. Ihr Lesezugriff sieht einen festen Stand der Datenbank
+    und hält keine Transaktion auf der Thread-Verbindung offen.
+    """
+    if conn is not None:
+        yield conn
+        return
+    if _manager.db_path == ":memory:":
+        # Eine In-Memory-Datenbank gibt es nur in dieser einen Verbindung
+        yield get_connection()
+        return
+    get_connection()  # Schema anlegen/aktualisieren, bevor schreibgeschützt gelesen wird
+    conn = connect_readonly()
+    try:
+        yield conn
+    finally:
+        conn.close()
 
 # ------------------------------
-# Schema-Update: Spalte 'exported'
+# Schema-Update: Migrationen & Indizes
 # ------------------------------
-def update_schema():
-    conn = sqlite3.connect("finanz_tracker.db")
+# Alle Indizes auf 'transactions' beginnen mit 'ledger_id': jede Abfrage
+# eines Kontos liest nur dessen Bereich im Index, nie Zeilen anderer Konten.
+SCHEMA_INDEXES = {
+    # Export-Abfragen: type = ? AND date-Bereich. 'type' absteigend, damit der
+    # PDF-Bericht (Einnahmen vor Ausgaben, dann Datum) ohne Sortierung auskommt.
+    "idx_transactions_ledger_type_desc_date": "transactions(ledger_id, type DESC, date)",
+    # Monatsfilter über alle Typen
+    "idx_transactions_ledger_date": "transactions(ledger_id, date)",
+    # Filter nach Kategorie (ganzzahlige ID statt Text, siehe 'categories')
+    "idx_transactions_ledger_category_id": "transactions(ledger_id, category_id)",
+    # Seitenweises Blättern pro Typ (type = ? AND id < ? ORDER BY id DESC,
+    # query_transactions), die Zeilen-ID steckt implizit am Ende jedes Index-Eintrags
+    "idx_transactions_ledger_type": "transactions(ledger_id, type)",
+    # Alle Zeilen eines Kontos nach ID (ungefilterte Listen, Exporte, analytics.py)
+    "idx_transactions_ledger": "transactions(ledger_id)",
+    # Fällige Daueraufträge (next_due <= heute, siehe materialize_recurring)
+    "idx_recurring_rules_next_due": "recurring_rules(next_due)",
+}
+
+# Durch die obigen Indizes ersetzt
+OBSOLETE_INDEXES = ("idx_transactions_type_exported_date", "idx_transactions_type_desc_exported_date",
+                    "idx_transactions_category", "idx_transactions_type_desc_date", "idx_transactions_date",
+                    "idx_transactions_category_id", "idx_transactions_type")
+
+# Jeder Export (Ziel "pdf", "csv", ...) wird als Batch festgehalten: Ziel,
+# Datumsbereich (ganze Monate oder alles) und ID-Bereich. Da neue
+# Transaktionen immer grössere IDs erhalten, ist danach in jedem Monat des
+# Bereichs alles bis zur letzten ID exportiert. Das Maximum je Ziel und Monat
+# steht als Wasserzeichen in 'export_watermarks'; "noch nicht exportiert"
+# heisst damit id > Wasserzeichen, ohne UPDATE auf 'transactions'. Batches
+# und Wasserzeichen gelten je Konto.
+DEFAULT_EXPORT_TARGET = "pdf"
+
+EXPORT_TABLES = (
+    """
+    CREATE TABLE IF NOT EXISTS export_batches (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ledger_id INTEGER NOT NULL DEFAULT 1 REFERENCES ledgers (id),
+        target TEXT NOT NULL,
+        created TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        start_date TEXT,
+        end_date TEXT,
+        first_id INTEGER NOT NULL,
+        last_id INTEGER NOT NULL,
+        row_count INTEGER NOT NULL,
+        filename TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS export_watermarks (
+        ledger_id INTEGER NOT NULL DEFAULT 1 REFERENCES ledgers (id),
+        target TEXT NOT NULL,
+        month TEXT NOT NULL,
+        last_id INTEGER NOT NULL,
+        PRIMARY KEY (ledger_id, target, month)
+    ) WITHOUT ROWID
+    """,
+)
+
+# Wasserzeichen des Monats einer Zeile (Parameter: Ziel)
+EXPORT_WATERMARK_SQL = """COALESCE((SELECT w.last_id FROM export_watermarks w
+    WHERE w.ledger_id = transactions.ledger_id AND w.target = ?
+      AND w.month = substr(transactions.date, 1, 7)), 0)"""
+
+# Monate eines Kontos aus monthly_summary, die den Bereich [start, end)
+# berühren (Parameter: konto, start, start, end, end)
+_SUMMARY_MONTHS_SQL = """
+    SELECT DISTINCT printf('%04d-%02d', year, month) AS month FROM monthly_summary
+    WHERE ledger_id = ?
+      AND (? IS NULL OR printf('%04d-%02d', year, month) >= substr(?, 1, 7))
+      AND (? IS NULL OR printf('%04d-%02d-01', year, month) < ?)
+"""
+
+def update_schema(conn=None):
+    """Bringt das Schema einer bestehenden Datenbank auf den aktuellen Stand."""
+    conn = conn or get_connection()
     cursor = conn.cursor()
     # Prüfen, ob die Tabelle existiert und welche Spalten vorhanden sind
     cursor.execute("PRAGMA table_info(transactions)")
-    columns = [info[1] for info in cursor.fetchall()]
-    if 'exported' not in columns:
-        try:
-            cursor.execute("ALTER TABLE transactions ADD COLUMN exported INTEGER DEFAULT 0")
-            conn.commit()
-            print("✅ Spalte 'exported' erfolgreich zur Tabelle hinzugefügt.")
-        except Exception as e:
-            print("❌ Fehler beim Hinzufügen der Spalte 'exported':", e)
-    conn.close()
+    column_types = {info[1]: info[2].upper() for info in cursor.fetchall()}
+
+    # Export-Journal (ersetzt die frühere Spalte 'exported') und Daueraufträge
+    with conn:
+        for table in EXPORT_TABLES:
+            conn.execute(table)
+        conn.execute(RECURRING_RULES_TABLE)
+
+    # Beträge von REAL (CHF) auf ganze Rappen umstellen, die Spalte 'exported'
+    # ins Export-Journal übernehmen und/oder die Kategorie-Texte durch IDs der
+    # Tabelle 'categories' ersetzen – alles baut die Tabelle neu auf
+    if column_types.get("amount") == "REAL" or "exported" in column_types or "category" in column_types:
+        _migrate_transactions_table(conn, column_types)
+    # Datenbanken von vor den Konten: alles gehört zum Standard-Konto
+    _migrate_ledgers(conn)
+    cursor.execute("PRAGMA table_info(monthly_summary)")
+    summary_types = {info[1]: info[2].upper() for info in cursor.fetchall()}
+    if summary_types and (summary_types.get("total") != "INTEGER" or "category" in summary_types
+                          or "ledger_id" not in summary_types):
+        # Wird unten mit ganzzahligen Summen je Konto und Kategorie-ID neu angelegt und befüllt
+        with conn:
+            conn.execute("DROP TABLE monthly_summary")
+
+    # Indizes anlegen (idempotent), ersetzte Indizes entfernen
+    with conn:
+        for name in OBSOLETE_INDEXES:
+            conn.execute(f"DROP INDEX IF EXISTS {name}")
+        for name, definition in SCHEMA_INDEXES.items():
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+    # Monats-/Kategorie-Zusammenfassung anlegen und einmalig befüllen
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'monthly_summary'")
+    if cursor.fetchone() is None:
+        with conn:
+            conn.execute(MONTHLY_SUMMARY_TABLE)
+        rebuild_monthly_summary(conn)
+        log.info("✅ Tabelle 'monthly_summary' erfolgreich angelegt.")
+
+# ------------------------------
+# Monats-/Kategorie-Zusammenfassung (monthly_summary)
+# ------------------------------
+# Die Tabelle wird im Schreibpfad (add_transaction, add_transactions,
+# import_from_csv, reset_transactions) in derselben Datenbank-Transaktion
+# nachgeführt. Summen und Diagramme lesen nur noch hier, der Aufwand hängt
+# damit von der Anzahl Kategorien/Monate ab, nicht von der Anzahl Zeilen.
+# Für Änderungen an der Datenbank ausserhalb dieser Funktionen gibt es
+# rebuild_monthly_summary().
+MONTHLY_SUMMARY_TABLE = """
+    CREATE TABLE IF NOT EXISTS monthly_summary (
+        ledger_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        type TEXT NOT NULL,
+        category_id INTEGER NOT NULL,
+        total INTEGER NOT NULL DEFAULT 0,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (ledger_id, year, month, type, category_id)
+    ) WITHOUT ROWID
+"""
+
+# Callbacks, die nach jedem Schreib-Commit aufgerufen werden (z. B. um
+# zwischengespeicherte Auswertungen zu verwerfen, siehe analytics.py)
+_write_listeners = []
+
+def add_write_listener(callback):
+    """Registriert callback(), das nach jeder erfolgreichen Schreib-Transaktion aufgerufen wird."""
+    if callback not in _write_listeners:
+        _write_listeners.append(callback)
+
+def remove_write_listener(callback):
+    """Entfernt einen mit add_write_listener() registrierten Callback."""
+    if callback in _write_listeners:
+        _write_listeners.remove(callback)
+
+@contextmanager
+def write_transaction(conn=None):
+    """
+    Öffnet eine Schreib-Transaktion (BEGIN IMMEDIATE) auf der Thread-Verbindung
+    (oder der übergebenen Verbindung). Bei einer Ausnahme wird zurückgerollt,
+    sonst die Datenversion erhöht, committet und die Write-Listener werden benachrichtigt.
+    """
+    conn = conn or get_connection()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+    except BaseException:
+        conn.rollback()
+        raise
+    conn.commit()
+    for callback in list(_write_listeners):
+        callback()
+
+def get_data_version(conn=None):
+    """
+    Gibt die Datenversion zurück: ein Zähler in der Datenbank-Datei, den jede
+    Schreib-Transaktion erhöht (auch die anderer Prozesse). Geeignet als
+    Cache-Schlüssel für abgeleitete Daten wie Diagramme (siehe charts.py).
+    """
+    conn = conn or get_connection()
+    row = conn.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+    return row[0] if row else 0
+
+def _last_transaction_id(conn):
+    return conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+
+def _summarize_new_transactions(conn, after_id):
+    """Addiert alle Transaktionen mit id > after_id in die Monatszusammenfassung."""
+    conn.execute("""
+        INSERT INTO monthly_summary (ledger_id, year, month, type, category_id, total, count)
+        SELECT ledger_id, CAST(substr(date, 1, 4) AS INTEGER), CAST(substr(date, 6, 2) AS INTEGER),
+               type, category_id, SUM(amount), COUNT(*)
+        FROM transactions
+        WHERE id > ?
+        GROUP BY ledger_id, 2, 3, type, category_id
+        ON CONFLICT (ledger_id, year, month, type, category_id)
+        DO UPDATE SET total = total + excluded.total, count = count + excluded.count
+    """, (after_id,))
+
+@timed
+def rebuild_monthly_summary(conn=None):
+    """
+    Baut die Tabelle 'monthly_summary' vollständig aus 'transactions' neu auf
+    (z. B. nach manuellen Änderungen an der Datenbank ausserhalb dieses Moduls).
+    Gibt die Anzahl der Zusammenfassungs-Zeilen zurück.
+    """
+    with write_transaction(conn) as conn:
+        conn.execute("DELETE FROM monthly_summary")
+        _summarize_new_transactions(conn, 0)
+        return conn.execute("SELECT COUNT(*) FROM monthly_summary").fetchone()[0]
 
 # ------------------------------
 # Datenbank und Tabelle erstellen
 # ------------------------------
-conn = sqlite3.connect("finanz_tracker.db")
-cursor = conn.cursor()
-cursor.execute('''
-CREATE TABLE IF NOT EXISTS transactions (
-    id INTEGER PRIMARY KEY AUTOINCREMENT,
-    type TEXT NOT NULL,
-    amount REAL NOT NULL,
-    category TEXT NOT NULL,
-    date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-)
-''')
-conn.commit()
-conn.close()
+# Beträge werden als ganze Rappen (INTEGER) gespeichert, Summen sind damit
+# exakt; in CHF umgerechnet wird erst bei der Formatierung. Die Kategorie
+# steht als ganzzahlige ID in der Zeile, ihr Name einmal in 'categories'.
+# 'ledger_id' ist das Konto (siehe 'ledgers'), 1 das Standard-Konto.
+TRANSACTIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ledger_id INTEGER NOT NULL DEFAULT 1 REFERENCES ledgers (id),
+        type TEXT NOT NULL,
+        amount INTEGER NOT NULL,
+        category_id INTEGER NOT NULL REFERENCES categories (id),
+        date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Wörterbuch der Kategorien: 'key' ist der normalisierte Name (siehe
+# normalize_category), damit "Miete" und "miete " dieselbe Kategorie sind.
+# 'name' ist die angezeigte Schreibweise.
+CATEGORIES_TABLE = """
+    CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        key TEXT NOT NULL UNIQUE
+    )
+"""
+
+# Konten (Haushalte, Geschäftskonten ...) in derselben Datei; der Name ist
+# ohne Rücksicht auf Gross-/Kleinschreibung eindeutig
+LEDGERS_TABLE = """
+    CREATE TABLE IF NOT EXISTS ledgers (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE COLLATE NOCASE
+    )
+"""
+
+# Schlüssel/Wert-Tabelle für Verwaltungsdaten; 'data_version' zählt die
+# Schreib-Transaktionen (siehe write_transaction, get_data_version)
+META_TABLE = """
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    ) WITHOUT ROWID
+"""
+
+# Name der Kategorie einer Zeile in SELECT-Listen (Suche über den Primärschlüssel;
+# als Unterabfrage statt JOIN, damit die Indizes auf 'transactions' die Reihenfolge liefern)
+CATEGORY_NAME_SQL = "(SELECT name FROM categories WHERE categories.id = transactions.category_id)"
+
+def init_db(conn=None):
+    """Legt die Tabelle an und führt die Schema-Updates aus."""
+    conn = conn or get_connection()
+    # Der Journal-Modus wird in der Datei gespeichert und gilt für alle Prozesse
+    mode = conn.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}").fetchone()[0]
+    if mode.upper() != JOURNAL_MODE.upper() and conn.execute("PRAGMA database_list").fetchone()[2]:
+        log.warning("⚠️ Journal-Modus %s nicht verfügbar, verwende %s.", JOURNAL_MODE, mode)
+    with conn:
+        conn.execute(META_TABLE)
+        conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('data_version', 0)")
+        conn.execute(LEDGERS_TABLE)
+        conn.execute("INSERT OR IGNORE INTO ledgers (id, name) VALUES (?, ?)", (DEFAULT_LEDGER_ID, DEFAULT_LEDGER))
+        conn.execute(CATEGORIES_TABLE)
+        conn.execute(TRANSACTIONS_TABLE.format(name="transactions"))
+    # Schema-Update ausführen (Migrationen älterer Datenbanken, Indizes, Zusammenfassung)
+    update_schema(conn)
+
+def _migrate_transactions_table(conn, column_types):
+    """
+    Baut die Tabelle 'transactions' in einer einzigen Datenbank-Transaktion
+    neu auf (SQLite kann Spaltentypen nicht ändern): 'amount REAL' (CHF) wird
+    zu ganzen Rappen, eine vorhandene Spalte 'exported' wird vorher ins
+    Export-Journal übernommen und entfällt, die Spalte 'category' (Text) wird
+    durch 'category_id' ersetzt. IDs und der AUTOINCREMENT-Zähler bleiben erhalten.
+    """
+    to_rappen_sql = column_types.get("amount") == "REAL"
+    # Dieselbe kaufmännische Rundung wie bei neuen Beträgen (to_rappen): 1.005 → 101,
+    # ROUND() in SQLite rechnet binär und ergäbe 100
+    amount_sql = "_to_rappen(t.amount)" if to_rappen_sql else "t.amount"
+    if to_rappen_sql:
+        conn.create_function("_to_rappen", 1, to_rappen, deterministic=True)
+    with write_transaction(conn) as conn:
+        if "exported" in column_types:
+            batches, reopened = _migrate_exported_flags(conn)
+        if "category" in column_types:
+            variants, categories = _migrate_categories(conn)
+            source = "transactions t JOIN temp.category_map m ON m.raw IS t.category"
+            category_sql = "m.id"
+        else:
+            source = "transactions t"
+            category_sql = "t.category_id"
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'transactions'").fetchone()
+        conn.execute(TRANSACTIONS_TABLE.format(name="transactions_new"))
+        count = conn.execute(f"""
+            INSERT INTO transactions_new (id, type, amount, category_id, date)
+            SELECT t.id, t.type, {amount_sql}, {category_sql}, t.date FROM {source}
+        """).rowcount
+        conn.execute("DROP TABLE transactions")
+        conn.execute("ALTER TABLE transactions_new RENAME TO transactions")
+        if "category" in column_types:
+            conn.execute("DROP TABLE temp.category_map")
+        if row is not None:
+            conn.execute("DELETE FROM sqlite_sequence WHERE name = 'transactions'")
+            conn.execute("INSERT INTO sqlite_sequence (name, seq) VALUES ('transactions', ?)", row)
+    if to_rappen_sql:
+        conn.create_function("_to_rappen", 1, None)
+        log.info("✅ %d Beträge in ganze Rappen umgestellt.", count)
+    if "exported" in column_types:
+        log.info("✅ Spalte 'exported' ins Export-Journal übernommen (%d Monate).", batches)
+        if reopened:
+            log.warning("⚠️ %d einzeln markierte Transaktionen gelten wieder als nicht exportiert.", reopened)
+    if "category" in column_types:
+        log.info("✅ %d Kategorie-Schreibweisen in %d Kategorien übernommen.", variants, categories)
+
+def _migrate_ledgers(conn):
+    """
+    Ergänzt Tabellen von vor den Konten um 'ledger_id'; bestehende Zeilen
+    gehören zum Standard-Konto. Die Spalte kommt per ALTER TABLE ohne
+    Umkopieren dazu, nur 'export_watermarks' wird wegen des neuen
+    Primärschlüssels neu aufgebaut (wenige Zeilen: eine pro Ziel und Monat).
+    """
+    missing = [table for table in ("transactions", "export_batches", "export_watermarks", "recurring_rules")
+               if "ledger_id" not in {info[1] for info in conn.execute(f"PRAGMA table_info({table})")}]
+    if not missing:
+        return
+    with write_transaction(conn) as conn:
+        for table in missing:
+            if table == "export_watermarks":
+                conn.execute("ALTER TABLE export_watermarks RENAME TO export_watermarks_old")
+                conn.execute(EXPORT_TABLES[1])
+                conn.execute("""
+                    INSERT INTO export_watermarks (ledger_id, target, month, last_id)
+                    SELECT ?, target, month, last_id FROM export_watermarks_old
+                """, (DEFAULT_LEDGER_ID,))
+                conn.execute("DROP TABLE export_watermarks_old")
+            else:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN ledger_id INTEGER NOT NULL "
+                             f"DEFAULT {DEFAULT_LEDGER_ID} REFERENCES ledgers (id)")
+    log.info("✅ Konten eingeführt, bestehende Daten gehören zum Konto '%s'.", DEFAULT_LEDGER)
+
+def _migrate_categories(conn):
+    """
+    Füllt 'categories' aus den Texten der alten Spalte 'category' und legt
+    die Zuordnung Text → ID in der temporären Tabelle 'category_map' ab.
+    Schreibweisen mit demselben normalisierten Namen (z. B. "Miete" und
+    "miete ") werden zusammengeführt, angezeigt wird die häufigste, bei
+    Gleichstand die zuerst erfasste.
+    Gibt (anzahl_schreibweisen, anzahl_kategorien) zurück.
+    """
+    variants = conn.execute("SELECT category, COUNT(*), MIN(id) FROM transactions GROUP BY category").fetchall()
+    spellings = {}
+    for raw, count, first_id in variants:
+        key = normalize_category(raw) or normalize_category(UNCATEGORIZED)
+        spellings.setdefault(key, []).append((count, -first_id, raw))
+    conn.execute("CREATE TEMP TABLE category_map (raw TEXT PRIMARY KEY, id INTEGER NOT NULL)")
+    for key, candidates in spellings.items():
+        name = max(candidates)[2]
+        category_id = _category_id(conn, name if normalize_category(name) else UNCATEGORIZED)
+        conn.executemany("INSERT INTO temp.category_map (raw, id) VALUES (?, ?)",
+                         [(raw, category_id) for _, _, raw in candidates])
+    return len(variants), len(spellings)
+
+def _migrate_exported_flags(conn):
+    """
+    Übernimmt die Spalte 'exported' als PDF-Exporte ins Journal: pro Monat
+    wird der längste vollständig exportierte ID-Anfang (bis vor die erste
+    nicht exportierte Zeile) zu einem Batch mit Wasserzeichen. Exportierte
+    Zeilen nach einer Lücke lassen sich so nicht abbilden und gelten wieder
+    als offen. Gibt (anzahl_batches, anzahl_wieder_offen) zurück.
+    """
+    months = conn.execute("""
+        SELECT substr(date, 1, 7), MIN(id), MAX(id),
+               MIN(CASE WHEN COALESCE(exported, 0) = 0 THEN id END),
+               SUM(exported = 1)
+        FROM transactions
+        WHERE date IS NOT NULL
+        GROUP BY 1
+    """).fetchall()
+    batches = 0
+    reopened = 0
+    for month, min_id, max_id, first_open, exported_count in months:
+        if not exported_count:
+            continue
+        last_id = first_open - 1 if first_open is not None else max_id
+        start, end = month_range(month[:4], month[5:7])
+        covered = 0
+        if last_id >= min_id:
+            covered = conn.execute("SELECT COUNT(*) FROM transactions WHERE date >= ? AND date < ? AND id <= ?",
+                                   (start, end, last_id)).fetchone()[0]
+            # monthly_summary ist hier evtl. noch nicht aufgebaut: Wasserzeichen direkt setzen
+            conn.execute("""
+                INSERT INTO export_batches (target, start_date, end_date, first_id, last_id, row_count)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (DEFAULT_EXPORT_TARGET, start, end, min_id, last_id, covered))
+            conn.execute("INSERT OR REPLACE INTO export_watermarks (target, month, last_id) VALUES (?, ?, ?)",
+                         (DEFAULT_EXPORT_TARGET, month, last_id))
+            batches += 1
+        reopened += exported_count - covered
+    return batches, reopened
+
+def month_range(year, month):
+    """
+    Gibt den halboffenen Datumsbereich [start, ende) eines Monats zurück,
+    z. B. ("2025-03-01", "2025-04-01"). Im Gegensatz zu strftime() auf der
+    Spalte kann SQLite damit den Index auf 'date' verwenden.
+    """
+    try:
+        year, month = int(year), int(month)
+    except (TypeError, ValueError):
+        raise ValueError(f"Ungültiges Jahr oder ungültiger Monat '{year}/{month}'") from None
+    if not 1 <= month <= 12:
+        raise ValueError(f"Ungültiger Monat '{month}'")
+    start = f"{year:04d}-{month:02d}-01"
+    end = f"{year + 1:04d}-01-01" if month == 12 else f"{year:04d}-{month + 1:02d}-01"
+    return start, end
+
+def explain_query_plan(sql, params=()):
+    """Gibt die Zeilen von EXPLAIN QUERY PLAN für eine Abfrage zurück."""
+    conn = get_connection()
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+# ------------------------------
+# Beträge in Rappen
+# ------------------------------
+def to_rappen(value):
+    """
+    Wandelt einen CHF-Betrag (Zahl oder Text wie "12.50") exakt in ganze
+    Rappen um; mehr als zwei Nachkommastellen werden kaufmännisch gerundet.
+    Wirft ValueError bei ungültigen Werten.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Ungültiger Betrag '{value}'")
+    if isinstance(value, int):
+        return value * 100
+    if isinstance(value, str):
+        # Schneller Weg für "1500", "1500.5" und "1500.50" (z. B. CSV-Import)
+        whole, dot, fraction = value.partition(".")
+        if whole.isdecimal() and (not dot or (fraction.isdecimal() and len(fraction) <= 2)):
+            return int(whole) * 100 + int(fraction.ljust(2, "0") if dot else 0)
+    try:
+        # str() auch für float: 0.1 wird als "0.1" übernommen, nicht als Binärwert
+        amount = Decimal(str(value).strip())
+    except InvalidOperation:
+        raise ValueError(f"Ungültiger Betrag '{value}'")
+    if not amount.is_finite():
+        raise ValueError(f"Ungültiger Betrag '{value}'")
+    return int((amount * 100).to_integral_value(ROUND_HALF_UP))
+
+def parse_chf(value):
+    """Wandelt eine Eingabe wie "1'500.00", "1500,50", "CHF 80" oder "-80" in Rappen um."""
+    try:
+        # Schneller Weg für einfache Zahlen (z. B. das eigene Export-Format)
+        return to_rappen(value)
+    except ValueError:
+        if not isinstance(value, str):
+            raise
+    text = value.replace("CHF", "").replace("'", "").replace("’", "").replace(" ", "").strip()
+    if "," in text and "." in text:
+        # Das letzte Trennzeichen ist das Dezimaltrennzeichen
+        if text.rindex(",") > text.rindex("."):
+            text = text.replace(".", "").replace(",", ".")
+        else:
+            text = text.replace(",", "")
+    else:
+        text = text.replace(",", ".")
+    return to_rappen(text)
 
-# Schema-Update ausführen (fügt 'exported' hinzu, falls noch nicht vorhanden)
-update_schema()
+def rappen_to_str(rappen):
+    """Gibt Rappen exakt als CHF-Text ohne Tausendertrennzeichen zurück, z. B. 150050 -> "1500.50"."""
+    sign = "-" if rappen < 0 else ""
+    return f"{sign}{abs(rappen) // 100}.{abs(rappen) % 100:02d}"
+
+# Dasselbe in SQL (für den gestreamten CSV-Export)
+RAPPEN_TO_STR_SQL = "printf('%s%d.%02d', CASE WHEN amount < 0 THEN '-' ELSE '' END, abs(amount) / 100, abs(amount) % 100)"
+
+# ------------------------------
+# Konten (Tabelle 'ledgers')
+# ------------------------------
+# Mehrere Haushalte oder Geschäftskonten in einer Datei: jede Transaktion
+# trägt die ID ihres Kontos, alle Indizes beginnen mit 'ledger_id'. Die
+# Funktionen dieses Moduls arbeiten mit dem aktuellen Konto (set_ledger,
+# Umgebungsvariable FINANZ_TRACKER_LEDGER) oder dem als `ledger` übergebenen.
+# Summen über alle Konten liefert get_ledger_totals() mit einer Abfrage.
+DEFAULT_LEDGER = "Standard"
+DEFAULT_LEDGER_ID = 1
+LEDGER = os.environ.get("FINANZ_TRACKER_LEDGER", DEFAULT_LEDGER)
+
+Ledger = namedtuple("Ledger", ["id", "name"])
+LedgerTotals = namedtuple("LedgerTotals", ["id", "name", "income", "expenses", "count"])
+
+# ID des aktuellen Kontos; None = beim nächsten Zugriff aus LEDGER bestimmen
+_ledger_id = None
+
+def _find_ledger(conn, ledger):
+    """Gibt die ID des Kontos (Name oder ID) zurück oder None, falls es nicht existiert."""
+    if isinstance(ledger, int) and not isinstance(ledger, bool):
+        row = conn.execute("SELECT id FROM ledgers WHERE id = ?", (ledger,)).fetchone()
+    else:
+        row = conn.execute("SELECT id FROM ledgers WHERE name = ?", (" ".join(str(ledger).split()),)).fetchone()
+    return row[0] if row else None
+
+def add_ledger(name):
+    """Legt ein Konto an (falls es noch nicht existiert) und gibt seine ID zurück."""
+    name = " ".join(str(name).split())
+    if not name:
+        raise ValueError("Kontoname fehlt")
+    ledger_id = _find_ledger(get_connection(), name)
+    if ledger_id is not None:
+        return ledger_id
+    with write_transaction() as conn:
+        conn.execute("INSERT OR IGNORE INTO ledgers (name) VALUES (?)", (name,))
+        return _find_ledger(conn, name)
+
+def set_ledger(ledger, create=False):
+    """
+    Wählt das aktuelle Konto (Name oder ID) für alle folgenden Aufrufe ohne
+    `ledger`. Mit create=True wird ein unbekanntes Konto angelegt, sonst
+    ValueError geworfen. Gibt die ID des Kontos zurück.
+    """
+    global _ledger_id
+    ledger_id = _find_ledger(get_connection(), ledger)
+    if ledger_id is None:
+        if not create or isinstance(ledger, int):
+            raise ValueError(f"Unbekanntes Konto '{ledger}'")
+        ledger_id = add_ledger(ledger)
+    _ledger_id = ledger_id
+    return ledger_id
+
+def get_ledger():
+    """Gibt die ID des aktuellen Kontos zurück (beim ersten Aufruf aus LEDGER, wird bei Bedarf angelegt)."""
+    if _ledger_id is None:
+        return set_ledger(LEDGER, create=True)
+    return _ledger_id
+
+def resolve_ledger(ledger=None):
+    """Gibt die ID des Kontos `ledger` (ID oder Name) zurück, bei None die des aktuellen Kontos."""
+    if ledger is None:
+        return get_ledger()
+    if isinstance(ledger, int) and not isinstance(ledger, bool):
+        return ledger
+    ledger_id = _find_ledger(get_connection(), ledger)
+    if ledger_id is None:
+        raise ValueError(f"Unbekanntes Konto '{ledger}'")
+    return ledger_id
+
+def get_ledgers(conn=None):
+    """Gibt alle Konten als Ledger-Tupel (id, name) nach Name sortiert zurück."""
+    conn = conn or get_connection()
+    return [Ledger._make(row) for row in conn.execute("SELECT id, name FROM ledgers ORDER BY name")]
+
+@timed
+def get_ledger_totals(conn=None):
+    """
+    Gibt Einnahmen, Ausgaben (Rappen) und Anzahl Transaktionen aller Konten
+    als Liste von LedgerTotals zurück – eine einzige Abfrage über die
+    Monatszusammenfassung, auch Konten ohne Transaktionen sind enthalten.
+    """
+    conn = conn or get_connection()
+    rows = conn.execute("""
+        SELECT l.id, l.name,
+               COALESCE(SUM(CASE WHEN s.type = 'Einnahme' THEN s.total END), 0),
+               COALESCE(SUM(CASE WHEN s.type = 'Ausgabe' THEN s.total END), 0),
+               COALESCE(SUM(s.count), 0)
+        FROM ledgers l LEFT JOIN monthly_summary s ON s.ledger_id = l.id
+        GROUP BY l.id
+        ORDER BY l.name
+    """)
+    return [LedgerTotals._make(row) for row in rows]
+
+# ------------------------------
+# Kategorien (Tabelle 'categories') & Autovervollständigung
+# ------------------------------
+# Name für Zeilen ohne Kategorie-Text (nur bei der Migration alter Daten)
+UNCATEGORIZED = "Ohne Kategorie"
+
+Category = namedtuple("Category", ["id", "name", "count"])
+
+def normalize_category(name):
+    """Schlüssel einer Kategorie: Leerzeichen zusammengefasst, Gross-/Kleinschreibung egal."""
+    return " ".join(str(name).split()).casefold() if name is not None else ""
+
+# Wird beim Anlegen/Löschen von Kategorien gesetzt; der Write-Listener
+# verwirft dann den Cache (erst nach dem Commit, siehe _on_write)
+_categories_changed = False
+
+def _category_id(conn, name, ids=None):
+    """
+    Gibt die ID der Kategorie `name` zurück und legt sie bei Bedarf an
+    (innerhalb der laufenden Schreib-Transaktion). `ids` ist ein optionales
+    Dict normalisierter Name → ID, das bei Batches Abfragen spart.
+    """
+    global _categories_changed
+    key = normalize_category(name)
+    if ids is not None and key in ids:
+        return ids[key]
+    if not key:
+        raise ValueError("Kategorie fehlt")
+    row = conn.execute("SELECT id FROM categories WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        row = (conn.execute("INSERT INTO categories (name, key) VALUES (?, ?)",
+                            (" ".join(str(name).split()), key)).lastrowid,)
+        _categories_changed = True
+    if ids is not None:
+        ids[key] = row[0]
+    return row[0]
+
+def category_id(name, conn=None):
+    """Gibt die ID der Kategorie `name` zurück; eine neue Kategorie wird angelegt."""
+    with write_transaction(conn) as conn:
+        return _category_id(conn, name)
+
+class CategoryCache:
+    """
+    Alle Kategorien im Speicher für schnelle Suche und Autovervollständigung:
+    Präfix-Suche per Binärsuche über die sortierten Schlüssel, ähnliche
+    Namen (Tippfehler) über difflib. Treffer sind nach Häufigkeit sortiert.
+    """
+
+    def __init__(self, categories, db_path=None):
+        self.by_key = {normalize_category(category.name): category for category in categories}
+        self.keys = sorted(self.by_key)
+        self.db_path = db_path
+
+    @classmethod
+    def load(cls, conn=None):
+        conn = conn or get_connection()
+        # Eine Gruppierung über monthly_summary statt einer Unterabfrage pro
+        # Kategorie: deren Primärschlüssel beginnt mit ledger_id, nicht category_id
+        rows = conn.execute("""
+            SELECT c.id, c.name, COALESCE(s.count, 0)
+            FROM categories c
+            LEFT JOIN (SELECT category_id, SUM(count) AS count FROM monthly_summary
+                       GROUP BY category_id) s ON s.category_id = c.id
+        """)
+        return cls([Category._make(row) for row in rows], get_db_path())
+
+    def __len__(self):
+        return len(self.keys)
+
+    def get(self, name):
+        """Gibt die Kategorie (Category) mit diesem normalisierten Namen zurück oder None."""
+        return self.by_key.get(normalize_category(name))
+
+    def _ranked(self, keys, limit):
+        categories = sorted((self.by_key[key] for key in keys), key=lambda c: (-c.count, c.name))
+        return [category.name for category in categories[:limit]]
+
+    def complete(self, prefix, limit=10):
+        """Gibt die häufigsten Kategorien zurück, deren Name mit `prefix` beginnt."""
+        prefix = normalize_category(prefix)
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "\U0010ffff", start)
+        return self._ranked(self.keys[start:end], limit)
+
+    def suggest(self, text, limit=3, cutoff=0.75):
+        """Gibt ähnlich geschriebene Kategorien zurück (z. B. "Mite" → "Miete")."""
+        from difflib import get_close_matches  # nur hier benötigt, verzögert geladen (Startzeit)
+
+        return self._ranked(get_close_matches(normalize_category(text), self.keys, limit, cutoff), limit)
+
+_category_cache = None
+_category_cache_lock = threading.Lock()
+
+def get_category_cache():
+    """Gibt den Kategorien-Cache zurück (wird beim ersten Zugriff bzw. nach Änderungen geladen)."""
+    global _category_cache
+    cache = _category_cache
+    if cache is None or cache.db_path != get_db_path():
+        with _category_cache_lock:
+            cache = _category_cache
+            if cache is None or cache.db_path != get_db_path():
+                cache = _category_cache = CategoryCache.load()
+    return cache
+
+def invalidate_category_cache():
+    """Verwirft den Kategorien-Cache (z. B. nach Änderungen durch einen anderen Prozess)."""
+    global _category_cache
+    _category_cache = None
+
+def _on_write():
+    global _categories_changed
+    if _categories_changed:
+        _categories_changed = False
+        invalidate_category_cache()
+
+add_write_listener(_on_write)
+
+def complete_category(prefix, limit=10):
+    """Vervollständigt eine Kategorie-Eingabe: bekannte Namen mit diesem Anfang, häufigste zuerst."""
+    return get_category_cache().complete(prefix, limit)
+
+def suggest_category(text, limit=3):
+    """Schlägt für eine unbekannte Kategorie ähnliche bekannte Namen vor (leer, falls bekannt oder keine)."""
+    cache = get_category_cache()
+    if cache.get(text) is not None:
+        return []
+    return cache.suggest(text, limit)
+
+def get_categories():
+    """Gibt alle Kategorien (Category mit id, name, anzahl) zurück, häufigste zuerst."""
+    return sorted(get_category_cache().by_key.values(), key=lambda c: (-c.count, c.name))
 
 # ------------------------------
 # Funktionen zur Verwaltung der Transaktionen
 # ------------------------------
 
-def add_transaction(transaction_type, amount, category):
-    """Speichert eine neue Transaktion in der Datenbank."""
-    conn = sqlite3.connect("finanz_tracker.db")
-    cursor = conn.cursor()
-    # exported wird hier automatisch auf 0 gesetzt (Default)
-    cursor.execute("INSERT INTO transactions (type, amount, category) VALUES (?, ?, ?)",
-                   (transaction_type, amount, category))
-    conn.commit()
-    conn.close()
-    print(f"✅ Transaktion gespeichert: {category} - {amount:.2f} CHF")
+@timed
+def add_transaction(transaction_type, amount, category, ledger=None):
+    """
+    Speichert eine neue Transaktion (Betrag in Rappen) im Konto `ledger`
+    (Standard: aktuelles) und gibt ihre ID zurück. Wirft ValueError bei
+    ungültigen Angaben (validate_transaction).
+    """
+    transaction_type, amount, category = validate_transaction(transaction_type, amount, category)
+    ledger_id = resolve_ledger(ledger)
+    with write_transaction() as conn:
+        last_id = _last_transaction_id(conn)
+        cursor = conn.execute("INSERT INTO transactions (ledger_id, type, amount, category_id) VALUES (?, ?, ?, ?)",
+                              (ledger_id, transaction_type, amount, _category_id(conn, category)))
+        _summarize_new_transactions(conn, last_id)
+    return cursor.lastrowid
 
-def show_transactions():
-    """Zeigt alle Transaktionen formatiert in der Konsole an."""
-    conn = sqlite3.connect("finanz_tracker.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM transactions")
-    rows = cursor.fetchall()
-    conn.close()
+TRANSACTION_TYPES = ("Einnahme", "Ausgabe")
 
-    if not rows:
-        print("❌ Keine Transaktionen gefunden.")
-        return
-    
-    print("\n📋 Alle Transaktionen:")
-    print("=" * 80)
-    print(f"{'ID':<5} {'Typ':<10} {'Betrag':<12} {'Kategorie':<20} {'Datum':<20}")
-    print("=" * 80)
-    for row in rows:
-        print(f"{row[0]:<5} {row[1]:<10} {row[2]:<10.2f} CHF  {row[3]:<20} {row[4]:<20}")
-    print("=" * 80)
-
-def get_all_transactions():
-    """Gibt eine Liste aller Transaktionen zurück (für z. B. Web/Flask)."""
-    conn = sqlite3.connect("finanz_tracker.db")
+def validate_transaction(transaction_type, amount, category):
+    """
+    Prüft und normalisiert eine Transaktion. Der Betrag wird in ganzen
+    Rappen erwartet (Benutzereingaben vorher mit parse_chf() umwandeln) und
+    muss positiv sein – das Vorzeichen steckt im Typ.
+    Gibt (typ, betrag, kategorie) zurück oder wirft ValueError mit dem Grund.
+    """
+    if transaction_type not in TRANSACTION_TYPES:
+        raise ValueError(f"Ungültiger Typ '{transaction_type}'")
+    if isinstance(amount, bool) or not isinstance(amount, int):
+        raise ValueError(f"Ungültiger Betrag '{amount}' (erwartet ganze Rappen)")
+    if amount <= 0:
+        raise ValueError(f"Ungültiger Betrag '{amount}' (muss grösser als 0 sein)")
+    category = " ".join(str(category).split())
+    if not category:
+        raise ValueError("Kategorie fehlt")
+    return transaction_type, amount, category
+
+@timed
+def add_transactions(batch, ledger=None):
+    """
+    Speichert mehrere Transaktionen in einer einzigen Datenbank-Transaktion
+    im Konto `ledger` (Standard: aktuelles Konto).
+    `batch` ist eine Liste von (typ, betrag_in_rappen, kategorie)-Tupeln.
+    Gibt (gespeichert, abgelehnt) zurück: gespeichert ist die Liste der
+    normalisierten Einträge, abgelehnt eine Liste von (eintrag, grund).
+    """
+    saved = []
+    rejected = []
+    for item in batch:
+        try:
+            saved.append(validate_transaction(*item))
+        except (TypeError, ValueError) as e:
+            rejected.append((item, str(e)))
+
+    if saved:
+        ledger_id = resolve_ledger(ledger)
+        with write_transaction() as conn:
+            last_id = _last_transaction_id(conn)
+            ids = {}
+            conn.executemany("INSERT INTO transactions (ledger_id, type, amount, category_id) VALUES (?, ?, ?, ?)",
+                             [(ledger_id, ttype, amount, _category_id(conn, category, ids))
+                              for ttype, amount, category in saved])
+            _summarize_new_transactions(conn, last_id)
+    return saved, rejected
+
+@timed
+def get_all_transactions(newest_first=False, ledger=None):
+    """
+    Gibt eine Liste aller Transaktionen (id, typ, betrag, kategorie, datum) eines Kontos zurück.
+    Lädt die ganze Tabelle; für grosse Datenbanken query_transactions() bzw.
+    iter_transactions() verwenden (so auch der HTTP-Dienst in api_server.py).
+    """
+    conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT id, type, amount, category, date FROM transactions")
+    order = "DESC" if newest_first else "ASC"
+    cursor.execute(f"SELECT id, type, amount, {CATEGORY_NAME_SQL}, date FROM transactions "
+                   f"WHERE ledger_id = ? ORDER BY id {order}", (resolve_ledger(ledger),))
     rows = cursor.fetchall()
-    conn.close()
     return rows
 
-def get_total_income():
-    """Berechnet die Gesamteinnahmen."""
-    conn = sqlite3.connect("finanz_tracker.db")
+# ------------------------------
+# Abfrage-API mit Filtern und Keyset-Pagination
+# ------------------------------
+Transaction = namedtuple("Transaction", ["id", "type", "amount", "category", "date", "exported"])
+TransactionPage = namedtuple("TransactionPage", ["rows", "cursor"])
+
+# 'exported' bezieht sich auf den PDF-Export (Export-Journal, siehe unten)
+TRANSACTION_COLUMNS = f"id, type, amount, {CATEGORY_NAME_SQL}, date, id <= {EXPORT_WATERMARK_SQL.replace('?', repr(DEFAULT_EXPORT_TARGET))}"
+
+# Sortierschlüssel je Sortierung; die ID macht den Schlüssel eindeutig
+QUERY_ORDERS = {
+    "id": ("id",),
+    "date": ("date", "id"),
+}
+
+def _encode_cursor(order_by, descending, key):
+    data = json.dumps([order_by, descending, list(key)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+def page_cursor(row, order_by="id", descending=False):
+    """
+    Gibt den Cursor zurück, mit dem query_transactions() hinter der
+    Transaktion `row` weiterblättert – auch in der Gegenrichtung (z. B. um
+    in einer Ansicht mit den neuesten zuerst nach oben nachzuladen).
+    """
+    return _encode_cursor(order_by, descending, [getattr(row, column) for column in QUERY_ORDERS[order_by]])
+
+def _decode_cursor(cursor, order_by, descending):
+    try:
+        cursor_order, cursor_descending, key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError, AttributeError):
+        raise ValueError("Ungültiger Cursor")
+    if (cursor_order, cursor_descending) != (order_by, descending):
+        raise ValueError("Cursor passt nicht zur Sortierung")
+    # Der Schlüssel wird als SQL-Parameter gebunden: nur einfache Werte in der erwarteten Anzahl
+    if (not isinstance(key, list) or len(key) != len(QUERY_ORDERS[order_by])
+            or any(isinstance(value, bool) or not isinstance(value, (str, int, float, type(None)))
+                   for value in key)):
+        raise ValueError("Ungültiger Cursor")
+    return key
+
+def transaction_query(transaction_type=None, category=None, start=None, end=None,
+                      min_amount=None, max_amount=None, exported=None,
+                      order_by="id", descending=False, page_size=500, after=None, ledger=None):
+    """Baut die SQL-Abfrage einer Seite für query_transactions(). Gibt (sql, params) zurück."""
+    # 0 ergäbe keinen Cursor, negative Werte in SQLite "LIMIT -1" (unbegrenzt)
+    if isinstance(page_size, bool) or not isinstance(page_size, int) or page_size < 1:
+        raise ValueError(f"Ungültige Seitengrösse '{page_size}' (mindestens 1)")
+    if order_by not in QUERY_ORDERS:
+        raise ValueError(f"Ungültige Sortierung '{order_by}'")
+    columns = QUERY_ORDERS[order_by]
+    where, params = transaction_filters(start, end, transaction_type, category,
+                                        min_amount=min_amount, max_amount=max_amount, exported=exported,
+                                        ledger=ledger)
+    if after is not None:
+        # Nur Zeilen hinter dem Schlüssel der letzten Zeile (Zeilenwert-Vergleich
+        # über den Index statt OFFSET) – jede Seite kostet gleich viel
+        key = _decode_cursor(after, order_by, descending)
+        op = "<" if descending else ">"
+        placeholders = ", ".join("?" * len(columns))
+        where += f" AND ({', '.join(columns)}) {op} ({placeholders})"
+        params = params + key
+    direction = "DESC" if descending else "ASC"
+    order = ", ".join(f"{column} {direction}" for column in columns)
+    sql = f"SELECT {TRANSACTION_COLUMNS} FROM transactions{where} ORDER BY {order} LIMIT ?"
+    return sql, params + [page_size]
+
+@timed
+def query_transactions(transaction_type=None, category=None, start=None, end=None,
+                       min_amount=None, max_amount=None, exported=None,
+                       order_by="id", descending=False, page_size=500, after=None, conn=None, ledger=None):
+    """
+    Gibt eine Seite gefilterter Transaktionen eines Kontos (`ledger`,
+    Standard: aktuelles Konto) als TransactionPage(rows, cursor) zurück.
+
+    Filter: Typ, Kategorie, Datumsbereich [start, end), Betragsbereich
+    [min_amount, max_amount] in Rappen und exported (True/False, None = egal).
+    Sortiert wird nach "id" oder "date" (auf- oder absteigend). `rows` ist eine
+    Liste von Transaction-Tupeln; `cursor` ist ein undurchsichtiger String für
+    die nächste Seite (als `after` übergeben) oder None, wenn es keine weitere gibt.
+    """
+    sql, params = transaction_query(transaction_type, category, start, end, min_amount, max_amount,
+                                    exported, order_by, descending, page_size, after, ledger)
+    conn = conn or get_connection()
+    rows = [Transaction._make(row) for row in conn.execute(sql, params)]
+    cursor = page_cursor(rows[-1], order_by, descending) if len(rows) == page_size else None
+    return TransactionPage(rows, cursor)
+
+def iter_transactions(page_size=1000, **filters):
+    """
+    Liefert alle passenden Transaktionen Seite für Seite als Generator
+    (gleiche Filter und Sortierung wie query_transactions()).
+    """
+    after = None
+    while True:
+        page = query_transactions(page_size=page_size, after=after, **filters)
+        yield from page.rows
+        if page.cursor is None:
+            return
+        after = page.cursor
+
+@timed
+def get_transaction(transaction_id, conn=None, ledger=None):
+    """Gibt eine einzelne Transaktion (Transaction) des Kontos zurück oder None."""
+    ledger_id = resolve_ledger(ledger)
+    conn = conn or get_connection()
+    row = conn.execute(f"SELECT {TRANSACTION_COLUMNS} FROM transactions WHERE id = ? AND ledger_id = ?",
+                       (transaction_id, ledger_id)).fetchone()
+    return Transaction._make(row) if row else None
+
+@timed
+def get_transactions_by_month(year, month, ledger=None):
+    """Gibt die Transaktionen (id, typ, betrag, kategorie, datum, ...) eines Monats zurück."""
+    conn = get_connection()
+    return conn.execute(MONTH_FILTER_SQL, (resolve_ledger(ledger),) + month_range(year, month)).fetchall()
+
+@timed
+def get_total_income(ledger=None):
+    """Berechnet die Gesamteinnahmen des Kontos `ledger` (Standard: aktuelles Konto)."""
+    conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT SUM(amount) FROM transactions WHERE type = 'Einnahme'")
+    cursor.execute("SELECT SUM(total) FROM monthly_summary WHERE ledger_id = ? AND type = 'Einnahme'",
+                   (resolve_ledger(ledger),))
     total_income = cursor.fetchone()[0] or 0
-    conn.close()
     return total_income
 
-def get_total_expenses():
-    """Berechnet die Gesamtausgaben."""
-    conn = sqlite3.connect("finanz_tracker.db")
+@timed
+def get_total_expenses(ledger=None):
+    """Berechnet die Gesamtausgaben des Kontos `ledger` (Standard: aktuelles Konto)."""
+    conn = get_connection()
     cursor = conn.cursor()
-    cursor.execute("SELECT SUM(amount) FROM transactions WHERE type = 'Ausgabe'")
+    cursor.execute("SELECT SUM(total) FROM monthly_summary WHERE ledger_id = ? AND type = 'Ausgabe'",
+                   (resolve_ledger(ledger),))
     total_expenses = cursor.fetchone()[0] or 0
-    conn.close()
     return total_expenses
 
-def get_balance():
-    """Berechnet den aktuellen Saldo (Einnahmen - Ausgaben)."""
-    return get_total_income() - get_total_expenses()
+@timed
+def get_totals(conn=None, ledger=None):
+    """Gibt (Gesamteinnahmen, Gesamtausgaben) eines Kontos in Rappen mit einer einzigen Abfrage zurück."""
+    ledger_id = resolve_ledger(ledger)
+    conn = conn or get_connection()
+    row = conn.execute("""
+        SELECT SUM(CASE WHEN type = 'Einnahme' THEN total END),
+               SUM(CASE WHEN type = 'Ausgabe' THEN total END)
+        FROM monthly_summary WHERE ledger_id = ?
+    """, (ledger_id,)).fetchone()
+    return row[0] or 0, row[1] or 0
 
-# ------------------------------
-# Diagramme (Matplotlib)
-# ------------------------------
-
-def plot_expenses_by_category():
-    """Erstellt ein Balkendiagramm der Ausgaben nach Kategorie."""
-    conn = sqlite3.connect("finanz_tracker.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT category, SUM(amount) FROM transactions WHERE type = 'Ausgabe' GROUP BY category")
-    data = cursor.fetchall()
-    conn.close()
-
-    if not data:
-        print("❌ Keine Ausgaben vorhanden, um ein Diagramm zu erstellen.")
-        return
+@timed
+def get_type_stats(conn=None, ledger=None):
+    """
+    Gibt Anzahl und Summe (Rappen) pro Typ eines Kontos mit einer einzigen Abfrage zurück:
+    {"Einnahme": (anzahl, summe), "Ausgabe": (anzahl, summe)}
+    """
+    ledger_id = resolve_ledger(ledger)
+    conn = conn or get_connection()
+    stats = {ttype: (0, 0) for ttype in TRANSACTION_TYPES}
+    for ttype, count, total in conn.execute(
+            "SELECT type, SUM(count), SUM(total) FROM monthly_summary WHERE ledger_id = ? GROUP BY type",
+            (ledger_id,)):
+        stats[ttype] = (count or 0, total or 0)
+    return stats
 
-    categories = [row[0] for row in data]
-    amounts = [row[1] for row in data]
+@timed
+def get_balance(conn=None, ledger=None):
+    """Berechnet den aktuellen Saldo (Einnahmen - Ausgaben) eines Kontos."""
+    total_income, total_expenses = get_totals(conn, ledger)
+    return total_income - total_expenses
 
-    plt.figure(figsize=(8, 5))
-    plt.bar(categories, amounts, color="red")
-    plt.xlabel("Kategorie")
-    plt.ylabel("Betrag in CHF")
-    plt.title("Ausgaben nach Kategorie")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    print("📊 Das Diagramm wird angezeigt...")
-    plt.show()
+# ------------------------------
+# Daten für Diagramme (siehe charts.py)
+# ------------------------------
 
-def plot_incomes_and_expenses_by_category():
+def _summary_range(start=None, end=None, ledger=None):
     """
-    Erstellt ein Balkendiagramm, in dem pro Kategorie zwei Balken dargestellt werden:
-    - Einnahmen (grün)
-    - Ausgaben (rot)
+    Bedingungen für monthly_summary (Alias s) eines Kontos im Bereich
+    [start, end) aus ganzen Monaten ("YYYY-MM-01" oder None). Gibt
+    (bedingungen, params) zurück.
     """
-    import numpy as np
-    conn = sqlite3.connect("finanz_tracker.db")
-    cursor = conn.cursor()
-    cursor.execute("""
-        SELECT category, type, SUM(amount)
-        FROM transactions
-        GROUP BY category, type
-    """)
-    rows = cursor.fetchall()
-    conn.close()
+    clauses = ["s.ledger_id = ?"]
+    params = [resolve_ledger(ledger)]
+    for value, op in ((start, ">="), (end, "<")):
+        if value is None:
+            continue
+        if not _MONTH_START.match(value):
+            raise ValueError("Der Zeitraum muss ganze Monate umfassen (YYYY-MM-01)")
+        clauses.append(f"(s.year, s.month) {op} (?, ?)")
+        params += [int(value[:4]), int(value[5:7])]
+    return clauses, params
 
-    if not rows:
-        print("❌ Keine Transaktionen vorhanden, um ein Diagramm zu erstellen.")
-        return
+@timed
+def get_expenses_by_category(start=None, end=None, conn=None, ledger=None):
+    """
+    Gibt die Ausgaben pro Kategorie eines Kontos als Liste von (kategorie, summe)
+    zurück, optional nur für die ganzen Monate im Bereich [start, end).
+    """
+    clauses, params = _summary_range(start, end, ledger)
+    conn = conn or get_connection()
+    return conn.execute(f"""
+        SELECT c.name, SUM(s.total)
+        FROM monthly_summary s JOIN categories c ON c.id = s.category_id
+        WHERE {' AND '.join(["s.type = 'Ausgabe'"] + clauses)}
+        GROUP BY s.category_id
+    """, params).fetchall()
 
+@timed
+def get_category_totals(start=None, end=None, conn=None, ledger=None):
+    """
+    Gibt Einnahmen und Ausgaben pro Kategorie eines Kontos zurück, optional
+    nur für die ganzen Monate im Bereich [start, end):
+    {kategorie: {"Einnahme": summe, "Ausgabe": summe}}
+    """
+    clauses, params = _summary_range(start, end, ledger)
+    conn = conn or get_connection()
+    rows = conn.execute(f"""
+        SELECT c.name, s.type, SUM(s.total)
+        FROM monthly_summary s JOIN categories c ON c.id = s.category_id
+        WHERE {' AND '.join(clauses)}
+        GROUP BY s.category_id, s.type
+    """, params).fetchall()
     categories_data = {}
     for (category, ttype, amount) in rows:
         if category not in categories_data:
             categories_data[category] = {"Einnahme": 0, "Ausgabe": 0}
         categories_data[category][ttype] = amount
-
-    categories = sorted(categories_data.keys())
-    incomes = [categories_data[cat]["Einnahme"] for cat in categories]
-    expenses = [categories_data[cat]["Ausgabe"] for cat in categories]
-
-    if sum(incomes) == 0 and sum(expenses) == 0:
-        print("❌ Weder Einnahmen noch Ausgaben vorhanden, um ein Diagramm zu erstellen.")
-        return
-
-    x = np.arange(len(categories))
-    width = 0.4
-
-    plt.figure(figsize=(10, 6))
-    plt.bar(x - width/2, incomes, width, label="Einnahmen", color="green")
-    plt.bar(x + width/2, expenses, width, label="Ausgaben", color="red")
-    plt.xticks(x, categories, rotation=45)
-    plt.xlabel("Kategorie", fontsize=12)
-    plt.ylabel("Betrag in CHF", fontsize=12)
-    plt.title("Einnahmen und Ausgaben pro Kategorie", fontsize=14, fontweight="bold")
-    plt.legend()
-    plt.grid(axis="y", alpha=0.3)
-    plt.tight_layout()
-    print("📊 Das Diagramm wird angezeigt...")
-    plt.show()
+    return categories_data
 
 # ------------------------------
 # Export-Funktionen (CSV & PDF)
 # ------------------------------
 
-def export_to_csv():
-    """Exportiert alle Transaktionen als CSV-Datei."""
+CSV_HEADER = ["ID", "Typ", "Betrag", "Kategorie", "Datum", "Exported"]
+
+def transaction_filters(start=None, end=None, transaction_type=None, category=None, only_unexported=False,
+                        min_amount=None, max_amount=None, exported=None, export_target=None, ledger=None):
+    """
+    Baut die WHERE-Klausel für gefilterte Transaktions-Abfragen eines Kontos
+    (`ledger`, Standard: aktuelles Konto; die Bedingung steht immer zuerst).
+    `start`/`end` bilden einen halboffenen Datumsbereich [start, end)
+    im Format "YYYY-MM-DD", `min_amount`/`max_amount` einen geschlossenen
+    Betragsbereich in Rappen. `exported` filtert auf True/False bezüglich
+    des Exportziels `export_target` (Standard "pdf"); only_unexported
+    entspricht exported=False. Gibt (where_sql, params) zurück.
+    """
+    if only_unexported:
+        exported = False
+    clauses = ["ledger_id = ?"]
+    params = [resolve_ledger(ledger)]
+    if transaction_type is not None:
+        clauses.append("type = ?")
+        params.append(transaction_type)
+    if exported is not None:
+        # Exportiert ist, was unter dem Wasserzeichen seines Monats liegt
+        clauses.append(f"id {'<=' if exported else '>'} {EXPORT_WATERMARK_SQL}")
+        params.append(export_target or DEFAULT_EXPORT_TARGET)
+    if start is not None:
+        clauses.append("date >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("date < ?")
+        params.append(end)
+    if category is not None:
+        clauses.append("category_id = (SELECT id FROM categories WHERE key = ?)")
+        params.append(normalize_category(category))
+    if min_amount is not None:
+        clauses.append("amount >= ?")
+        params.append(min_amount)
+    if max_amount is not None:
+        clauses.append("amount <= ?")
+        params.append(max_amount)
+    return f" WHERE {' AND '.join(clauses)}", params
+
+@contextmanager
+def _open_csv_target(target):
+    """Öffnet das Exportziel: Pfad, "-" für stdout, *.gz als gzip oder ein Datei-Objekt."""
+    if hasattr(target, "write"):
+        yield target
+    elif target == "-":
+        yield sys.stdout
+    elif str(target).endswith(".gz"):
+        with gzip.open(target, mode="wt", newline="", encoding="utf-8") as file:
+            yield file
+    else:
+        with open(target, mode="w", newline="", encoding="utf-8") as file:
+            yield file
+
+def default_csv_filename():
+    """Standard-Dateiname für CSV-Exporte: finanz_tracker_<YYYY-MM-DD>.csv."""
     today = datetime.datetime.now().strftime("%Y-%m-%d")
-    filename = f"finanz_tracker_{today}.csv"
-    conn = sqlite3.connect("finanz_tracker.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM transactions")
-    rows = cursor.fetchall()
-    conn.close()
-    with open(filename, mode="w", newline="", encoding="utf-8") as file:
+    return f"finanz_tracker_{today}.csv"
+
+@timed
+def export_to_csv(filename=None, start=None, end=None, transaction_type=None, category=None,
+                  only_unexported=False, chunk_size=5000, conn=None, progress=None,
+                  export_target="csv", record_batch=False, ledger=None):
+    """
+    Exportiert Transaktionen als CSV-Datei.
+    Die Zeilen werden blockweise (fetchmany) aus dem Cursor gelesen und
+    direkt geschrieben, der Speicherbedarf bleibt unabhängig von der Tabellengrösse.
+    Ohne `conn` wird über eine eigene schreibgeschützte Verbindung gelesen.
+    `filename` kann ein Pfad, "-" (stdout), ein Pfad auf ".gz" (gzip) oder
+    ein Datei-Objekt sein; ohne Angabe wird finanz_tracker_<datum>.csv verwendet.
+    `progress(anzahl)` wird (falls angegeben) nach jedem Block mit der Zahl
+    der bisher geschriebenen Zeilen aufgerufen; eine Ausnahme darin bricht
+    den Export ab. `only_unexported` und die Spalte 'Exported' beziehen sich
+    auf `export_target`; mit record_batch=True wird der Export danach im
+    Export-Journal festgehalten (nur mit only_unexported, ohne Typ-/
+    Kategorie-Filter und für ganze Monate). Exportiert wird das Konto
+    `ledger` (Standard: aktuelles Konto). Gibt die Anzahl der exportierten Zeilen zurück.
+    """
+    if filename is None:
+        filename = default_csv_filename()
+    if record_batch and (transaction_type is not None or category is not None or not only_unexported):
+        raise ValueError("Nur ungefilterte Exporte neuer Transaktionen können im Export-Journal festgehalten werden")
+    if record_batch:
+        _check_month_aligned(start, end)
+    ledger_id = resolve_ledger(ledger)
+    where, params = transaction_filters(start, end, transaction_type, category, only_unexported,
+                                        export_target=export_target, ledger=ledger_id)
+    count = 0
+    first_id = last_id = None
+    with report_connection(conn) as read_conn, _open_csv_target(filename) as file:
+        cursor = read_conn.execute(
+            f"SELECT id, type, {RAPPEN_TO_STR_SQL}, {CATEGORY_NAME_SQL}, date, id <= {EXPORT_WATERMARK_SQL} "
+            f"FROM transactions{where} ORDER BY id", [export_target] + params)
         writer = csv.writer(file)
-        writer.writerow(["ID", "Typ", "Betrag", "Kategorie", "Datum", "Exported"])
-        writer.writerows(rows)
-    print(f"✅ Daten erfolgreich als CSV gespeichert: {filename}")
-
-# Schweizer Zahlenformat setzen
-locale.setlocale(locale.LC_NUMERIC, "de_CH.UTF-8")
-
-def format_chf(amount):
-    """Formatiert den Betrag als CHF mit Schweizer Trennzeichen (1'500.00)."""
-    return f"CHF {locale.format_string('%.2f', amount, grouping=True)}"
-
-def format_date_str(date_str):
-    """Parst das Datenbank-Datum und formatiert es als dd.mm.yyyy."""
-    dt = datetime.datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S")
-    return dt.strftime("%d.%m.%Y")
-
-def export_to_pdf():
-    """
-    Exportiert die Transaktionen als PDF.
-    Dabei werden nur Transaktionen mit exported = 0 berücksichtigt.
-    Nach erfolgreichem Export werden diese Einträge als exportiert markiert.
-    """
-    print("\n📄 PDF-Export-Optionen:")
-    print("1️⃣ Alle Transaktionen exportieren (nur noch nicht exportierte)")
-    print("2️⃣ Nur einen bestimmten Monat exportieren (nicht exportierte)")
-    choice = input("Wähle eine Option (1 oder 2): ").strip()
-    
-    conn = sqlite3.connect("finanz_tracker.db")
-    cursor = conn.cursor()
+        writer.writerow(CSV_HEADER)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            writer.writerows(rows)
+            count += len(rows)
+            if first_id is None:
+                first_id = rows[0][0]
+            last_id = rows[-1][0]
+            if progress is not None:
+                progress(count)
+    if record_batch and count:
+        record_export_batch(export_target, start, end, first_id, last_id, count,
+                            filename if isinstance(filename, str) and filename != "-" else None, conn, ledger_id)
+    return count
+
+# ------------------------------
+# CSV-Import (Export-Format & Bank-Auszüge)
+# ------------------------------
+
+# Mögliche Spaltennamen (klein geschrieben) je Feld
+CSV_COLUMN_ALIASES = {
+    "type": ("typ", "type", "art"),
+    "amount": ("betrag", "amount", "betrag chf", "betrag (chf)"),
+    "credit": ("gutschrift", "credit", "eingang"),
+    "debit": ("belastung", "debit", "ausgang"),
+    "category": ("kategorie", "category", "beschreibung", "buchungstext", "text"),
+    "date": ("datum", "date", "buchungsdatum", "valuta"),
+}
+
+CSV_TYPE_ALIASES = {
+    "einnahme": "Einnahme", "einnahmen": "Einnahme", "income": "Einnahme", "gutschrift": "Einnahme",
+    "ausgabe": "Ausgabe", "ausgaben": "Ausgabe", "expense": "Ausgabe", "belastung": "Ausgabe",
+}
+
+_ISO_DATETIME = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$")
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+_CH_DATE = re.compile(r"^(\d{1,2})\.(\d{1,2})\.(\d{4})(?: (\d{2}):(\d{2})(?::(\d{2}))?)?$")
 
+def parse_csv_amount(value):
+    """Wandelt einen Betrag wie "1'500.00", "1500,50" oder "-80" in Rappen um (siehe parse_chf)."""
+    return parse_chf(value)
+
+def parse_csv_date(value):
+    """Normalisiert ein Datum auf das Datenbank-Format "YYYY-MM-DD HH:MM:SS"."""
+    value = value.strip()
+    if _ISO_DATE.match(value):
+        value = f"{value} 00:00:00"
+    elif not _ISO_DATETIME.match(value):
+        match = _CH_DATE.match(value)
+        if not match:
+            raise ValueError
+        day, month, year, hour, minute, second = match.groups()
+        value = f"{year}-{int(month):02d}-{int(day):02d} {hour or '00'}:{minute or '00'}:{second or '00'}"
+    # Kalender-Prüfung für alle Formate: "2025-02-30" oder "25:00" werfen ValueError
+    datetime.datetime.fromisoformat(value)
+    return value
+
+def _map_csv_header(header):
+    """Ordnet den Feldern die Spaltenindizes der Kopfzeile zu."""
+    names = [h.strip().lower() for h in header]
+    columns = {}
+    for field, aliases in CSV_COLUMN_ALIASES.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    if "category" not in columns:
+        raise ValueError("Spalte 'Kategorie' fehlt in der CSV-Datei")
+    if "amount" not in columns and not ("credit" in columns or "debit" in columns):
+        raise ValueError("Spalte 'Betrag' fehlt in der CSV-Datei")
+    return columns
+
+def read_csv_transactions(file, delimiter=None, errors=None):
+    """
+    Liest Transaktionen zeilenweise aus einer geöffneten CSV-Datei (Generator).
+    Liefert normalisierte Tupel (typ, betrag, kategorie, datum).
+    Ungültige Zeilen werden übersprungen und als (zeilennummer, grund) in
+    `errors` gesammelt, falls eine Liste übergeben wird.
+    Mit der Spalte 'Typ' muss der Betrag positiv sein (wie bei
+    validate_transaction); fehlt sie, entscheidet das Vorzeichen über den
+    Typ (Bank-Auszüge). Beträge von 0 sind immer ungültig.
+    """
+    if delimiter is None:
+        first_line = file.readline()
+        file.seek(0)
+        delimiter = ";" if first_line.count(";") > first_line.count(",") else ","
+    reader = csv.reader(file, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return
+    columns = _map_csv_header(header)
+    type_col = columns.get("type")
+    amount_col = columns.get("amount")
+    credit_col = columns.get("credit")
+    debit_col = columns.get("debit")
+    category_col = columns["category"]
+    date_col = columns.get("date")
+    now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    for line_no, row in enumerate(reader, start=2):
+        if not row:
+            continue
+        try:
+            if amount_col is not None:
+                amount = parse_csv_amount(row[amount_col])
+            elif credit_col is not None and row[credit_col].strip():
+                amount = abs(parse_csv_amount(row[credit_col]))
+            else:
+                amount = -abs(parse_csv_amount(row[debit_col]))
+        except (ValueError, IndexError, TypeError):
+            if errors is not None:
+                errors.append((line_no, "Ungültiger Betrag"))
+            continue
+        if type_col is not None:
+            ttype = CSV_TYPE_ALIASES.get(row[type_col].strip().lower()) if type_col < len(row) else None
+            if ttype is None:
+                if errors is not None:
+                    errors.append((line_no, "Ungültiger Typ"))
+                continue
+        else:
+            ttype = "Ausgabe" if amount < 0 else "Einnahme"
+            amount = abs(amount)
+        if amount <= 0:
+            if errors is not None:
+                errors.append((line_no, "Ungültiger Betrag (muss grösser als 0 sein)"))
+            continue
+        category = row[category_col].strip() if category_col < len(row) else ""
+        if not category:
+            if errors is not None:
+                errors.append((line_no, "Kategorie fehlt"))
+            continue
+        if date_col is not None and date_col < len(row) and row[date_col].strip():
+            try:
+                date = parse_csv_date(row[date_col])
+            except ValueError:
+                if errors is not None:
+                    errors.append((line_no, "Ungültiges Datum"))
+                continue
+        else:
+            date = now
+        yield ttype, amount, category, date
+
+@timed
+def import_from_csv(filename, chunk_size=10000, delimiter=None, ledger=None):
+    """
+    Importiert Transaktionen aus einer CSV-Datei (z. B. aus export_to_csv oder
+    einem Bank-Auszug). Die Datei wird gestreamt und in Blöcken von
+    `chunk_size` Zeilen committet, der Speicherbedarf bleibt dadurch konstant.
+    Importiert wird ins Konto `ledger` (Standard: aktuelles Konto).
+    Die IDs der Datei werden ignoriert, neue IDs vergibt die Datenbank;
+    importierte Zeilen gelten für alle Exportziele als noch nicht exportiert.
+    Gibt (anzahl_importiert, fehler) zurück, fehler ist eine Liste von
+    (zeilennummer, grund).
+    """
+    errors = []
+    imported = 0
+    ledger_id = resolve_ledger(ledger)
+    ids = {}   # Kategorie → ID über alle Blöcke (Kategorien werden nie gelöscht, ausser beim Reset)
+    opener = gzip.open if str(filename).endswith(".gz") else open
+    with opener(filename, mode="rt", newline="", encoding="utf-8-sig") as file:
+        rows = read_csv_transactions(file, delimiter=delimiter, errors=errors)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            with write_transaction() as conn:
+                last_id = _last_transaction_id(conn)
+                conn.executemany(
+                    "INSERT INTO transactions (ledger_id, type, amount, category_id, date) VALUES (?, ?, ?, ?, ?)",
+                    [(ledger_id, ttype, amount, _category_id(conn, category, ids), date)
+                     for ttype, amount, category, date in chunk])
+                _summarize_new_transactions(conn, last_id)
+            imported += len(chunk)
+    return imported, errors
+
+# Monatsfilter als halboffener Datumsbereich (indexfähig)
+MONTH_FILTER_SQL = (f"SELECT id, type, amount, {CATEGORY_NAME_SQL}, date FROM transactions"
+                    " WHERE ledger_id = ? AND date >= ? AND date < ?")
+
+def iter_rows(cursor, chunk_size=1000):
+    """Liefert die Zeilen eines Cursors blockweise (fetchmany) als Generator."""
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+def pdf_export_query(start=None, end=None, target=DEFAULT_EXPORT_TARGET, conn=None, ledger=None):
+    """
+    Gibt (sql, params) für die noch nicht exportierten Transaktionen eines
+    Kontos zurück: eine einzige Abfrage, geordnet nach Typ (Einnahmen vor
+    Ausgaben), Datum und ID.
+    """
+    ledger = resolve_ledger(ledger)
+    where, params = transaction_filters(start, end, only_unexported=True, export_target=target, ledger=ledger)
+    # Unter dem tiefsten Wasserzeichen des Zeitraums ist alles exportiert:
+    # dann liest SQLite nur die neueren Zeilen (Zeilen-ID-Bereich) und sortiert
+    # diese, sonst liefert der Index (type DESC, date) die Reihenfolge direkt
+    low_watermark = lowest_export_watermark(target, start, end, conn, ledger)
+    if low_watermark:
+        where += " AND id > ?"
+        params.append(low_watermark)
+    sql = f"""
+        SELECT id, type, amount, {CATEGORY_NAME_SQL}, date FROM transactions
+        {where} AND type IN ('Einnahme', 'Ausgabe')
+        ORDER BY type DESC, date, id
+    """
+    return sql, params
+
+@timed
+def write_pdf_report(filename, start=None, end=None, conn=None, charts=(), ledger=None):
+    """
+    Schreibt den PDF-Bericht der noch nicht exportierten Transaktionen des
+    Kontos `ledger` (Standard: aktuelles Konto, optional im Datumsbereich [start, end)). Die Zeilen werden direkt aus
+    dem Cursor gestreamt, ohne `conn` über eine eigene schreibgeschützte
+    Verbindung (report_connection). `charts` sind Diagramm-Namen aus
+    charts.CHARTS, die für denselben Zeitraum angehängt werden (dann nur
+    ganze Monate). Gibt den PdfReport zurück oder None, falls keine
+    passenden Transaktionen vorhanden sind.
+    """
+    from pdf_report import PdfReport
+
+    ledger = resolve_ledger(ledger)
+    with report_connection(conn) as conn:
+        sql, params = pdf_export_query(start, end, conn=conn, ledger=ledger)
+        cursor = conn.execute(sql, params)
+        first = cursor.fetchone()
+        if first is None:
+            return None
+        images = []
+        if charts:
+            from charts import render_chart
+
+            images = [image for image in (render_chart(name, start=start, end=end, conn=conn, ledger=ledger)
+                                          for name in charts)
+                      if image is not None]
+        return PdfReport(filename).render(chain([first], iter_rows(cursor)), images)
+
+@timed
+def export_to_pdf(filename=None, year=None, month=None, ledger=None):
+    """
+    Exportiert die Transaktionen des Kontos `ledger` (Standard: aktuelles
+    Konto) als PDF – alle oder nur die des Monats year/month. Dabei werden nur noch nicht exportierte Transaktionen
+    berücksichtigt; nach erfolgreichem Export wird der Batch im
+    Export-Journal festgehalten.
+    Gibt den PdfReport zurück oder None, falls nichts zu exportieren war.
+    Wirft ValueError bei ungültigem Jahr/Monat.
+    """
     # Zeitstempel zur eindeutigen Dateinamenbildung (Datum und Uhrzeit)
     timestamp = datetime.datetime.now().strftime("%d.%m.%Y_%H-%M-%S")
-    
-    if choice == "1":
-        filename = f"finanz_tracker_{timestamp}.pdf"
-        cursor.execute("SELECT * FROM transactions WHERE type = 'Einnahme' AND exported = 0")
-        einnahmen = cursor.fetchall()
-        cursor.execute("SELECT * FROM transactions WHERE type = 'Ausgabe' AND exported = 0")
-        ausgaben = cursor.fetchall()
-    elif choice == "2":
-        year = input("Gib das Jahr ein (z. B. 2025): ").strip()
-        month = input("Gib den Monat ein (1-12): ").strip().zfill(2)
-        filename = f"finanz_tracker_{month}.{year}_{timestamp}.pdf"
-        cursor.execute("""
-            SELECT * FROM transactions 
-            WHERE type = 'Einnahme' AND exported = 0
-              AND strftime('%Y', date) = ? 
-              AND strftime('%m', date) = ?
-        """, (year, month))
-        einnahmen = cursor.fetchall()
-        cursor.execute("""
-            SELECT * FROM transactions 
-            WHERE type = 'Ausgabe' AND exported = 0
-              AND strftime('%Y', date) = ? 
-              AND strftime('%m', date) = ?
-        """, (year, month))
-        ausgaben = cursor.fetchall()
+
+    if year is None and month is None:
+        start, end = None, None
+        default_filename = f"finanz_tracker_{timestamp}.pdf"
     else:
-        print("❌ Ungültige Eingabe. Abbruch.")
-        conn.close()
-        return
+        start, end = month_range(year, month)
+        default_filename = f"finanz_tracker_{int(month):02d}.{year}_{timestamp}.pdf"
 
-    total_income = sum(row[2] for row in einnahmen) if einnahmen else 0
-    total_expenses = sum(row[2] for row in ausgaben) if ausgaben else 0
-    balance = total_income - total_expenses
+    filename = filename or default_filename
+    ledger = resolve_ledger(ledger)
+    report = write_pdf_report(filename, start, end, ledger=ledger)
+    if report is not None:
+        record_export_batch(DEFAULT_EXPORT_TARGET, start, end, report.min_id, report.max_id, report.rows, filename,
+                            ledger=ledger)
+    return report
 
-    if not einnahmen and not ausgaben:
-        print("❌ Keine passenden Transaktionen gefunden.")
-        conn.close()
-        return
+# ------------------------------
+# Export-Journal (export_batches) & Wasserzeichen
+# ------------------------------
+ExportBatch = namedtuple("ExportBatch", ["id", "target", "created", "start", "end",
+                                         "first_id", "last_id", "row_count", "filename", "ledger"])
 
-    c = canvas.Canvas(filename, pagesize=letter)
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(200, 750, "📊 Finanz-Tracker - Transaktionen")
-    y = 720
-
-    def draw_table_header(y_position, title, color):
-        c.setFont("Helvetica-Bold", 10)
-        c.setFillColor(color)
-        c.drawString(40, y_position, f"■ {title}")
-        c.setFillColor("black")
-        y_position -= 15
-        c.setFont("Helvetica-Bold", 9)
-        c.drawString(40, y_position, "ID")
-        c.drawString(80, y_position, "Typ")
-        c.drawString(160, y_position, "Kategorie")
-        c.drawString(300, y_position, "Betrag")
-        c.drawString(420, y_position, "Datum")
-        y_position -= 15
-        c.setFont("Helvetica", 9)
-        return y_position
-
-    if einnahmen:
-        y = draw_table_header(y, "Einnahmen", green)
-        for row in einnahmen:
-            c.drawString(40, y, str(row[0]))
-            c.drawString(80, y, row[1])
-            c.drawString(160, y, row[3])
-            c.drawString(300, y, "CHF")
-            c.drawRightString(380, y, locale.format_string('%.2f', row[2], grouping=True))
-            c.drawString(420, y, format_date_str(row[4]))
-            y -= 20
-
-    if ausgaben:
-        y -= 15
-        y = draw_table_header(y, "Ausgaben", red)
-        for row in ausgaben:
-            c.drawString(40, y, str(row[0]))
-            c.drawString(80, y, row[1])
-            c.drawString(160, y, row[3])
-            c.drawString(300, y, "CHF")
-            c.drawRightString(380, y, locale.format_string('%.2f', row[2], grouping=True))
-            c.drawString(420, y, format_date_str(row[4]))
-            y -= 20
-
-    y -= 20
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(40, y, "■ Gesamteinnahmen:")
-    c.drawString(300, y, "CHF")
-    c.drawRightString(380, y, locale.format_string('%.2f', total_income, grouping=True))
-    y -= 15
-    c.drawString(40, y, "■ Gesamtausgaben:")
-    c.drawString(300, y, "CHF")
-    c.drawRightString(380, y, locale.format_string('%.2f', total_expenses, grouping=True))
-    y -= 15
-    c.setFillColor(green)
-    c.drawString(40, y, "■ Verbleibendes Guthaben:")
-    c.drawString(300, y, "CHF")
-    c.drawRightString(380, y, locale.format_string('%.2f', balance, grouping=True))
-    c.setFillColor("black")
-    c.save()
-
-    print(f"✅ PDF gespeichert: {filename}")
-
-    if choice == "1":
-        cursor.execute("UPDATE transactions SET exported = 1 WHERE type IN ('Einnahme', 'Ausgabe') AND exported = 0")
-    elif choice == "2":
-        cursor.execute("""
-            UPDATE transactions 
-            SET exported = 1 
-            WHERE type IN ('Einnahme', 'Ausgabe') 
-              AND exported = 0 
-              AND strftime('%Y', date) = ? 
-              AND strftime('%m', date) = ?
-        """, (year, month))
-    conn.commit()
-    conn.close()
+_MONTH_START = re.compile(r"^\d{4}-\d{2}-01$")
+
+def _check_month_aligned(start, end):
+    for value in (start, end):
+        if value is not None and not _MONTH_START.match(value):
+            raise ValueError("Exporte im Journal müssen ganze Monate umfassen (YYYY-MM-01)")
+
+def lowest_export_watermark(target=DEFAULT_EXPORT_TARGET, start=None, end=None, conn=None, ledger=None):
+    """Gibt das tiefste Wasserzeichen aller Monate eines Kontos mit Transaktionen im Bereich [start, end) zurück."""
+    ledger_id = resolve_ledger(ledger)
+    conn = conn or get_connection()
+    row = conn.execute(f"""
+        SELECT MIN(COALESCE(w.last_id, 0))
+        FROM ({_SUMMARY_MONTHS_SQL}) m
+        LEFT JOIN export_watermarks w ON w.ledger_id = ? AND w.target = ? AND w.month = m.month
+    """, (ledger_id, start, start, end, end, ledger_id, target)).fetchone()
+    return row[0] or 0
+
+def _record_export_batch(conn, ledger_id, target, start, end, first_id, last_id, row_count, filename):
+    _check_month_aligned(start, end)
+    cursor = conn.execute("""
+        INSERT INTO export_batches (ledger_id, target, start_date, end_date, first_id, last_id, row_count, filename)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """, (ledger_id, target, start, end, first_id, last_id, row_count, filename))
+    conn.execute(f"""
+        INSERT INTO export_watermarks (ledger_id, target, month, last_id)
+        SELECT ?, ?, month, ? FROM ({_SUMMARY_MONTHS_SQL}) WHERE true
+        ON CONFLICT (ledger_id, target, month) DO UPDATE SET last_id = max(last_id, excluded.last_id)
+    """, (ledger_id, target, last_id, ledger_id, start, start, end, end))
+    return cursor.lastrowid
+
+@timed
+def record_export_batches(batches, conn=None, ledger=None):
+    """
+    Hält mehrere Exporte des Kontos `ledger` (Standard: aktuelles Konto) in
+    einer einzigen Datenbank-Transaktion fest (alles oder nichts). Jeder
+    Eintrag ist ein Tupel (ziel, start, end, erste_id, letzte_id, anzahl,
+    dateiname); start/end sind None oder Monatsanfänge.
+    Gibt die IDs der neuen Batches zurück.
+    """
+    ledger_id = resolve_ledger(ledger)
+    with write_transaction(conn) as conn:
+        return [_record_export_batch(conn, ledger_id, *batch) for batch in batches]
+
+def record_export_batch(target, start, end, first_id, last_id, row_count, filename=None, conn=None, ledger=None):
+    """Hält einen Export im Journal fest und hebt die Wasserzeichen an. Gibt die Batch-ID zurück."""
+    return record_export_batches([(target, start, end, first_id, last_id, row_count, filename)], conn, ledger)[0]
+
+def get_export_batches(target=None, limit=20, ledger=None):
+    """Gibt die letzten Export-Batches eines Kontos (neueste zuerst) als ExportBatch-Tupel zurück."""
+    where, params = " WHERE ledger_id = ?", [resolve_ledger(ledger)]
+    if target is not None:
+        where, params = where + " AND target = ?", params + [target]
+    conn = get_connection()
+    rows = conn.execute(f"""
+        SELECT id, target, created, start_date, end_date, first_id, last_id, row_count, filename, ledger_id
+        FROM export_batches{where} ORDER BY id DESC LIMIT ?
+    """, params + [limit])
+    return [ExportBatch._make(row) for row in rows]
+
+def export_batch_query(batch_id, conn=None):
+    """
+    Gibt (batch, sql, params) für die Transaktionen eines früheren Batches
+    zurück: der ID-Bereich des Batches innerhalb seines Datumsbereichs, ohne
+    die Zeilen, die schon ein früherer Batch desselben Ziels enthielt.
+    Das Ergebnis ist eindeutig, da neue Transaktionen immer grössere IDs erhalten.
+    """
+    conn = conn or get_connection()
+    row = conn.execute("""
+        SELECT id, target, created, start_date, end_date, first_id, last_id, row_count, filename, ledger_id
+        FROM export_batches WHERE id = ?
+    """, (batch_id,)).fetchone()
+    if row is None:
+        raise ValueError(f"Unbekannter Export-Batch {batch_id}")
+    batch = ExportBatch._make(row)
+    # Reihenfolge wie beim ursprünglichen Export (PDF nach Typ und Datum, CSV nach ID)
+    order = "type DESC, date, id" if batch.target == "pdf" else "id"
+    where, params = transaction_filters(batch.start, batch.end, ledger=batch.ledger)
+    sql = f"""
+        SELECT id, type, amount, {CATEGORY_NAME_SQL}, date FROM transactions
+        {where} AND id BETWEEN ? AND ?
+          AND id > COALESCE((SELECT MAX(b.last_id) FROM export_batches b
+                             WHERE b.ledger_id = transactions.ledger_id AND b.target = ? AND b.id < ?
+                               AND (b.start_date IS NULL OR transactions.date >= b.start_date)
+                               AND (b.end_date IS NULL OR transactions.date < b.end_date)), 0)
+        ORDER BY {order}
+    """
+    return batch, sql, params + [batch.first_id, batch.last_id, batch.target, batch.id]
+
+@timed
+def reexport_batch(batch_id, filename):
+    """
+    Erzeugt die Datei eines früheren Batches erneut (PDF für Ziel "pdf",
+    sonst CSV), ohne das Journal zu verändern. Gibt die Anzahl Zeilen zurück.
+    """
+    with report_connection() as conn:
+        batch, sql, params = export_batch_query(batch_id, conn)
+        if batch.target == "pdf":
+            from pdf_report import PdfReport
+
+            return PdfReport(filename).render(iter_rows(conn.execute(sql, params))).rows
+        count = 0
+        with _open_csv_target(filename) as file:
+            writer = csv.writer(file)
+            writer.writerow(CSV_HEADER)
+            for rid, ttype, amount, category, date in iter_rows(conn.execute(sql, params)):
+                writer.writerow((rid, ttype, rappen_to_str(amount), category, date, 1))
+                count += 1
+        return count
 
 # ------------------------------
-# Filter- und Reset-Funktionen
+# Daueraufträge (recurring_rules)
 # ------------------------------
+# Eine Regel bucht denselben Betrag in einem festen Rhythmus ab 'start_date'.
+# 'occurrences' zählt die schon gebuchten Vorkommen, 'next_due' ist das Datum
+# des nächsten (NULL, wenn 'end_date' erreicht ist). Das n-te Vorkommen wird
+# immer vom Startdatum aus berechnet: eine Regel am 31. bucht im Februar am
+# 28./29. und im März wieder am 31. Jede Regel bucht in ihr Konto.
+RECURRING_RULES_TABLE = """
+    CREATE TABLE IF NOT EXISTS recurring_rules (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ledger_id INTEGER NOT NULL DEFAULT 1 REFERENCES ledgers (id),
+        type TEXT NOT NULL,
+        amount INTEGER NOT NULL,
+        category_id INTEGER NOT NULL REFERENCES categories (id),
+        cadence TEXT NOT NULL,
+        start_date TEXT NOT NULL,
+        end_date TEXT,
+        occurrences INTEGER NOT NULL DEFAULT 0,
+        next_due TEXT
+    )
+"""
 
-def filter_transactions_by_month(year, month):
-    """Filtert und zeigt Transaktionen für einen bestimmten Monat in der Konsole an."""
-    conn = sqlite3.connect("finanz_tracker.db")
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM transactions WHERE strftime('%Y', date) = ? AND strftime('%m', date) = ?",
-                   (str(year), f"{int(month):02d}"))
-    rows = cursor.fetchall()
-    conn.close()
-    if not rows:
-        print(f"❌ Keine Transaktionen für {month}/{year} gefunden.")
-        return
-    print(f"\n📅 Transaktionen für {month}/{year}:")
-    for row in rows:
-        print(f"ID: {row[0]}, Typ: {row[1]}, Betrag: {row[2]:.2f} CHF, Kategorie: {row[3]}, Datum: {row[4]}")
+# Rhythmus → (Tage, Monate) pro Schritt
+RECURRING_CADENCES = {
+    "wöchentlich": (7, 0),
+    "zweiwöchentlich": (14, 0),
+    "monatlich": (0, 1),
+    "quartalsweise": (0, 3),
+    "halbjährlich": (0, 6),
+    "jährlich": (0, 12),
+}
 
-def reset_transactions():
-    """Löscht alle Transaktionen und setzt den ID-Zähler zurück."""
-    conn = sqlite3.connect("finanz_tracker.db")
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM transactions")
-    cursor.execute("DELETE FROM sqlite_sequence WHERE name='transactions'")
-    conn.commit()
-    conn.close()
-    print("✅ Alle gespeicherten Transaktionen wurden gelöscht und ID zurückgesetzt!")
\ No newline at end of file
+RecurringRule = namedtuple("RecurringRule", ["id", "type", "amount", "category", "cadence",
+                                             "start", "end", "occurrences", "next_due"])
+
+def parse_day(value):
+    """Wandelt ein Datum (date, "YYYY-MM-DD" oder "dd.mm.yyyy") in datetime.date um (ValueError bei Fehlern)."""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    try:
+        return datetime.date.fromisoformat(parse_csv_date(str(value))[:10])
+    except ValueError:
+        raise ValueError(f"Ungültiges Datum '{value}' (erwartet YYYY-MM-DD oder dd.mm.yyyy)") from None
+
+def recurring_occurrence(start, cadence, n):
+    """Datum des n-ten Vorkommens (ab 0) einer Regel mit Startdatum `start` und Rhythmus `cadence`."""
+    days, months = RECURRING_CADENCES[cadence]
+    if days:
+        return start + datetime.timedelta(days=days * n)
+    month = start.month - 1 + months * n
+    year, month = start.year + month // 12, month % 12 + 1
+    return datetime.date(year, month, min(start.day, calendar.monthrange(year, month)[1]))
+
+@timed
+def add_recurring_rule(transaction_type, amount, category, cadence, start=None, end=None, ledger=None):
+    """
+    Legt einen Dauerauftrag im Konto `ledger` (Standard: aktuelles Konto) an (Betrag in Rappen). `start` ist das erste
+    Fälligkeitsdatum (Standard: heute), `end` (optional) das letzte mögliche.
+    Gibt die ID der Regel zurück oder wirft ValueError mit dem Grund.
+    """
+    transaction_type, amount, category = validate_transaction(transaction_type, amount, category)
+    if cadence not in RECURRING_CADENCES:
+        raise ValueError(f"Ungültiger Rhythmus '{cadence}' (erlaubt: {', '.join(RECURRING_CADENCES)})")
+    start = parse_day(start) if start else datetime.date.today()
+    end = parse_day(end) if end else None
+    if end is not None and end < start:
+        raise ValueError("Das Enddatum liegt vor dem Startdatum")
+    ledger_id = resolve_ledger(ledger)
+    with write_transaction() as conn:
+        cursor = conn.execute("""
+            INSERT INTO recurring_rules (ledger_id, type, amount, category_id, cadence, start_date, end_date, next_due)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (ledger_id, transaction_type, amount, _category_id(conn, category), cadence, start.isoformat(),
+              end and end.isoformat(), start.isoformat()))
+    return cursor.lastrowid
+
+def get_recurring_rules(conn=None, ledger=None):
+    """Gibt die Daueraufträge eines Kontos als RecurringRule-Tupel zurück (nächste Fälligkeit zuerst, beendete zuletzt)."""
+    ledger_id = resolve_ledger(ledger)
+    conn = conn or get_connection()
+    rows = conn.execute("""
+        SELECT id, type, amount, (SELECT name FROM categories WHERE categories.id = category_id),
+               cadence, start_date, end_date, occurrences, next_due
+        FROM recurring_rules WHERE ledger_id = ? ORDER BY next_due IS NULL, next_due, id
+    """, (ledger_id,))
+    return [RecurringRule._make(row) for row in rows]
+
+def delete_recurring_rule(rule_id, ledger=None):
+    """
+    Löscht einen Dauerauftrag des Kontos (schon gebuchte Transaktionen
+    bleiben). Gibt True zurück, falls es ihn in diesem Konto gab.
+    """
+    ledger_id = resolve_ledger(ledger)
+    with write_transaction() as conn:
+        return conn.execute("DELETE FROM recurring_rules WHERE id = ? AND ledger_id = ?",
+                            (rule_id, ledger_id)).rowcount > 0
+
+@timed
+def materialize_recurring(today=None, conn=None):
+    """
+    Bucht alle fälligen Vorkommen aller Daueraufträge (aller Konten) bis und
+    mit `today` (Standard: heute), auch nach Monaten ohne Lauf. Alles geschieht in einer
+    einzigen Schreib-Transaktion: die Regeln werden einmal gelesen, die
+    Vorkommen in Python berechnet, mit einem executemany gebucht und
+    'next_due' in derselben Transaktion nachgeführt. Ein zweiter Lauf (auch
+    parallel aus einem anderen Prozess) findet deshalb nichts mehr – die
+    Funktion kann beliebig oft, z. B. per Cron, aufgerufen werden.
+    Gibt die Anzahl der gebuchten Transaktionen zurück.
+    """
+    today = parse_day(today) if today else datetime.date.today()
+    conn = conn or get_connection()
+    due_sql = "FROM recurring_rules WHERE next_due <= ?"
+    # Ohne fällige Regel keine Schreib-Transaktion (Datenversion und Caches bleiben gültig)
+    if conn.execute(f"SELECT 1 {due_sql} LIMIT 1", (today.isoformat(),)).fetchone() is None:
+        return 0
+    with write_transaction(conn) as conn:
+        rows = []
+        updates = []
+        rules = conn.execute(f"""
+            SELECT id, ledger_id, type, amount, category_id, cadence, start_date, end_date, occurrences {due_sql}
+        """, (today.isoformat(),)).fetchall()
+        for rule_id, ledger_id, ttype, amount, category, cadence, start, end, n in rules:
+            start = datetime.date.fromisoformat(start)
+            last = min(today, datetime.date.fromisoformat(end)) if end else today
+            day = recurring_occurrence(start, cadence, n)
+            while day <= last:
+                rows.append((f"{day.isoformat()} 00:00:00", rule_id, ledger_id, ttype, amount, category))
+                n += 1
+                day = recurring_occurrence(start, cadence, n)
+            next_due = day.isoformat() if end is None or day.isoformat() <= end else None
+            updates.append((n, next_due, rule_id))
+        # Chronologisch buchen, damit die IDs wie bei manuellen Einträgen dem Datum folgen
+        rows.sort()
+        last_id = _last_transaction_id(conn)
+        conn.executemany(
+            "INSERT INTO transactions (ledger_id, type, amount, category_id, date) VALUES (?, ?, ?, ?, ?)",
+            [(ledger_id, ttype, amount, category, date) for date, _, ledger_id, ttype, amount, category in rows])
+        conn.executemany("UPDATE recurring_rules SET occurrences = ?, next_due = ? WHERE id = ?", updates)
+        _summarize_new_transactions(conn, last_id)
+    return len(rows)
+
+# ------------------------------
+# Filter- und Reset-Funktionen
+# ------------------------------
+
+@timed
+def reset_transactions(ledger=None):
+    """
+    Löscht die Transaktionen des Kontos `ledger` (ID oder Name) samt
+    Monatszusammenfassung und Export-Journal; die Konten bleiben. Ohne
+    `ledger` werden die Transaktionen aller Konten gelöscht und der
+    ID-Zähler zurückgesetzt.
+    """
+    if ledger is None:
+        where, params = "", ()
+    else:
+        where, params = " WHERE ledger_id = ?", (resolve_ledger(ledger),)
+    with write_transaction() as conn:
+        conn.execute("DELETE FROM transactions" + where, params)
+        conn.execute("DELETE FROM monthly_summary" + where, params)
+        # Das Journal bezieht sich auf IDs, die nach dem Zurücksetzen neu vergeben werden
+        conn.execute("DELETE FROM export_batches" + where, params)
+        conn.execute("DELETE FROM export_watermarks" + where, params)
+        # Kategorien anderer Konten und der Daueraufträge bleiben bestehen
+        conn.execute("""
+            DELETE FROM categories
+            WHERE id NOT IN (SELECT category_id FROM transactions)
+              AND id NOT IN (SELECT category_id FROM recurring_rules)
+        """)
+        if ledger is None:
+            conn.execute("DELETE FROM sqlite_sequence WHERE name='transactions'")
+    invalidate_category_cache()
\ No newline at end of file
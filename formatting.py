@@ -0,0 +1,63 @@
+"""
+Schnelle Formatierung von Datum und CHF-Beträgen für Render-Schleifen
+(PDF-Berichte, GUI-Tabellen).
+
+- Beträge: Rappen als ganze Zahl → "1'500.00", ohne locale und ohne Umweg
+  über float; das Ergebnis hängt nicht von den Einstellungen des Systems ab.
+- Datum: Die Datenbank speichert "YYYY-MM-DD HH:MM:SS". Pro Tag wird das
+  Datum einmal geprüft und formatiert (Cache), die Uhrzeit wird nur
+  ausgeschnitten – in grossen Tabellen wiederholen sich die Tage ständig.
+- SQL: chf_sql()/date_sql() liefern dieselbe Formatierung als Ausdruck für
+  Abfragen, wenn die Zeilen fertig formatiert aus SQLite kommen sollen.
+"""
+import datetime
+from functools import lru_cache
+
+THOUSANDS_SEPARATOR = "'"
+
+# "00" bis "99" für die Rappen hinter dem Dezimalpunkt
+_CENTS = tuple(f"{cents:02d}" for cents in range(100))
+
+
+def format_amount(rappen):
+    """Formatiert einen Betrag in Rappen mit Schweizer Tausendertrennzeichen (1'500.00, ohne 'CHF')."""
+    if rappen < 0:
+        return "-" + format_amount(-rappen)
+    francs, cents = divmod(rappen, 100)
+    if francs < 1000:
+        return f"{francs}.{_CENTS[cents]}"
+    return f"{francs:,}.{_CENTS[cents]}".replace(",", THOUSANDS_SEPARATOR)
+
+
+def format_chf(rappen):
+    """Formatiert einen Betrag in Rappen als CHF mit Schweizer Trennzeichen (CHF 1'500.00)."""
+    return "CHF " + format_amount(rappen)
+
+
+@lru_cache(maxsize=8192)
+def _format_day(day):
+    # fromisoformat prüft das Datum (wirft ValueError wie bisher strptime)
+    return datetime.date.fromisoformat(day).strftime("%d.%m.%Y")
+
+
+def format_date(date_str):
+    """Formatiert das Datenbank-Datum ("YYYY-MM-DD HH:MM:SS") als dd.mm.yyyy."""
+    return _format_day(date_str[:10])
+
+
+def format_datetime(date_str):
+    """Formatiert das Datenbank-Datum als dd.mm.yyyy HH:MM."""
+    return f"{_format_day(date_str[:10])} {date_str[11:16]}"
+
+
+def chf_sql(column="amount"):
+    """SQL-Ausdruck, der eine Rappen-Spalte wie format_amount() formatiert."""
+    separator = THOUSANDS_SEPARATOR.replace("'", "''")
+    return (f"CASE WHEN {column} < 0 THEN '-' ELSE '' END"
+            f" || replace(printf('%,d', abs({column}) / 100), ',', '{separator}')"
+            f" || printf('.%02d', abs({column}) % 100)")
+
+
+def date_sql(column="date"):
+    """SQL-Ausdruck, der das Datenbank-Datum wie format_date() formatiert."""
+    return f"substr({column}, 9, 2) || '.' || substr({column}, 6, 2) || '.' || substr({column}, 1, 4)"
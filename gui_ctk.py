@@ -1,116 +1,404 @@
-import sqlite3
 import datetime
-import locale
 import os
+import queue
+import threading
+import time
+from collections import deque
 import customtkinter as ctk
 from tkinter import messagebox, ttk
 from PIL import Image, ImageTk
-from fpdf import FPDF
+import instrumentation
+from formatting import format_chf as chf_format, format_datetime as format_date
+from database import (
+    add_transaction,
+    default_csv_filename,
+    export_to_csv,
+    get_category_cache,
+    get_ledger,
+    get_ledger_totals,
+    get_ledgers,
+    get_transaction,
+    get_type_stats,
+    iter_transactions,
+    page_cursor,
+    parse_chf,
+    query_transactions,
+    reset_transactions,
+    set_ledger,
+    validate_transaction,
+)
 
 # ----------------------------
-# Datenbank-Funktionen
+# Datenbank-Funktionen (über database.py)
+# ----------------------------
+def delete_all_transactions(ledger):
+    # Über das Datenbank-Modul, damit die Monatszusammenfassung mitgeführt wird;
+    # gelöscht wird nur das gewählte Konto (None hiesse: alle Konten)
+    reset_transactions(get_ledger() if ledger is None else ledger)
+
 # ----------------------------
-def init_db():
-    if not os.path.exists("finanz_tracker.db"):
-        with sqlite3.connect("finanz_tracker.db") as conn:
-            conn.execute("""
-                CREATE TABLE transactions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    type TEXT NOT NULL,
-                    amount REAL NOT NULL,
-                    category TEXT NOT NULL,
-                    date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """
-            )
+# Hintergrund-Thread für Datenbank und Exporte
+# ----------------------------
+class JobCancelled(Exception):
+    """Wird im Worker ausgelöst, wenn ein Auftrag abgebrochen wurde."""
+
+class Job:
+    """Ein Auftrag an den BackgroundWorker; kann abgebrochen werden und Fortschritt melden."""
 
+    def __init__(self, worker, on_progress):
+        self._worker = worker
+        self._on_progress = on_progress
+        self._cancelled = threading.Event()
 
-def add_transaction(ttype, amount, category):
-    with sqlite3.connect("finanz_tracker.db") as conn:
-        conn.execute(
-            "INSERT INTO transactions (type, amount, category) VALUES (?, ?, ?)",
-            (ttype, amount, category)
-        )
+    def cancel(self):
+        self._cancelled.set()
 
+    def report(self, fraction):
+        """Meldet den Fortschritt (0..1); bricht ab, falls cancel() aufgerufen wurde."""
+        if self._cancelled.is_set():
+            raise JobCancelled()
+        if self._on_progress is not None:
+            self._worker._results.put((self._on_progress, fraction))
 
-def get_all_transactions():
-    with sqlite3.connect("finanz_tracker.db") as conn:
-        return conn.execute(
-            "SELECT id, type, amount, category, date FROM transactions ORDER BY id DESC"
-        ).fetchall()
+class BackgroundWorker:
+    """
+    Führt Datenbank-Abfragen, Einfügungen oder Exporte nacheinander in einem
+    eigenen Thread aus (eigene SQLite-Verbindung über den ConnectionManager).
+    Tkinter darf nur im Haupt-Thread angesprochen werden: Ergebnisse landen
+    in einer Queue, die per app.after() abgefragt wird; die Callbacks
+    laufen dort im Haupt-Thread. Bei eingeschalteten Messungen werden
+    Wartezeit und Laufzeit jedes Auftrags sowie die Callbacks erfasst.
+    """
+    POLL_MS = 30
 
+    def __init__(self, root, name="gui-worker"):
+        self._root = root
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        threading.Thread(target=self._run, name=name, daemon=True).start()
+        root.after(self.POLL_MS, self._poll)
 
-def delete_all_transactions():
-    with sqlite3.connect("finanz_tracker.db") as conn:
-        conn.execute("DELETE FROM transactions")
+    def submit(self, func, *args, on_done=None, on_error=None, on_progress=None, cancellable=False):
+        """
+        Reiht func(*args) ein und gibt den Job zurück. Mit cancellable=True
+        wird der Job als Argument job= übergeben (für Fortschritt und Abbruch).
+        """
+        job = Job(self, on_progress)
+        self._jobs.put((job, func, args, on_done, on_error or show_error, cancellable, time.perf_counter()))
+        return job
+
+    def _run(self):
+        while True:
+            job, func, args, on_done, on_error, cancellable, submitted = self._jobs.get()
+            started = time.perf_counter()
+            try:
+                result = func(*args, job=job) if cancellable else func(*args)
+            except Exception as e:
+                self._results.put((on_error, e))
+            else:
+                if on_done is not None:
+                    self._results.put((on_done, result))
+            if instrumentation.is_enabled():
+                instrumentation.observe("gui.queue_wait", started - submitted)
+                instrumentation.observe(f"gui.job.{getattr(func, '__name__', 'job')}", time.perf_counter() - started)
+
+    def _poll(self):
+        measure = instrumentation.is_enabled()
+        try:
+            while True:
+                callback, value = self._results.get_nowait()
+                started = time.perf_counter() if measure else 0
+                callback(value)
+                if measure:
+                    instrumentation.observe("gui.callback", time.perf_counter() - started)
+        except queue.Empty:
+            pass
+        self._root.after(self.POLL_MS, self._poll)
+
+def show_error(error):
+    messagebox.showerror("Fehler", str(error))
 
 # ----------------------------
-# Formatierungs-Hilfen
+# Tabellen mit seitenweisem Nachladen
 # ----------------------------
-locale.setlocale(locale.LC_NUMERIC, "de_CH.UTF-8")
+class TransactionTable:
+    """
+    Hält eine Treeview mit den Transaktionen eines Typs (neueste zuerst).
+    Die Treeview ist ein Fenster über die Daten: geladen wird seitenweise
+    per Keyset-Pagination (im Worker), sobald an ein Ende gescrollt wird,
+    und am anderen Ende werden Zeilen wieder entfernt, damit höchstens
+    MAX_ROWS Einträge existieren – auch nach 50'000 gescrollten Zeilen.
+    Neue Transaktionen werden oben eingefügt, ohne die Tabelle neu aufzubauen.
+    """
+    PAGE_SIZE = 200
+    MAX_ROWS = 5 * PAGE_SIZE
+
+    def __init__(self, tree, scrollbar, transaction_type):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.transaction_type = transaction_type
+        self.generation = 0   # erhöht bei reset(), verwirft veraltete Worker-Ergebnisse
+        self.rows = deque()   # Transaktionen in der Treeview, von oben nach unten
+        self.at_top = True    # oberste Zeile ist die neueste Transaktion
+        self.exhausted = False   # unterste Zeile ist die älteste Transaktion
+        self._top = 0      # Index der obersten Zeile (für die Zeilenfarbe)
+        self._bottom = 0   # Index nach der untersten Zeile
+        self._load_pending = False
+        tree.configure(yscrollcommand=self._on_scroll)
+
+    def _insert(self, index, position, row):
+        tag = 'evenrow' if position % 2 == 0 else 'oddrow'
+        self.tree.insert("", index, tags=(tag,),
+                         values=(row.id, row.type, row.category, chf_format(row.amount), format_date(row.date)))
+
+    def _first_visible(self):
+        first = self.tree.yview()[0]
+        return round(first * len(self.rows))
+
+    def _keep_view(self, first_visible):
+        """Stellt die oberste sichtbare Zeile nach Einfügen/Entfernen oben wieder her."""
+        if self.rows:
+            self.tree.yview_moveto(max(first_visible, 0) / len(self.rows))
+
+    def reset(self):
+        """Leert die Tabelle und lädt die erste Seite."""
+        self.generation += 1
+        self.tree.delete(*self.tree.get_children())
+        self.rows.clear()
+        self.at_top = True
+        self.exhausted = False
+        self._top = self._bottom = 0
+        self._load_pending = False
+        self.load_more()
+
+    def _submit(self, descending, after, on_page):
+        self._load_pending = True
+        generation = self.generation
+        ledger = current_ledger
+        worker.submit(lambda: query_transactions(self.transaction_type, descending=descending,
+                                                 page_size=self.PAGE_SIZE, after=after, ledger=ledger),
+                      on_done=lambda page: on_page(page) if generation == self.generation else None)
+
+    def load_more(self):
+        """Fordert die nächste Seite älterer Transaktionen beim Worker an."""
+        if self.exhausted or self._load_pending:
+            return
+        after = page_cursor(self.rows[-1], descending=True) if self.rows else None
+        self._submit(True, after, self._append_page)
+
+    def load_newer(self):
+        """Lädt die Seite neuerer Transaktionen über der obersten Zeile wieder (nach oben gescrollt)."""
+        if self.at_top or self._load_pending or not self.rows:
+            return
+        self._submit(False, page_cursor(self.rows[0]), self._prepend_page)
+
+    def _append_page(self, page):
+        self._load_pending = False
+        for row in page.rows:
+            self._insert("end", self._bottom, row)
+            self.rows.append(row)
+            self._bottom += 1
+        self.exhausted = page.cursor is None
+        # Oben entfernen, was über das Fenster hinausgeht
+        excess = len(self.rows) - self.MAX_ROWS
+        if excess > 0:
+            first = self._first_visible()
+            self.tree.delete(*self.tree.get_children()[:excess])
+            for _ in range(excess):
+                self.rows.popleft()
+            self._top += excess
+            self.at_top = False
+            self._keep_view(first - excess)
 
-def chf_format(x):
-    return f"CHF {locale.format_string('%.2f', x, grouping=True)}"
+    def _prepend_page(self, page):
+        self._load_pending = False
+        first = self._first_visible()
+        # Aufsteigend geliefert: jede Zeile kommt über die bisher oberste
+        for row in page.rows:
+            self._top -= 1
+            self._insert(0, self._top, row)
+            self.rows.appendleft(row)
+        self.at_top = page.cursor is None
+        # Unten entfernen, was über das Fenster hinausgeht
+        excess = len(self.rows) - self.MAX_ROWS
+        if excess > 0:
+            self.tree.delete(*self.tree.get_children()[-excess:])
+            for _ in range(excess):
+                self.rows.pop()
+            self._bottom -= excess
+            self.exhausted = False
+        self._keep_view(first + len(page.rows))
 
-def format_date(ds):
-    return datetime.datetime.strptime(ds, "%Y-%m-%d %H:%M:%S").strftime("%d.%m.%Y %H:%M")
+    def prepend(self, row):
+        """Fügt eine neue Transaktion oben ein (erscheint sonst beim Zurückscrollen)."""
+        if not self.at_top:
+            return
+        self._top -= 1
+        self._insert(0, self._top, row)
+        self.rows.appendleft(row)
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        # Kurz vor einem Ende die nächste Seite nachladen
+        if float(last) > 0.9:
+            self.load_more()
+        elif float(first) < 0.1:
+            self.load_newer()
 
 # ----------------------------
 # GUI-Aktionen
 # ----------------------------
-def refresh_entries():
-    rows = get_all_transactions()
-    inc_rows = [r for r in rows if r[1] == "Einnahme"]
-    exp_rows = [r for r in rows if r[1] == "Ausgabe"]
-
-    incomes_tree.delete(*incomes_tree.get_children())
-    expenses_tree.delete(*expenses_tree.get_children())
-
-    for idx, (rid, typ, amt, cat, dt) in enumerate(inc_rows):
-        tag = 'evenrow' if idx % 2 == 0 else 'oddrow'
-        incomes_tree.insert(
-            "", "end",
-            values=(rid, typ, cat, chf_format(amt), format_date(dt)),
-            tags=(tag,)
-        )
-    for idx, (rid, typ, amt, cat, dt) in enumerate(exp_rows):
-        tag = 'evenrow' if idx % 2 == 0 else 'oddrow'
-        expenses_tree.insert(
-            "", "end",
-            values=(rid, typ, cat, chf_format(amt), format_date(dt)),
-            tags=(tag,)
-        )
-
-    # Live-Stats
-    total_in = sum(r[2] for r in inc_rows)
-    total_out = sum(r[2] for r in exp_rows)
-    cnt_in = len(inc_rows)
-    cnt_out = len(exp_rows)
-    balance = total_in - total_out
+# Anzahl und Summe (Rappen) pro Typ, wird beim Hinzufügen direkt nachgeführt
+stats = {"Einnahme": (0, 0), "Ausgabe": (0, 0)}
 
+def update_stats_labels():
+    cnt_in, total_in = stats["Einnahme"]
+    cnt_out, total_out = stats["Ausgabe"]
     count_label.configure(text=f"Einnahmen: {cnt_in} | Ausgaben: {cnt_out}")
     summary_label.configure(text=f"Total Ein: {chf_format(total_in)} | Total Ausg: {chf_format(total_out)}")
-    balance_label.configure(text=f"Guthaben: {chf_format(balance)}")
+    balance_label.configure(text=f"Guthaben: {chf_format(total_in - total_out)}")
+
+def apply_stats(new_stats):
+    stats.update(new_stats)
+    update_stats_labels()
+
+def apply_ledger_totals(totals):
+    income = sum(t.income for t in totals)
+    expenses = sum(t.expenses for t in totals)
+    ledgers_label.configure(text=f"Alle {len(totals)} Konten: Guthaben {chf_format(income - expenses)}")
+
+def load_ledger_totals():
+    worker.submit(get_ledger_totals, on_done=apply_ledger_totals)
+
+def refresh_entries():
+    """Lädt Statistik und die erste Seite beider Tabellen neu (Start, 'Alle löschen', Kontowechsel)."""
+    for table in tables.values():
+        table.reset()
+    worker.submit(get_type_stats, None, current_ledger, on_done=apply_stats)
+    load_ledger_totals()
+    load_categories()
+
+def on_delete_all():
+    worker.submit(delete_all_transactions, current_ledger, on_done=lambda _: refresh_entries())
+
+# ----------------------------
+# Konten: Auswahl und neues Konto
+# ----------------------------
+current_ledger = None   # ID des gewählten Kontos (None bis zum ersten Laden: aktuelles Konto)
+
+def set_ledgers(result):
+    global current_ledger
+    ledgers, current = result
+    current_ledger = current
+    ledger_menu.configure(values=[ledger.name for ledger in ledgers])
+    ledger_menu.set(next(ledger.name for ledger in ledgers if ledger.id == current))
+
+def load_ledgers():
+    """Lädt die Konten für die Auswahl (im Worker)."""
+    worker.submit(lambda: (get_ledgers(), get_ledger()), on_done=set_ledgers)
+
+def ledger_changed(ledger_id):
+    global current_ledger
+    current_ledger = ledger_id
+    refresh_entries()
+
+def on_ledger_change(name):
+    worker.submit(set_ledger, name, on_done=ledger_changed)
+
+def on_new_ledger():
+    name = ctk.CTkInputDialog(text="Name des neuen Kontos:", title="Neues Konto").get_input()
+    if not name or not name.strip():
+        return
+    def created(ledger_id):
+        ledger_changed(ledger_id)
+        load_ledgers()
+    worker.submit(set_ledger, name.strip(), True, on_done=created)
+
+# ----------------------------
+# Kategorien: Autovervollständigung und Tippfehler-Vorschläge
+# ----------------------------
+category_cache = None
+
+def set_category_cache(cache):
+    global category_cache
+    category_cache = cache
+
+def load_categories():
+    """Lädt den Kategorien-Cache im Worker (nach dem Start und nach neuen Kategorien)."""
+    worker.submit(get_category_cache, on_done=set_category_cache)
+
+def on_category_key(event):
+    """Ergänzt die Eingabe inline mit der häufigsten passenden Kategorie (Rest markiert)."""
+    if category_cache is None or len(event.char) != 1 or not event.char.isprintable():
+        return
+    typed = entry_category.get()[:entry_category.index(ctk.INSERT)]
+    if not typed.strip():
+        return
+    matches = category_cache.complete(typed, limit=1)
+    if not matches or not matches[0].casefold().startswith(typed.casefold()):
+        return
+    entry_category.delete(0, ctk.END)
+    entry_category.insert(0, typed + matches[0][len(typed):])
+    entry_category.select_range(len(typed), ctk.END)
+    entry_category.icursor(len(typed))
+
+def confirm_category(cat):
+    """Fragt bei einer unbekannten, aber ähnlich geschriebenen Kategorie nach ("Mite" → "Miete")."""
+    if category_cache is None or category_cache.get(cat) is not None:
+        return cat
+    suggestions = category_cache.suggest(cat, limit=1)
+    if suggestions and messagebox.askyesno("Kategorie", f"Meintest du '{suggestions[0]}' statt '{cat}'?"):
+        return suggestions[0]
+    return cat
 
 # ----------------------------
+def _add_and_fetch(typ, amt, cat, ledger):
+    return get_transaction(add_transaction(typ, amt, cat, ledger), ledger=ledger)
+
 def on_add():
     try:
-        amt = float(entry_amount.get().replace(",", "."))
+        amt = parse_chf(entry_amount.get())
     except ValueError:
         return messagebox.showerror("Fehler", "Ungültiger Betrag")
     cat = entry_category.get().strip()
     if not cat:
         return messagebox.showerror("Fehler", "Kategorie fehlt")
-    add_transaction(type_menu.get(), amt, cat)
+    try:
+        typ, amt, cat = validate_transaction(type_menu.get(), amt, cat)
+    except ValueError as e:
+        return messagebox.showerror("Fehler", str(e))
+    cat = confirm_category(cat)
+    new_category = category_cache is None or category_cache.get(cat) is None
     entry_amount.delete(0, ctk.END)
     entry_category.delete(0, ctk.END)
-    refresh_entries()
+
+    table = tables[typ]
+    generation = table.generation
+
+    def added(row):
+        # Nach einem reset() ist die Zeile bereits in der neu geladenen Seite
+        if generation != table.generation:
+            return
+        # Nur die neue Zeile einfügen und die Statistik nachführen
+        table.prepend(row)
+        count, total = stats[typ]
+        stats[typ] = (count + 1, total + amt)
+        update_stats_labels()
+        load_ledger_totals()
+        if new_category:
+            load_categories()
+
+    worker.submit(_add_and_fetch, typ, amt, cat, current_ledger, on_done=added)
 
 # ----------------------------
-def on_export_pdf():
-    rows = get_all_transactions()
-    if not rows:
-        return messagebox.showinfo("Info", "Keine Daten")
+# Exporte mit Fortschritt und Abbruch
+# ----------------------------
+current_export = None
+
+def render_pdf(filename, total, ledger, job):
+    """Worker: schreibt alle Transaktionen des Kontos (neueste zuerst) mit FPDF."""
+    from fpdf import FPDF  # erst beim Export laden (Startzeit)
+
     pdf = FPDF()
     pdf.add_page()
     pdf.set_font("Helvetica", "B", 14)
@@ -123,16 +411,71 @@ def on_export_pdf():
         pdf.cell(w, 8, col, 1)
     pdf.ln()
     pdf.set_font("Helvetica", "", 10)
-    for rid, typ, amt, cat, dt in rows:
-        pdf.cell(widths[0], 8, str(rid), 1)
-        pdf.cell(widths[1], 8, typ, 1)
-        pdf.cell(widths[2], 8, cat, 1)
-        pdf.cell(widths[3], 8, chf_format(amt), 1, align="R")
-        pdf.cell(widths[4], 8, format_date(dt), 1)
+    for done, row in enumerate(iter_transactions(descending=True, ledger=ledger), 1):
+        pdf.cell(widths[0], 8, str(row.id), 1)
+        pdf.cell(widths[1], 8, row.type, 1)
+        pdf.cell(widths[2], 8, row.category, 1)
+        pdf.cell(widths[3], 8, chf_format(row.amount), 1, align="R")
+        pdf.cell(widths[4], 8, format_date(row.date), 1)
         pdf.ln()
-    filename = f"finanz_{datetime.datetime.now():%Y%m%d_%H%M%S}.pdf"
+        if done % 500 == 0:
+            job.report(done / total)
+    job.report(1)
     pdf.output(filename)
-    messagebox.showinfo("Erfolg", f"PDF gespeichert als {filename}")
+    return filename
+
+def write_csv(filename, total, ledger, job):
+    """Worker: exportiert alle Transaktionen des Kontos als CSV; bei Abbruch wird die Datei entfernt."""
+    try:
+        export_to_csv(filename, progress=lambda done: job.report(done / total), ledger=ledger)
+    except JobCancelled:
+        os.remove(filename)
+        raise
+    return filename
+
+def start_export(label, func, filename):
+    global current_export
+    if current_export is not None:
+        return messagebox.showinfo("Info", "Es läuft bereits ein Export")
+    total = sum(count for count, _ in stats.values())
+    if not total:
+        return messagebox.showinfo("Info", "Keine Daten")
+
+    def finished(result):
+        global current_export
+        current_export = None
+        progress_frame.pack_forget()
+        if isinstance(result, JobCancelled):
+            messagebox.showinfo("Info", f"{label} abgebrochen")
+        elif isinstance(result, Exception):
+            show_error(result)
+        else:
+            messagebox.showinfo("Erfolg", f"{label} gespeichert als {result}")
+
+    progress_label.configure(text=f"{label} läuft...")
+    progress_bar.set(0)
+    progress_frame.pack(padx=30, pady=(0, 10), fill="x", after=btn_frame)
+    current_export = export_worker.submit(func, filename, total, current_ledger, on_done=finished, on_error=finished,
+                                          on_progress=progress_bar.set, cancellable=True)
+
+def on_export_pdf():
+    start_export("PDF", render_pdf, f"finanz_{datetime.datetime.now():%Y%m%d_%H%M%S}.pdf")
+
+def on_export_csv():
+    start_export("CSV", write_csv, default_csv_filename())
+
+def on_cancel_export():
+    if current_export is not None:
+        current_export.cancel()
+
+def on_dump_metrics(event=None):
+    """F12: schreibt die Messwerte (nur mit FINANZ_TRACKER_METRICS=1) als JSON-Datei."""
+    if not instrumentation.is_enabled():
+        return messagebox.showinfo("Info", "Messungen sind aus (FINANZ_TRACKER_METRICS=1 setzen)")
+    filename = f"finanz_metrics_{datetime.datetime.now():%Y%m%d_%H%M%S}.json"
+    with open(filename, "w", encoding="utf-8") as file:
+        file.write(instrumentation.dump_json())
+    messagebox.showinfo("Erfolg", f"Messwerte gespeichert als {filename}")
 
 # ----------------------------
 # GUI-Aufbau
@@ -186,21 +529,37 @@ entry_amount.grid(row=1, column=1, sticky="w", padx=10)
 ctk.CTkLabel(frm, text="Kategorie:", width=100).grid(row=2, column=0, sticky="w", padx=10)
 entry_category = ctk.CTkEntry(frm, placeholder_text="z.B. Miete", width=260)
 entry_category.grid(row=2, column=1, sticky="w", padx=10)
+entry_category.bind("<KeyRelease>", on_category_key)
+ctk.CTkLabel(frm, text="Konto:", width=100).grid(row=3, column=0, sticky="w", padx=10)
+ledger_menu = ctk.CTkOptionMenu(frm, values=[], width=180, command=on_ledger_change)
+ledger_menu.grid(row=3, column=1, sticky="w", padx=10)
+ctk.CTkButton(frm, text="Neues Konto", corner_radius=8, width=120, command=on_new_ledger).grid(row=3, column=2, sticky="w", padx=10)
 
 # Action-Buttons
 btn_frame = ctk.CTkFrame(app, corner_radius=12, fg_color="#272727")
 btn_frame.pack(padx=30, pady=(0,20), fill="x")
 ctk.CTkButton(btn_frame, text="Hinzufügen", corner_radius=8, command=on_add).pack(side="left", padx=15, pady=10)
 ctk.CTkButton(btn_frame, text="Export PDF", corner_radius=8, command=on_export_pdf).pack(side="left", padx=15)
-ctk.CTkButton(btn_frame, text="Alle löschen", corner_radius=8, fg_color="#b3372c", hover_color="#cf4427", command=lambda: (delete_all_transactions(), refresh_entries())).pack(side="left", padx=15)
+ctk.CTkButton(btn_frame, text="Export CSV", corner_radius=8, command=on_export_csv).pack(side="left", padx=15)
+ctk.CTkButton(btn_frame, text="Alle löschen", corner_radius=8, fg_color="#b3372c", hover_color="#cf4427", command=on_delete_all).pack(side="left", padx=15)
+
+# Fortschritt laufender Exporte (nur sichtbar während eines Exports)
+progress_frame = ctk.CTkFrame(app, corner_radius=12, fg_color="#272727")
+progress_label = ctk.CTkLabel(progress_frame, text="", font=("Consolas",12))
+progress_label.pack(side="left", padx=15, pady=10)
+progress_bar = ctk.CTkProgressBar(progress_frame, width=400)
+progress_bar.pack(side="left", padx=15)
+ctk.CTkButton(progress_frame, text="Abbrechen", corner_radius=8, width=100, command=on_cancel_export).pack(side="left", padx=15)
 
 # Live-Stats oberhalb der Tabellen
 count_label = ctk.CTkLabel(app, text="Einnahmen: 0 | Ausgaben: 0", font=("Consolas",12))
 summary_label = ctk.CTkLabel(app, text="Total Ein: CHF 0.00 | Total Ausg: CHF 0.00", font=("Consolas",12))
 balance_label = ctk.CTkLabel(app, text="Guthaben: CHF 0.00", text_color="#00b894", font=("Consolas",14,"bold"))
+ledgers_label = ctk.CTkLabel(app, text="", font=("Consolas",12))
 count_label.pack(pady=(10,5))
 summary_label.pack()
-balance_label.pack(pady=(5,20))
+balance_label.pack(pady=(5,0))
+ledgers_label.pack(pady=(0,20))
 
 # Einnahmen-Tabelle
 ctk.CTkLabel(app, text="Einnahmen", text_color="#00b894", font=("Consolas",18,"bold")).pack(pady=(10,0))
@@ -220,7 +579,6 @@ incomes_tree.heading("Datum", text="Datum", anchor="w")
 incomes_tree.column("Datum", width=200, anchor="w", stretch=True)
 incomes_tree.pack(fill="both", expand=True)
 scroll_in = ttk.Scrollbar(incomes_frame, orient="vertical", command=incomes_tree.yview)
-incomes_tree.configure(yscrollcommand=scroll_in.set)
 scroll_in.pack(side="right", fill="y")
 
 # Ausgaben-Tabelle
@@ -241,10 +599,19 @@ expenses_tree.heading("Datum", text="Datum", anchor="w")
 expenses_tree.column("Datum", width=200, anchor="w", stretch=True)
 expenses_tree.pack(fill="both", expand=True)
 scroll_out = ttk.Scrollbar(expenses_frame, orient="vertical", command=expenses_tree.yview)
-expenses_tree.configure(yscrollcommand=scroll_out.set)
 scroll_out.pack(side="right", fill="y")
 
-# Start
-delete_all_transactions()
+tables = {
+    "Einnahme": TransactionTable(incomes_tree, scroll_in, "Einnahme"),
+    "Ausgabe": TransactionTable(expenses_tree, scroll_out, "Ausgabe"),
+}
+
+# Start (Datenbank-Arbeit läuft im Hintergrund-Thread). Exporte laufen in
+# einem zweiten Thread: im WAL-Modus blockiert ihr langer Lesezugriff das
+# Speichern neuer Transaktionen nicht.
+worker = BackgroundWorker(app)
+export_worker = BackgroundWorker(app, name="gui-export")
+app.bind("<F12>", on_dump_metrics)
+load_ledgers()
 refresh_entries()
 app.mainloop()
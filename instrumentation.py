@@ -0,0 +1,290 @@
+"""
+Optionale Messungen für die heissen Pfade (Opt-in).
+
+Eingeschaltet per Umgebungsvariable FINANZ_TRACKER_METRICS=1 oder zur
+Laufzeit mit enable(). Erfasst werden dann:
+
+- Latenz-Histogramme je Funktion (Decorator @timed, observe())
+- Zähler: geöffnete Verbindungen, gelesene Zeilen, ausgeführte
+  SQL-Anweisungen nach Art (über sqlite3 set_trace_callback)
+- ein Slow-Query-Log: Anweisungen, deren Ausführung samt Abholen der
+  Zeilen länger als die Schwelle dauert
+
+Ausgeschaltet kostet ein @timed-Aufruf nur die Abfrage eines Flags;
+Verbindungen werden dann ohne Trace-Callback und ohne Zähl-Cursor geöffnet.
+dump_json() und dump_prometheus() geben den aktuellen Stand aus.
+
+Dieses Modul importiert database.py nicht (keine Zyklen, schneller Start).
+"""
+import functools
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger("finanz_tracker.instrumentation")
+
+# Obergrenzen der Histogramm-Klassen in Sekunden (wie bei Prometheus üblich)
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+SLOW_QUERY_LOG_SIZE = 100
+
+_enabled = os.environ.get("FINANZ_TRACKER_METRICS", "") not in ("", "0")
+_slow_query_seconds = float(os.environ.get("FINANZ_TRACKER_SLOW_QUERY_MS", "100")) / 1000
+_lock = threading.Lock()
+_histograms = {}
+_counters = {}
+_statements = {}
+_slow_queries = deque(maxlen=SLOW_QUERY_LOG_SIZE)
+
+
+def is_enabled():
+    return _enabled
+
+
+def enable(slow_query_ms=None):
+    """Schaltet die Messungen ein (gilt für danach geöffnete Verbindungen)."""
+    global _enabled, _slow_query_seconds
+    if slow_query_ms is not None:
+        _slow_query_seconds = slow_query_ms / 1000
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    """Verwirft alle bisherigen Messwerte."""
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _statements.clear()
+        _slow_queries.clear()
+
+
+# ------------------------------
+# Erfassen
+# ------------------------------
+def observe(name, seconds):
+    """Trägt eine Dauer in das Histogramm `name` ein."""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = {"counts": [0] * len(BUCKETS), "count": 0, "sum": 0.0, "max": 0.0}
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                histogram["counts"][i] += 1
+                break
+        histogram["count"] += 1
+        histogram["sum"] += seconds
+        histogram["max"] = max(histogram["max"], seconds)
+
+
+def count(name, amount=1):
+    """Erhöht den Zähler `name`."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def timed(func=None, *, name=None):
+    """
+    Decorator: misst die Laufzeit jedes Aufrufs, solange die Messungen
+    eingeschaltet sind. Verwendbar als @timed oder @timed(name="...").
+    """
+    if func is None:
+        return functools.partial(timed, name=name)
+    metric = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not _enabled:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            observe(metric, time.perf_counter() - started)
+    return wrapper
+
+
+def _trace(statement):
+    kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "?"
+    with _lock:
+        _statements[kind] = _statements.get(kind, 0) + 1
+
+
+# ------------------------------
+# Verbindungen mit Zeilenzähler und Slow-Query-Log
+# ------------------------------
+class InstrumentedCursor(sqlite3.Cursor):
+    """
+    Cursor, der gelesene Zeilen zählt und die Zeit einer Anweisung misst
+    (Ausführen plus Abholen der Zeilen, ohne die Zeit des Aufrufers dazwischen).
+    """
+    _sql = None
+
+    def _start(self, sql):
+        self._finish()
+        self._sql = sql
+        self._elapsed = 0.0
+        self._rows = 0
+
+    def _finish(self):
+        if self._sql is None:
+            return
+        if self._rows:
+            count("rows_fetched", self._rows)
+        if self._elapsed >= _slow_query_seconds:
+            count("slow_queries")
+            entry = {"sql": " ".join(self._sql.split()), "ms": round(self._elapsed * 1000, 2),
+                     "rows": self._rows, "thread": threading.current_thread().name,
+                     "at": time.strftime("%Y-%m-%d %H:%M:%S")}
+            with _lock:
+                _slow_queries.append(entry)
+            log.warning("🐢 Langsame Abfrage (%.1f ms, %d Zeilen): %s", entry["ms"], entry["rows"], entry["sql"][:200])
+        self._sql = None
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            if self._sql is not None:
+                self._elapsed += time.perf_counter() - started
+
+    def execute(self, sql, parameters=()):
+        self._start(sql)
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        self._start(sql)
+        result = self._timed(super().executemany, sql, seq_of_parameters)
+        self._finish()
+        return result
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._sql is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if self._sql is not None:
+            self._rows += len(rows)
+        if not rows:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._sql is not None:
+            self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:   # z. B. beim Beenden des Interpreters
+            pass
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Verbindung, deren execute()/executemany() über InstrumentedCursor laufen."""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def connection_options():
+    """Zusätzliche Argumente für sqlite3.connect() (leer, wenn ausgeschaltet)."""
+    return {"factory": InstrumentedConnection} if _enabled else {}
+
+
+def instrument_connection(conn):
+    """Zählt eine neu geöffnete Verbindung und hängt den Trace-Callback an."""
+    if not _enabled:
+        return
+    count("connections_opened")
+    conn.set_trace_callback(_trace)
+
+
+# ------------------------------
+# Ausgabe
+# ------------------------------
+def snapshot():
+    """Gibt alle Messwerte als Dict zurück (Histogramme mit kumulierten Klassen)."""
+    with _lock:
+        functions = {}
+        for name, histogram in sorted(_histograms.items()):
+            cumulative, buckets = 0, {}
+            for bound, n in zip(BUCKETS, histogram["counts"]):
+                cumulative += n
+                buckets["+Inf" if bound == float("inf") else repr(bound)] = cumulative
+            functions[name] = {
+                "count": histogram["count"],
+                "sum_s": round(histogram["sum"], 6),
+                "mean_ms": round(histogram["sum"] / histogram["count"] * 1000, 3),
+                "max_ms": round(histogram["max"] * 1000, 3),
+                "buckets": buckets,
+            }
+        return {
+            "enabled": _enabled,
+            "slow_query_ms": _slow_query_seconds * 1000,
+            "functions": functions,
+            "counters": dict(_counters),
+            "sql_statements": dict(_statements),
+            "slow_queries": list(_slow_queries),
+        }
+
+
+def dump_json(indent=2):
+    return json.dumps(snapshot(), indent=indent, ensure_ascii=False)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def dump_prometheus(prefix="finanz_tracker"):
+    """Gibt die Messwerte im Textformat von Prometheus zurück."""
+    data = snapshot()
+    lines = [
+        f"# HELP {prefix}_function_seconds Laufzeit je Funktion",
+        f"# TYPE {prefix}_function_seconds histogram",
+    ]
+    for name, histogram in data["functions"].items():
+        for bound, n in histogram["buckets"].items():
+            lines.append(f'{prefix}_function_seconds_bucket{{function="{_label(name)}",le="{bound}"}} {n}')
+        lines.append(f'{prefix}_function_seconds_sum{{function="{_label(name)}"}} {histogram["sum_s"]}')
+        lines.append(f'{prefix}_function_seconds_count{{function="{_label(name)}"}} {histogram["count"]}')
+    for name, value in sorted(data["counters"].items()):
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        lines.append(f"{prefix}_{name}_total {value}")
+    lines.append(f"# TYPE {prefix}_sql_statements_total counter")
+    for kind, value in sorted(data["sql_statements"].items()):
+        lines.append(f'{prefix}_sql_statements_total{{kind="{_label(kind)}"}} {value}')
+    return "\n".join(lines) + "\n"
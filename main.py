@@ -1,41 +1,321 @@
+import logging
+from contextlib import contextmanager
+
+import instrumentation
+from formatting import format_chf
+
 from database import (
     add_transaction, 
-    show_transactions, 
-    get_total_income, 
-    get_total_expenses, 
-    get_balance, 
-    plot_incomes_and_expenses_by_category,
+    add_transactions,
+    query_transactions,
+    get_transactions_by_month,
+    get_totals, 
+    parse_chf,
+    default_csv_filename,
     export_to_csv, 
     export_to_pdf, 
-    filter_transactions_by_month
+    get_export_batches,
+    reexport_batch,
+    set_instrumentation,
+    import_from_csv,
+    rebuild_monthly_summary,
+    complete_category,
+    suggest_category,
+    RECURRING_CADENCES,
+    add_recurring_rule,
+    get_recurring_rules,
+    delete_recurring_rule,
+    materialize_recurring,
+    get_ledger,
+    get_ledgers,
+    get_ledger_totals,
+    set_ledger
 )
+# charts (matplotlib) und pdf_report (reportlab) werden erst geladen, wenn ein
+# Diagramm bzw. PDF angefordert wird – das hält den Start des CLI schnell.
+
+def show_transactions(page_size=50):
+    """Zeigt alle Transaktionen formatiert in der Konsole an, seitenweise."""
+    page = query_transactions(page_size=page_size)
+
+    if not page.rows:
+        print("❌ Keine Transaktionen gefunden.")
+        return
+    
+    print("\n📋 Alle Transaktionen:")
+    print("=" * 80)
+    print(f"{'ID':<5} {'Typ':<10} {'Betrag':>16}  {'Kategorie':<20} {'Datum':<20}")
+    print("=" * 80)
+    while True:
+        for row in page.rows:
+            print(f"{row.id:<5} {row.type:<10} {format_chf(row.amount):>16}  {row.category:<20} {row.date:<20}")
+        if page.cursor is None:
+            break
+        if input("↩️  Enter = nächste Seite, q = beenden: ").strip().lower() == "q":
+            break
+        page = query_transactions(page_size=page_size, after=page.cursor)
+    print("=" * 80)
+
+def filter_transactions_by_month(year, month):
+    """Filtert und zeigt Transaktionen für einen bestimmten Monat in der Konsole an."""
+    rows = get_transactions_by_month(year, month)
+    if not rows:
+        print(f"❌ Keine Transaktionen für {month}/{year} gefunden.")
+        return
+    print(f"\n📅 Transaktionen für {month}/{year}:")
+    for row in rows:
+        print(f"ID: {row[0]}, Typ: {row[1]}, Betrag: {format_chf(row[2])}, Kategorie: {row[3]}, Datum: {row[4]}")
+
+def export_pdf_menu():
+    """Fragt die PDF-Export-Optionen ab und exportiert die Transaktionen."""
+    print("\n📄 PDF-Export-Optionen:")
+    print("1️⃣ Alle Transaktionen exportieren (nur noch nicht exportierte)")
+    print("2️⃣ Nur einen bestimmten Monat exportieren (nicht exportierte)")
+    print("3️⃣ Einen früheren Export erneut erzeugen")
+    choice = input("Wähle eine Option (1, 2 oder 3): ").strip()
+
+    if choice == "3":
+        reexport_menu()
+        return
+    if choice == "1":
+        year, month = None, None
+    elif choice == "2":
+        year = input("Gib das Jahr ein (z. B. 2025): ").strip()
+        month = input("Gib den Monat ein (1-12): ").strip().zfill(2)
+    else:
+        print("❌ Ungültige Eingabe. Abbruch.")
+        return
+
+    try:
+        report = export_to_pdf(year=year, month=month)
+    except ValueError:
+        print("❌ Ungültige Eingabe. Abbruch.")
+        return
+    if report is None:
+        print("❌ Keine passenden Transaktionen gefunden.")
+        return
+    print(f"✅ PDF gespeichert: {report.filename} ({report.pages} Seiten, {report.rows} Transaktionen)")
+
+def reexport_menu():
+    """Zeigt die letzten Exporte und erzeugt einen davon erneut."""
+    batches = get_export_batches()
+    if not batches:
+        print("❌ Noch keine Exporte vorhanden.")
+        return
+    print(f"\n{'Nr':<5} {'Ziel':<6} {'Erstellt':<20} {'Zeitraum':<24} {'Zeilen':<8} Datei")
+    for b in batches:
+        zeitraum = f"{b.start or 'Anfang'} – {b.end or 'Ende'}"
+        print(f"{b.id:<5} {b.target:<6} {b.created:<20} {zeitraum:<24} {b.row_count:<8} {b.filename or '-'}")
+    try:
+        batch_id = int(input("🔁 Nummer des Exports: ").strip())
+        batch = next(b for b in batches if b.id == batch_id)
+    except (ValueError, StopIteration):
+        print("❌ Ungültige Eingabe. Abbruch.")
+        return
+    endung = "pdf" if batch.target == "pdf" else "csv"
+    dateiname = input(f"📄 Dateiname (leer = finanz_tracker_export_{batch.id}.{endung}): ").strip() \
+        or f"finanz_tracker_export_{batch.id}.{endung}"
+    anzahl = reexport_batch(batch.id, dateiname)
+    print(f"✅ Export {batch.id} erneut gespeichert: {dateiname} ({anzahl} Transaktionen)")
+
+@contextmanager
+def category_completion():
+    """
+    Tab-Vervollständigung der Kategorien für input() (falls readline
+    verfügbar ist). Vervollständigt wird das Wort nach dem letzten Komma,
+    z. B. "Miete: 1500, Str" + Tab → "Miete: 1500, Strom".
+    """
+    try:
+        import readline
+    except ImportError:   # z. B. Windows ohne pyreadline
+        yield
+        return
+
+    treffer = []
+
+    def completer(text, state):
+        if state == 0:
+            prefix = text.lstrip()
+            leerzeichen = text[:len(text) - len(prefix)]
+            treffer[:] = [leerzeichen + name for name in complete_category(prefix)] if ":" not in prefix else []
+        return treffer[state] if state < len(treffer) else None
+
+    old_completer, old_delims = readline.get_completer(), readline.get_completer_delims()
+    readline.set_completer(completer)
+    readline.set_completer_delims(",")
+    readline.parse_and_bind("tab: complete")
+    try:
+        yield
+    finally:
+        readline.set_completer(old_completer)
+        readline.set_completer_delims(old_delims)
+
+def confirm_category(kategorie):
+    """Fragt bei einer unbekannten, aber ähnlich geschriebenen Kategorie nach ("Mite" → "Miete")."""
+    vorschlaege = suggest_category(kategorie, limit=1)
+    if vorschlaege and input(f"❓ Meintest du '{vorschlaege[0]}' statt '{kategorie}'? (j/n): ").strip().lower() == "j":
+        return vorschlaege[0]
+    return kategorie
 
 def add_multiple_expenses():
     print("\n🔹 Neue Ausgaben hinzufügen")
     print("Gib mehrere Ausgaben in einer Zeile ein (z. B.: Miete: 1500, Strom: 80, Krankenkasse: 350)")
     print("Oder drücke einfach Enter, um abzubrechen.")
 
-    eingabe = input("💰 Deine Ausgaben: ").strip()
+    with category_completion():
+        eingabe = input("💰 Deine Ausgaben: ").strip()
     if not eingabe:
         return
 
     ausgaben = eingabe.split(",")
-    
+    batch = []
+
     for ausgabe in ausgaben:
         try:
             kategorie, betrag = ausgabe.split(":")
-            kategorie = kategorie.strip()
-            betrag = float(betrag.strip())
+            betrag = parse_chf(betrag.strip())
+            batch.append(("Ausgabe", betrag, confirm_category(kategorie.strip())))
+        except ValueError:
+            print(f"❌ Fehler: Ungültige Eingabe bei '{ausgabe.strip()}'. Bitte richtig eingeben!")
+
+    # Alle gültigen Ausgaben in einem einzigen Commit speichern
+    gespeichert, abgelehnt = add_transactions(batch)
+    for _, betrag, kategorie in gespeichert:
+        print(f"✅ Transaktion gespeichert: {kategorie} - {format_chf(betrag)}")
+    for (_, _, kategorie), grund in abgelehnt:
+        print(f"❌ Fehler bei '{kategorie}': {grund}")
+
+def recurring_menu():
+    """Zeigt die Daueraufträge, legt neue an, löscht sie oder bucht die fälligen."""
+    from recurring import print_rules
 
-            add_transaction("Ausgabe", betrag, kategorie)
-            print(f"✅ Transaktion gespeichert: {kategorie} - {betrag:.2f} CHF")
+    print("\n🔁 Daueraufträge:")
+    print_rules(get_recurring_rules())
+    print("1️⃣ Neuen Dauerauftrag anlegen")
+    print("2️⃣ Dauerauftrag löschen")
+    print("3️⃣ Fällige jetzt buchen")
+    choice = input("Wähle eine Option: ").strip()
 
+    if choice == "1":
+        typ = input("📌 Typ (Einnahme/Ausgabe): ").strip().capitalize()
+        try:
+            betrag = parse_chf(input("💰 Betrag in CHF: "))
+            with category_completion():
+                kategorie = confirm_category(input("📂 Kategorie: ").strip())
+            rhythmus = input(f"🔁 Rhythmus ({', '.join(RECURRING_CADENCES)}): ").strip().lower()
+            start = input("📅 Erste Fälligkeit (YYYY-MM-DD, leer = heute): ").strip() or None
+            ende = input("📅 Letzte mögliche Fälligkeit (YYYY-MM-DD, leer = unbegrenzt): ").strip() or None
+            add_recurring_rule(typ, betrag, kategorie, rhythmus, start, ende)
+        except ValueError as e:
+            print(f"❌ Ungültige Eingabe: {e}")
+            return
+        print(f"✅ Dauerauftrag gespeichert: {kategorie} - {format_chf(betrag)} {rhythmus}")
+        anzahl = materialize_recurring()
+        if anzahl:
+            print(f"✅ {anzahl} fällige Transaktionen gebucht.")
+    elif choice == "2":
+        try:
+            regel = int(input("🗑️ Nummer des Dauerauftrags: ").strip())
         except ValueError:
-            print(f"❌ Fehler: Ungültige Eingabe bei '{ausgabe.strip()}'. Bitte richtig eingeben!")
+            print("❌ Ungültige Eingabe. Abbruch.")
+            return
+        if delete_recurring_rule(regel):
+            print("✅ Dauerauftrag gelöscht (gebuchte Transaktionen bleiben bestehen).")
+        else:
+            print("❌ Dauerauftrag nicht gefunden.")
+    elif choice == "3":
+        print(f"✅ {materialize_recurring()} fällige Transaktionen gebucht.")
+    else:
+        print("❌ Ungültige Eingabe. Abbruch.")
+
+def ledger_name():
+    """Name des aktuellen Kontos."""
+    aktuell = get_ledger()
+    return next(konto.name for konto in get_ledgers() if konto.id == aktuell)
+
+def ledger_menu():
+    """Zeigt alle Konten mit Summen (eine Abfrage), wechselt das Konto oder legt ein neues an."""
+    aktuell = get_ledger()
+    konten = get_ledger_totals()
+    print("\n🏦 Konten:")
+    print(f"   {'Nr':<5} {'Konto':<24} {'Einnahmen':>16} {'Ausgaben':>16} {'Saldo':>16}")
+    for k in konten:
+        zeiger = "👉" if k.id == aktuell else "  "
+        print(f"{zeiger} {k.id:<5} {k.name:<24} {format_chf(k.income):>16} {format_chf(k.expenses):>16} "
+              f"{format_chf(k.income - k.expenses):>16}")
+    einnahmen = sum(k.income for k in konten)
+    ausgaben = sum(k.expenses for k in konten)
+    print(f"   {'':<5} {'Alle Konten':<24} {format_chf(einnahmen):>16} {format_chf(ausgaben):>16} "
+          f"{format_chf(einnahmen - ausgaben):>16}")
+    print("1️⃣ Konto wechseln")
+    print("2️⃣ Neues Konto anlegen")
+    choice = input("Wähle eine Option (leer = zurück): ").strip()
+
+    if choice == "1":
+        eingabe = input("🏦 Nummer oder Name des Kontos: ").strip()
+        try:
+            set_ledger(int(eingabe) if eingabe.isdigit() else eingabe)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        print(f"✅ Aktuelles Konto: {ledger_name()}")
+    elif choice == "2":
+        try:
+            set_ledger(input("🏦 Name des neuen Kontos: ").strip(), create=True)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+        print(f"✅ Konto angelegt, aktuelles Konto: {ledger_name()}")
+    elif choice:
+        print("❌ Ungültige Eingabe. Abbruch.")
+
+def metrics_menu():
+    """Schaltet die Messungen ein/aus und gibt sie als JSON oder Prometheus-Text aus."""
+    status = "an" if instrumentation.is_enabled() else "aus"
+    print(f"\n⏱️ Messwerte (Instrumentierung ist {status}):")
+    print("1️⃣ Einschalten")
+    print("2️⃣ Ausschalten")
+    print("3️⃣ Als JSON anzeigen/speichern")
+    print("4️⃣ Als Prometheus-Text anzeigen/speichern")
+    print("5️⃣ Langsame Abfragen anzeigen")
+    print("6️⃣ Messwerte zurücksetzen")
+    choice = input("Wähle eine Option: ").strip()
+
+    if choice == "1":
+        schwelle = input("🐢 Schwelle für langsame Abfragen in ms (leer = 100): ").strip()
+        try:
+            set_instrumentation(True, float(schwelle) if schwelle else None)
+        except ValueError:
+            print("❌ Ungültige Eingabe. Abbruch.")
+            return
+        print("✅ Messungen eingeschaltet.")
+    elif choice == "2":
+        set_instrumentation(False)
+        print("✅ Messungen ausgeschaltet.")
+    elif choice in ("3", "4"):
+        text = instrumentation.dump_json() if choice == "3" else instrumentation.dump_prometheus()
+        dateiname = input("📄 Dateiname (leer = Konsole): ").strip()
+        if not dateiname:
+            print(text)
+            return
+        with open(dateiname, "w", encoding="utf-8") as file:
+            file.write(text)
+        print(f"✅ Messwerte gespeichert: {dateiname}")
+    elif choice == "5":
+        langsam = instrumentation.snapshot()["slow_queries"]
+        if not langsam:
+            print("✅ Keine langsamen Abfragen erfasst.")
+        for eintrag in langsam:
+            print(f"🐢 {eintrag['at']} {eintrag['ms']:>9.1f} ms {eintrag['rows']:>8} Zeilen  {eintrag['sql'][:100]}")
+    elif choice == "6":
+        instrumentation.reset()
+        print("✅ Messwerte zurückgesetzt.")
+    else:
+        print("❌ Ungültige Eingabe. Abbruch.")
 
 def main_menu():
     while True:
-        print("\n📊 **Finanz-Tracker Menü**")
+        print(f"\n📊 **Finanz-Tracker Menü** – Konto: {ledger_name()}")
         print("1️⃣ Neue Transaktion hinzufügen")
         print("2️⃣ Alle Transaktionen anzeigen")
         print("3️⃣ Einnahmen & Ausgaben zusammenfassen")
@@ -43,6 +323,11 @@ def main_menu():
         print("5️⃣ Transaktionen als CSV exportieren")
         print("6️⃣ Transaktionen als PDF exportieren")
         print("7️⃣ Transaktionen nach Monat filtern")
+        print("8️⃣ Transaktionen aus CSV importieren")
+        print("9️⃣ Monatszusammenfassung neu aufbauen")
+        print("🔁 D = Daueraufträge")
+        print("🏦 K = Konto wechseln / alle Konten")
+        print("Ⓜ️  Messwerte (Instrumentierung)")
         print("0️⃣ Beenden")
 
         choice = input("👉 Wähle eine Option: ")
@@ -50,10 +335,15 @@ def main_menu():
         if choice == "1":
             typ = input("📌 Typ (Einnahme/Ausgabe): ").strip().capitalize()
             if typ == "Einnahme":
-                betrag = float(input("💰 Betrag in CHF: "))
-                kategorie = input("📂 Kategorie: ").strip()
-                add_transaction("Einnahme", betrag, kategorie)
-                print(f"✅ Transaktion gespeichert: {kategorie} - {betrag:.2f} CHF")
+                try:
+                    betrag = parse_chf(input("💰 Betrag in CHF: "))
+                    with category_completion():
+                        kategorie = confirm_category(input("📂 Kategorie: ").strip())
+                    add_transaction("Einnahme", betrag, kategorie)
+                except ValueError as e:
+                    print(f"❌ {e}")
+                    continue
+                print(f"✅ Transaktion gespeichert: {kategorie} - {format_chf(betrag)}")
             elif typ == "Ausgabe":
                 add_multiple_expenses()
             else:
@@ -64,28 +354,86 @@ def main_menu():
         
         elif choice == "3":
             print("\n📊 **Finanzübersicht**")
-            print(f"💰 Gesamteinnahmen: {get_total_income():.2f} CHF")
-            print(f"💸 Gesamtausgaben: {get_total_expenses():.2f} CHF")
-            print(f"💼 Aktueller Saldo: {get_balance():.2f} CHF")
+            einnahmen, ausgaben = get_totals()
+            print(f"💰 Gesamteinnahmen: {format_chf(einnahmen)}")
+            print(f"💸 Gesamtausgaben: {format_chf(ausgaben)}")
+            print(f"💼 Aktueller Saldo: {format_chf(einnahmen - ausgaben)}")
         
         elif choice == "4":
-            plot_incomes_and_expenses_by_category()
+            dateiname = input("📄 Als PNG/SVG speichern unter (leer = anzeigen): ").strip()
+            if dateiname:
+                from charts import render_chart
+                try:
+                    bild = render_chart("incomes_and_expenses_by_category", dateiname)
+                except ValueError as e:
+                    print(f"❌ {e}")
+                    continue
+                if bild is None:
+                    print("❌ Weder Einnahmen noch Ausgaben vorhanden, um ein Diagramm zu erstellen.")
+                else:
+                    print(f"✅ Diagramm gespeichert: {dateiname}")
+                continue
+            from charts import plot_incomes_and_expenses_by_category
+            print("📊 Das Diagramm wird angezeigt...")
+            if not plot_incomes_and_expenses_by_category():
+                print("❌ Weder Einnahmen noch Ausgaben vorhanden, um ein Diagramm zu erstellen.")
         
         elif choice == "5":
             print("📤 Exportiere Transaktionen als CSV...")
-            export_to_csv()
-            print("✅ CSV-Export abgeschlossen.")
+            dateiname = input("📄 Dateiname (leer = Standard, '-' = Konsole, *.gz = komprimiert): ").strip() or default_csv_filename()
+            von = input("📅 Von (YYYY-MM-DD, leer = alle): ").strip() or None
+            bis = input("📅 Bis ausschliesslich (YYYY-MM-DD, leer = alle): ").strip() or None
+            nur_neue = input("🆕 Nur noch nicht exportierte? (j/N): ").strip().lower() == "j"
+            try:
+                # Exporte neuer Transaktionen werden im Export-Journal festgehalten
+                anzahl = export_to_csv(dateiname, start=von, end=bis, only_unexported=nur_neue,
+                                       record_batch=nur_neue)
+            except ValueError as e:
+                print(f"❌ {e}")
+                continue
+            if dateiname != "-":
+                print(f"✅ Daten erfolgreich als CSV gespeichert: {dateiname}")
+            print(f"✅ CSV-Export abgeschlossen ({anzahl} Zeilen).")
 
         elif choice == "6":
             print("📤 Exportiere Transaktionen als PDF...")
-            export_to_pdf()
+            export_pdf_menu()
             print("✅ PDF-Export abgeschlossen.")
         
         elif choice == "7":
             jahr = input("📅 Jahr (z.B. 2025): ").strip()
             monat = input("📅 Monat (1-12): ").strip()
-            filter_transactions_by_month(jahr, monat)
+            try:
+                filter_transactions_by_month(jahr, monat)
+            except ValueError as e:
+                print(f"❌ {e}")
+
+        elif choice == "8":
+            dateiname = input("📥 Pfad zur CSV-Datei: ").strip()
+            try:
+                importiert, fehler = import_from_csv(dateiname)
+            except (OSError, ValueError) as e:
+                print(f"❌ Import fehlgeschlagen: {e}")
+            else:
+                print(f"✅ {importiert} Transaktionen importiert.")
+                for zeile, grund in fehler[:20]:
+                    print(f"❌ Zeile {zeile}: {grund}")
+                if len(fehler) > 20:
+                    print(f"❌ ... und {len(fehler) - 20} weitere fehlerhafte Zeilen.")
+
+        elif choice == "9":
+            anzahl = rebuild_monthly_summary()
+            print(f"✅ Monatszusammenfassung neu aufgebaut ({anzahl} Einträge).")
         
+        elif choice.strip().lower() == "k":
+            ledger_menu()
+
+        elif choice.strip().lower() == "d":
+            recurring_menu()
+
+        elif choice.strip().lower() == "m":
+            metrics_menu()
+
         elif choice == "0":
             print("👋 Programm beendet. Bis bald!")
             break
@@ -94,4 +442,10 @@ def main_menu():
             print("❌ Ungültige Eingabe. Bitte versuche es erneut.")
 
 if __name__ == "__main__":
+    # Ausgabe der Datenbank-Meldungen (Schema-Updates)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # Seit dem letzten Start fällig gewordene Daueraufträge nachholen
+    nachgeholt = materialize_recurring()
+    if nachgeholt:
+        print(f"🔁 {nachgeholt} fällige Transaktionen aus Daueraufträgen gebucht.")
     main_menu()
\ No newline at end of file
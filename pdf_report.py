@@ -0,0 +1,194 @@
+"""
+Seitenweiser PDF-Bericht (reportlab) für beliebig grosse Transaktionslisten.
+
+Die Zeilen werden als Iterator übergeben (z. B. direkt aus einem Cursor) und
+sofort gezeichnet, es wird nie die ganze Liste im Speicher gehalten.
+Erwartet werden Tupel (id, typ, betrag_in_rappen, kategorie, datum), sortiert nach
+Typ (zuerst Einnahmen, dann Ausgaben) – also eine einzige geordnete Abfrage.
+Bei einem Seitenumbruch wird eine Zwischensumme der Seite gezeichnet und der
+Tabellenkopf auf der neuen Seite wiederholt. Diagramme (PNG, z. B. aus
+charts.render_chart) folgen auf eigenen Seiten nach der Zusammenfassung.
+"""
+import io
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+from reportlab.lib.colors import red, green, black
+
+from formatting import format_amount, format_date
+
+# Abschnitte in der Reihenfolge der Abfrage: Titel und Farbe je Typ
+SECTIONS = {
+    "Einnahme": ("Einnahmen", green),
+    "Ausgabe": ("Ausgaben", red),
+}
+
+PAGE_TITLE_Y = 750
+TABLE_TOP_Y = 720
+PAGE_BOTTOM_Y = 70
+FOOTER_Y = 30
+ROW_HEIGHT = 20
+SUMMARY_HEIGHT = 70
+CHART_LEFT_X = 40
+CHART_WIDTH = 530
+
+
+class PdfReport:
+    """
+    Zeichnet einen Transaktionsbericht Seite für Seite.
+    Nach render() stehen Seitenzahl, Zeilenzahl, Summen (Rappen) sowie die
+    niedrigste und höchste gezeichnete ID (min_id/max_id) als Attribute zur Verfügung.
+    """
+
+    def __init__(self, filename, title="📊 Finanz-Tracker - Transaktionen"):
+        self.filename = filename
+        self.title = title
+        self.pages = 0
+        self.rows = 0
+        self.totals = {"Einnahme": 0, "Ausgabe": 0}
+        self.min_id = None
+        self.max_id = None
+        self._canvas = canvas.Canvas(filename, pagesize=letter)
+        self._section = None
+        self._section_pages = 0
+        self._page_total = 0
+        self._y = TABLE_TOP_Y
+
+    # ------------------------------
+    # Seiten- und Abschnittsaufbau
+    # ------------------------------
+    def _new_page(self):
+        c = self._canvas
+        if self.pages:
+            c.showPage()
+        self.pages += 1
+        c.setFillColor(black)
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(200, PAGE_TITLE_Y, self.title)
+        c.setFont("Helvetica", 8)
+        c.drawRightString(570, FOOTER_Y, f"Seite {self.pages}")
+        self._y = TABLE_TOP_Y
+
+    def _draw_table_header(self, continued=False):
+        c = self._canvas
+        title, color = SECTIONS.get(self._section, (self._section, black))
+        c.setFont("Helvetica-Bold", 10)
+        c.setFillColor(color)
+        c.drawString(40, self._y, f"■ {title}{' (Fortsetzung)' if continued else ''}")
+        c.setFillColor(black)
+        self._y -= 15
+        c.setFont("Helvetica-Bold", 9)
+        c.drawString(40, self._y, "ID")
+        c.drawString(80, self._y, "Typ")
+        c.drawString(160, self._y, "Kategorie")
+        c.drawString(300, self._y, "Betrag")
+        c.drawString(420, self._y, "Datum")
+        self._y -= 15
+        c.setFont("Helvetica", 9)
+
+    def _draw_total_line(self, label, amount, color=black):
+        c = self._canvas
+        c.setFont("Helvetica-Bold", 9)
+        c.setFillColor(color)
+        c.drawString(160, self._y, label)
+        c.drawString(300, self._y, "CHF")
+        c.drawRightString(380, self._y, format_amount(amount))
+        c.setFillColor(black)
+        c.setFont("Helvetica", 9)
+        self._y -= 15
+
+    def _start_section(self, ttype):
+        if self._section is not None:
+            self._end_section()
+            self._y -= 15
+        if self.pages == 0 or self._y - 30 - ROW_HEIGHT < PAGE_BOTTOM_Y:
+            self._new_page()
+        self._section = ttype
+        self._section_pages = 1
+        self._page_total = 0
+        self._draw_table_header()
+
+    def _page_break(self):
+        self._draw_total_line("Zwischensumme Seite", self._page_total)
+        self._new_page()
+        self._section_pages += 1
+        self._page_total = 0
+        self._draw_table_header(continued=True)
+
+    def _end_section(self):
+        title = SECTIONS.get(self._section, (self._section, black))[0]
+        if self._section_pages > 1:
+            self._draw_total_line("Zwischensumme Seite", self._page_total)
+        self._draw_total_line(f"Total {title}", self.totals.get(self._section, 0))
+
+    def _draw_row(self, row):
+        c = self._canvas
+        rid, ttype, amount, category, date = row[:5]
+        c.drawString(40, self._y, str(rid))
+        c.drawString(80, self._y, ttype)
+        c.drawString(160, self._y, category)
+        c.drawString(300, self._y, "CHF")
+        c.drawRightString(380, self._y, format_amount(amount))
+        c.drawString(420, self._y, format_date(date))
+        self._y -= ROW_HEIGHT
+
+        self.rows += 1
+        self._page_total += amount
+        self.totals[ttype] = self.totals.get(ttype, 0) + amount
+        if self.max_id is None or rid > self.max_id:
+            self.max_id = rid
+        if self.min_id is None or rid < self.min_id:
+            self.min_id = rid
+
+    def _draw_summary(self):
+        c = self._canvas
+        total_income = self.totals.get("Einnahme", 0)
+        total_expenses = self.totals.get("Ausgabe", 0)
+        if self.pages == 0 or self._y - SUMMARY_HEIGHT < FOOTER_Y + 10:
+            self._new_page()
+        self._y -= 20
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(40, self._y, "■ Gesamteinnahmen:")
+        c.drawString(300, self._y, "CHF")
+        c.drawRightString(380, self._y, format_amount(total_income))
+        self._y -= 15
+        c.drawString(40, self._y, "■ Gesamtausgaben:")
+        c.drawString(300, self._y, "CHF")
+        c.drawRightString(380, self._y, format_amount(total_expenses))
+        self._y -= 15
+        c.setFillColor(green)
+        c.drawString(40, self._y, "■ Verbleibendes Guthaben:")
+        c.drawString(300, self._y, "CHF")
+        c.drawRightString(380, self._y, format_amount(total_income - total_expenses))
+        c.setFillColor(black)
+
+    def _draw_chart(self, image):
+        self._new_page()
+        reader = ImageReader(io.BytesIO(image))
+        width, height = reader.getSize()
+        height = min(CHART_WIDTH * height / width, PAGE_TITLE_Y - 30 - FOOTER_Y - 20)
+        self._canvas.drawImage(reader, CHART_LEFT_X, PAGE_TITLE_Y - 30 - height, CHART_WIDTH, height,
+                               preserveAspectRatio=True, anchor="n")
+
+    # ------------------------------
+    # Öffentliche API
+    # ------------------------------
+    def render(self, rows, charts=()):
+        """
+        Zeichnet alle Zeilen, die Gesamtsummen und danach je ein Diagramm
+        (PNG als bytes) pro Seite und speichert die PDF-Datei.
+        """
+        for row in rows:
+            if row[1] != self._section:
+                self._start_section(row[1])
+            elif self._y < PAGE_BOTTOM_Y:
+                self._page_break()
+            self._draw_row(row)
+        if self._section is not None:
+            self._end_section()
+        self._draw_summary()
+        for image in charts:
+            self._draw_chart(image)
+        self._canvas.save()
+        return self
@@ -0,0 +1,51 @@
+"""
+Daueraufträge (Miete, Versicherung, Lohn ...) buchen.
+
+Bucht alle seit dem letzten Lauf fälligen Vorkommen in einer einzigen
+Transaktion (database.materialize_recurring). Der Lauf ist idempotent und
+eignet sich für Cron oder die Aufgabenplanung: ein zweiter Aufruf am selben
+Tag bucht nichts, nach Monaten ohne Lauf wird alles auf einmal nachgeholt.
+
+Aufruf (aus dem Projektverzeichnis):
+    python recurring.py [--until YYYY-MM-DD] [--db pfad]   # fällige Vorkommen buchen
+    python recurring.py --list                             # Daueraufträge anzeigen
+
+Anlegen und Löschen: Menü „D“ im CLI (main.py) oder database.add_recurring_rule().
+"""
+import argparse
+import sys
+
+import database
+
+
+def print_rules(rules):
+    """Gibt die Daueraufträge als Tabelle aus."""
+    if not rules:
+        print("❌ Keine Daueraufträge vorhanden.")
+        return
+    print(f"{'Nr':<5} {'Typ':<10} {'Betrag':>12}  {'Kategorie':<20} {'Rhythmus':<16} {'Ab':<11} {'Bis':<11} Nächste")
+    for r in rules:
+        print(f"{r.id:<5} {r.type:<10} {database.format_chf(r.amount):>12}  {r.category:<20} {r.cadence:<16} "
+              f"{r.start:<11} {r.end or '-':<11} {r.next_due or 'beendet'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fällige Daueraufträge buchen.")
+    parser.add_argument("--until", type=database.parse_day, default=None,
+                        help="Stichtag (YYYY-MM-DD), Standard: heute")
+    parser.add_argument("--list", action="store_true", help="Daueraufträge anzeigen statt buchen")
+    parser.add_argument("--db", default=None, help="Pfad zur Datenbank")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        database.set_db_path(args.db)
+    if args.list:
+        print_rules(database.get_recurring_rules())
+        return 0
+    count = database.materialize_recurring(args.until)
+    print(f"✅ {count} fällige Transaktionen aus Daueraufträgen gebucht.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
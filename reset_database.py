@@ -1,14 +1,8 @@
-import sqlite3
+from database import reset_transactions
 
-# Verbindung zur Datenbank
-conn = sqlite3.connect("finanz_tracker.db")
-cursor = conn.cursor()
+# ALLE Einträge aus der Tabelle "transactions" löschen, ID-Zähler und
+# Monatszusammenfassung, Kategorien sowie das Export-Journal zurücksetzen
+# (Daueraufträge und ihre Kategorien bleiben bestehen)
+reset_transactions()
 
-# ALLE Einträge aus der Tabelle "transactions" löschen
-cursor.execute("DELETE FROM transactions")
-
-# Änderungen speichern und Verbindung schließen
-conn.commit()
-conn.close()
-
-print("✅ Alle gespeicherten Transaktionen wurden gelöscht!")
+print("✅ Alle gespeicherten Transaktionen wurden gelöscht und ID zurückgesetzt!")